@@ -0,0 +1,16 @@
+"""
+Celery config for srtask project.
+
+Workers are started with ``celery -A srtask worker``; settings prefixed with
+``CELERY_`` in srtask/settings.py configure the app.
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'srtask.settings')
+
+app = Celery('srtask')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
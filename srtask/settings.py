@@ -39,6 +39,8 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'allauth.account.middleware.AccountMiddleware',
     'django_htmx.middleware.HtmxMiddleware',
+    'tasks.middleware.ActivityLogMiddleware',
+    'tasks.middleware.ReplicaMiddleware',
 ]
 
 ROOT_URLCONF = 'srtask.urls'
@@ -69,6 +71,33 @@ DATABASES = {
     }
 }
 
+# Read replicas (optional) - one database NAME per replica, plus
+# DB_REPLICA_HOSTS for server databases. Read-only views read from them
+# (see tasks/routers.py); a user who just wrote stays on the primary for
+# REPLICA_STICKY_SECONDS, which needs a cache shared by all processes
+# (check tasks.E001). Locally, DB_REPLICA_NAMES=replica.sqlite3 with
+# `manage.py refresh_replicas --every 5` and a file-based cache stand in.
+DB_REPLICA_NAMES = config('DB_REPLICA_NAMES', default='', cast=Csv())
+DB_REPLICA_HOSTS = config('DB_REPLICA_HOSTS', default='', cast=Csv())
+for index, name in enumerate(DB_REPLICA_NAMES):
+    replica = {**DATABASES['default'], 'NAME': name, 'TEST': {'MIRROR': 'default'}}
+    if index < len(DB_REPLICA_HOSTS):
+        replica['HOST'] = DB_REPLICA_HOSTS[index]
+    DATABASES[f'replica{index + 1}'] = replica
+DATABASE_ROUTERS = ['tasks.routers.ReplicaRouter']
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=10, cast=int)
+
+# Cache - local memory by default; point at Redis in production, e.g.
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+# CACHE_LOCATION=redis://localhost:6379/1
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default=''),
+    }
+}
+SIDEBAR_CACHE_TIMEOUT = config('SIDEBAR_CACHE_TIMEOUT', default=300, cast=int)
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -116,6 +145,8 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_PAGINATION_CLASS': 'tasks.api.pagination.IdCursorPagination',
+    'PAGE_SIZE': 100,
 }
 
 # Celery
@@ -123,3 +154,39 @@ CELERY_BROKER_URL = config('CELERY_BROKER_URL', default='redis://localhost:6379/
 CELERY_RESULT_BACKEND = config('CELERY_RESULT_BACKEND', default='redis://localhost:6379/0')
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
+CELERY_BEAT_SCHEDULE = {
+    # Idempotent, so running it hourly only matters after downtime
+    'materialize-recurring-tasks': {
+        'task': 'tasks.tasks.materialize_recurring_tasks',
+        'schedule': 60 * 60,
+    },
+    # Picks up changes saved without signals, such as queryset updates
+    'sync-google-calendars': {
+        'task': 'tasks.tasks.sync_all_google_calendars',
+        'schedule': 5 * 60,
+    },
+}
+
+# Live updates - task changes streamed to open tabs over SSE (needs ASGI).
+# 'redis' fans out through LIVE_UPDATES_REDIS_URL; 'memory' stays in-process
+LIVE_UPDATES_BACKEND = config('LIVE_UPDATES_BACKEND', default='redis')
+LIVE_UPDATES_REDIS_URL = config('LIVE_UPDATES_REDIS_URL', default=CELERY_BROKER_URL)
+LIVE_UPDATES_KEEPALIVE = config('LIVE_UPDATES_KEEPALIVE', default=15, cast=int)  # seconds between keepalive comments
+
+# Activity log - 'on_commit' (bulk write in-process), 'celery' or 'sync'
+ACTIVITY_LOG_MODE = config('ACTIVITY_LOG_MODE', default='on_commit')
+ACTIVITY_LOG_BATCH_SIZE = config('ACTIVITY_LOG_BATCH_SIZE', default=500, cast=int)
+ACTIVITY_LOG_RETENTION_DAYS = config('ACTIVITY_LOG_RETENTION_DAYS', default=365, cast=int)
+
+# Recurring tasks - how many days ahead occurrences are created (or, with
+# RECURRENCE_VIRTUAL_UPCOMING, generated on the fly for Upcoming instead)
+RECURRENCE_HORIZON_DAYS = config('RECURRENCE_HORIZON_DAYS', default=14, cast=int)
+RECURRENCE_VIRTUAL_UPCOMING = config('RECURRENCE_VIRTUAL_UPCOMING', default=False, cast=bool)
+
+# Google Calendar sync - point the URLs at `manage.py fake_calendar_server` to test offline
+GOOGLE_CLIENT_ID = config('GOOGLE_CLIENT_ID', default='')
+GOOGLE_CLIENT_SECRET = config('GOOGLE_CLIENT_SECRET', default='')
+GOOGLE_CALENDAR_API_URL = config('GOOGLE_CALENDAR_API_URL', default='https://www.googleapis.com')
+GOOGLE_OAUTH_TOKEN_URL = config('GOOGLE_OAUTH_TOKEN_URL', default='https://oauth2.googleapis.com/token')
+GOOGLE_CALENDAR_RATE_LIMIT = config('GOOGLE_CALENDAR_RATE_LIMIT', default=10.0, cast=float)  # calls/second per connection
+GOOGLE_CALENDAR_SYNC_DELAY = config('GOOGLE_CALENDAR_SYNC_DELAY', default=10, cast=int)  # seconds edits are coalesced
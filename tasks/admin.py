@@ -2,8 +2,9 @@ from django.contrib import admin
 from .models import (
     Area, Project, Tag, Task, TaskStep, TaskNote,
     ActivityLog, GoogleCalendarConnection, GoogleCalendarSync,
-    SavedFilter, PomodoroSession,
+    SavedFilter, PomodoroSession, CalendarFeed,
 )
+from .services.search import filter_matching
 
 
 @admin.register(Area)
@@ -41,6 +42,12 @@ class TaskAdmin(admin.ModelAdmin):
     search_fields = ['title', 'description']
     inlines = [TaskStepInline, TaskNoteInline]
 
+    def get_search_results(self, request, queryset, search_term):
+        # Use the full-text index instead of icontains scans over search_fields
+        if not search_term:
+            return queryset, False
+        return filter_matching(queryset, search_term), False
+
 
 @admin.register(TaskStep)
 class TaskStepAdmin(admin.ModelAdmin):
@@ -60,7 +67,8 @@ class ActivityLogAdmin(admin.ModelAdmin):
 
 @admin.register(GoogleCalendarConnection)
 class GoogleCalendarConnectionAdmin(admin.ModelAdmin):
-    list_display = ['user', 'calendar_id', 'sync_all_tasks']
+    list_display = ['user', 'calendar_id', 'sync_all_tasks', 'needs_reauth']
+    list_filter = ['needs_reauth']
 
 
 @admin.register(GoogleCalendarSync)
@@ -68,6 +76,11 @@ class GoogleCalendarSyncAdmin(admin.ModelAdmin):
     list_display = ['task', 'sync_status', 'last_synced_at']
 
 
+@admin.register(CalendarFeed)
+class CalendarFeedAdmin(admin.ModelAdmin):
+    list_display = ['user', 'created_at', 'updated_at']
+
+
 @admin.register(SavedFilter)
 class SavedFilterAdmin(admin.ModelAdmin):
     list_display = ['name', 'user']
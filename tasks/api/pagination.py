@@ -0,0 +1,8 @@
+from rest_framework.pagination import CursorPagination
+
+
+class IdCursorPagination(CursorPagination):
+    """Cursor pagination on the immutable primary key, stable for sync clients."""
+    ordering = 'id'
+    page_size_query_param = 'page_size'
+    max_page_size = 500
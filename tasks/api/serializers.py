@@ -0,0 +1,131 @@
+from rest_framework import serializers
+
+from tasks.models import Area, Project, Tag, Task, TaskStep
+from tasks.services.recurrence import parse_rule
+
+
+def requested_fields(request):
+    """Field names from a ?fields=a,b,c sparse fieldset, or None for all fields."""
+    if request is None or request.method != 'GET':
+        return None
+    raw = request.query_params.get('fields')
+    if not raw:
+        return None
+    return {name.strip() for name in raw.split(',') if name.strip()} | {'id'}
+
+
+class SparseFieldsetMixin:
+    """Drop serializer fields not listed in ?fields= on read requests."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        wanted = requested_fields(self.context.get('request'))
+        if wanted is not None:
+            for name in set(self.fields) - wanted:
+                self.fields.pop(name)
+
+
+class UserScopedRelatedMixin:
+    """Limit related-object choices to the requesting user's own rows."""
+    scoped_fields = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        for name, lookup in self.scoped_fields.items():
+            if name in fields and not fields[name].read_only:
+                field = getattr(fields[name], 'child_relation', fields[name])
+                model = field.queryset.model
+                field.queryset = model.objects.filter(**{lookup: request.user}) if request else model.objects.none()
+        return fields
+
+
+class AreaSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Area
+        fields = ['id', 'name', 'color', 'icon', 'sort_order', 'created_at', 'updated_at']
+        read_only_fields = ['created_at', 'updated_at']
+
+
+class ProjectSerializer(SparseFieldsetMixin, UserScopedRelatedMixin, serializers.ModelSerializer):
+    scoped_fields = {'area': 'user'}
+
+    class Meta:
+        model = Project
+        fields = [
+            'id', 'name', 'description', 'area', 'color', 'is_completed', 'completed_at',
+            'sort_order', 'created_at', 'updated_at',
+        ]
+        read_only_fields = ['completed_at', 'created_at', 'updated_at']
+
+
+class TagSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Tag
+        fields = ['id', 'name', 'color', 'created_at', 'updated_at']
+        read_only_fields = ['created_at', 'updated_at']
+
+
+class TaskStepSerializer(SparseFieldsetMixin, UserScopedRelatedMixin, serializers.ModelSerializer):
+    scoped_fields = {'task': 'user'}
+
+    class Meta:
+        model = TaskStep
+        fields = ['id', 'task', 'title', 'is_completed', 'sort_order', 'created_at', 'updated_at']
+        read_only_fields = ['created_at', 'updated_at']
+
+
+class NestedStepSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = TaskStep
+        fields = ['id', 'title', 'is_completed', 'sort_order']
+
+
+TASK_FIELDS = [
+    'id', 'title', 'description', 'priority', 'status', 'due_date', 'due_time', 'start_date',
+    'completed_at', 'is_my_day', 'my_day_date', 'is_recurring', 'recurrence_rule', 'recurrence_parent',
+    'sync_to_google_calendar', 'estimated_minutes', 'project', 'tags', 'sort_order',
+    'steps_total', 'steps_done', 'steps', 'created_at', 'updated_at',
+]
+TASK_READ_ONLY_FIELDS = [
+    'completed_at', 'recurrence_parent', 'steps_total', 'steps_done', 'created_at', 'updated_at',
+]
+
+
+class RecurrenceRuleMixin:
+    def validate_recurrence_rule(self, value):
+        if value:
+            try:
+                parse_rule(value)
+            except ValueError:
+                raise serializers.ValidationError('Not a valid iCalendar RRULE.')
+        return value
+
+
+class TaskSerializer(SparseFieldsetMixin, UserScopedRelatedMixin, RecurrenceRuleMixin, serializers.ModelSerializer):
+    scoped_fields = {'project': 'user', 'tags': 'user'}
+    steps = NestedStepSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Task
+        fields = TASK_FIELDS
+        read_only_fields = TASK_READ_ONLY_FIELDS
+        # task_occurrence_unique only involves the read-only recurrence_parent
+        validators = []
+
+
+class TaskBulkWriteSerializer(RecurrenceRuleMixin, serializers.ModelSerializer):
+    """Validates one row of a bulk write without per-row database lookups.
+
+    project and tags arrive as raw ids; the view resolves every row's ids
+    against the user's projects and tags in one query each.
+    """
+    id = serializers.IntegerField(required=False)
+    project = serializers.IntegerField(required=False, allow_null=True)
+    tags = serializers.ListField(child=serializers.IntegerField(), required=False)
+
+    class Meta:
+        model = Task
+        fields = [name for name in TASK_FIELDS if name not in ('steps',)]
+        read_only_fields = TASK_READ_ONLY_FIELDS
+        validators = []
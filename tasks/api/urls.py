@@ -0,0 +1,14 @@
+from rest_framework.routers import DefaultRouter
+
+from . import views
+
+app_name = 'api'
+
+router = DefaultRouter()
+router.register('tasks', views.TaskViewSet, basename='task')
+router.register('steps', views.TaskStepViewSet, basename='step')
+router.register('projects', views.ProjectViewSet, basename='project')
+router.register('areas', views.AreaViewSet, basename='area')
+router.register('tags', views.TagViewSet, basename='tag')
+
+urlpatterns = router.urls
@@ -0,0 +1,263 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from tasks.models import Area, Project, Tag, Task, TaskStep
+from tasks.services.activity import log_activity, log_activity_bulk
+from tasks.services.bulk import apply_bulk_action, set_status
+from tasks.services.google_calendar import SYNCED_FIELDS, sync_soon
+from tasks.services.live import publish_task_changes
+from tasks.services.search import search_tasks
+from tasks.services.stamps import touch_workspace
+from tasks.services.steps import adjust_step_counters
+
+from .serializers import (
+    AreaSerializer, ProjectSerializer, TagSerializer, TaskBulkWriteSerializer,
+    TaskSerializer, TaskStepSerializer, requested_fields,
+)
+
+MAX_BULK_SIZE = 1000
+
+
+class UserOwnedViewSet(viewsets.ModelViewSet):
+    """CRUD over the requesting user's own rows of model."""
+    model = None
+
+    def get_queryset(self):
+        queryset = self.model.objects.filter(user=self.request.user)
+        wanted = requested_fields(self.request)
+        if wanted is not None:
+            concrete = {f.name for f in self.model._meta.concrete_fields}
+            queryset = queryset.only(*(wanted & concrete))
+        return queryset
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+
+class AreaViewSet(UserOwnedViewSet):
+    model = Area
+    serializer_class = AreaSerializer
+
+
+class ProjectViewSet(UserOwnedViewSet):
+    model = Project
+    serializer_class = ProjectSerializer
+
+
+class TagViewSet(UserOwnedViewSet):
+    model = Tag
+    serializer_class = TagSerializer
+
+
+class TaskViewSet(UserOwnedViewSet):
+    """Tasks, plus bulk endpoints that cost a fixed number of queries per batch.
+
+    List filters: ?status=, ?project=, ?updated_since=<ISO datetime>.
+    Full-text search: GET search/?q=<words>&page=<n>, best match first.
+    """
+    model = Task
+    serializer_class = TaskSerializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        wanted = requested_fields(self.request)
+        for relation in ('tags', 'steps'):
+            if wanted is None or relation in wanted:
+                queryset = queryset.prefetch_related(relation)
+
+        params = self.request.query_params
+        if 'status' in params:
+            queryset = queryset.filter(status__in=params['status'].split(','))
+        if 'project' in params:
+            queryset = queryset.filter(project_id=params['project'] or None)
+        if 'updated_since' in params:
+            since = parse_datetime(params['updated_since'])
+            if since is None:
+                raise ValidationError({'updated_since': 'Expected an ISO 8601 datetime.'})
+            queryset = queryset.filter(updated_at__gt=since)
+        return queryset
+
+    @transaction.atomic
+    def perform_create(self, serializer):
+        task = serializer.save(user=self.request.user)
+        log_activity(task, 'created', 'Task created')
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        # Completing and reopening have side effects, which set_status() applies
+        new_status = serializer.validated_data.pop('status', None)
+        task = serializer.save()
+        log_activity(task, 'edited', 'Task updated')
+        if new_status is not None and new_status != task.status:
+            set_status(Task.objects.filter(pk=task.pk), new_status)
+            task.refresh_from_db(fields=['status', 'completed_at', 'updated_at'])
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            raise ValidationError({'q': 'This parameter is required.'})
+        try:
+            page = max(int(request.query_params.get('page', 1)), 1)
+        except ValueError:
+            raise ValidationError({'page': 'Expected a page number.'})
+        results = search_tasks(
+            request.user, query, page=page, queryset=Task.objects.prefetch_related('tags', 'steps'),
+        )
+        return Response({
+            'page': results.page,
+            'has_next': results.has_next,
+            'results': self.get_serializer(results.tasks, many=True).data,
+        })
+
+    # Bulk endpoints
+
+    def _bulk_rows(self, data, partial=False):
+        if not isinstance(data, list):
+            raise ValidationError('Expected a list of tasks.')
+        if len(data) > MAX_BULK_SIZE:
+            raise ValidationError(f'At most {MAX_BULK_SIZE} tasks per request.')
+        serializer = TaskBulkWriteSerializer(data=data, many=True, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        rows = serializer.validated_data
+        self._check_related(rows)
+        return rows
+
+    def _check_related(self, rows):
+        """Verify every referenced project and tag belongs to the user (one query each)."""
+        project_ids = {row['project'] for row in rows if row.get('project')}
+        tag_ids = {tag_id for row in rows for tag_id in row.get('tags', ())}
+        user = self.request.user
+        if project_ids - set(Project.objects.filter(user=user, pk__in=project_ids).values_list('pk', flat=True)):
+            raise ValidationError({'project': 'Unknown project.'})
+        if tag_ids - set(Tag.objects.filter(user=user, pk__in=tag_ids).values_list('pk', flat=True)):
+            raise ValidationError({'tags': 'Unknown tag.'})
+
+    def _set_tags(self, tag_map, clear=False):
+        """Replace tag links for {task_id: [tag ids]} with one delete and one insert."""
+        through = Task.tags.through
+        if clear and tag_map:
+            through.objects.filter(task_id__in=tag_map).delete()
+        through.objects.bulk_create(
+            [through(task_id=task_id, tag_id=tag_id) for task_id, tag_ids in tag_map.items() for tag_id in tag_ids],
+            ignore_conflicts=True,
+        )
+
+    def _bulk_response(self, task_ids, status_code=status.HTTP_200_OK):
+        tasks = (
+            Task.objects.filter(user=self.request.user, pk__in=task_ids)
+            .prefetch_related('tags', 'steps').order_by('id')
+        )
+        return Response(self.get_serializer(tasks, many=True).data, status=status_code)
+
+    @action(detail=False, methods=['post'], url_path='bulk-create')
+    def bulk_create(self, request):
+        rows = self._bulk_rows(request.data)
+        tasks = []
+        for row in rows:
+            row = dict(row)
+            row.pop('tags', None)
+            row.pop('id', None)
+            row['project_id'] = row.pop('project', None)
+            if row.get('status') == Task.Status.COMPLETED:
+                row['completed_at'] = timezone.now()
+            tasks.append(Task(user=request.user, **row))
+        with transaction.atomic():
+            Task.objects.bulk_create(tasks)
+            touch_workspace(request.user.pk)
+            self._set_tags({task.pk: row.get('tags', []) for task, row in zip(tasks, rows)})
+            log_activity_bulk([task.pk for task in tasks], 'created', 'Task created')
+            publish_task_changes(request.user.pk, [task.pk for task in tasks])
+        return self._bulk_response([task.pk for task in tasks], status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'], url_path='bulk-update')
+    def bulk_update(self, request):
+        rows = self._bulk_rows(request.data, partial=True)
+        if any('id' not in row for row in rows):
+            raise ValidationError({'id': 'Every row needs an id.'})
+        by_id = Task.objects.filter(user=request.user, pk__in=[row['id'] for row in rows]).in_bulk()
+        if len(by_id) != len({row['id'] for row in rows}):
+            raise ValidationError({'id': 'Unknown task.'})
+
+        now = timezone.now()
+        changed_fields = {'updated_at'}
+        tag_map = {}
+        # Status changes go through set_status(), grouped by the new status
+        status_moves = defaultdict(list)
+        for row in rows:
+            task = by_id[row['id']]
+            for name, value in row.items():
+                if name == 'id':
+                    continue
+                if name == 'status':
+                    if value != task.status:
+                        status_moves[value].append(task.pk)
+                elif name == 'tags':
+                    tag_map[task.pk] = value
+                elif name == 'project':
+                    task.project_id = value
+                    changed_fields.add('project')
+                else:
+                    setattr(task, name, value)
+                    changed_fields.add(name)
+            task.updated_at = now
+        with transaction.atomic():
+            Task.objects.bulk_update(by_id.values(), sorted(changed_fields))
+            touch_workspace(request.user.pk)
+            self._set_tags(tag_map, clear=True)
+            log_activity_bulk(list(by_id), 'edited', 'Task updated')
+            for new_status, task_ids in status_moves.items():
+                set_status(Task.objects.filter(pk__in=task_ids), new_status)
+            if SYNCED_FIELDS & changed_fields:
+                sync_soon(list(by_id), [request.user.pk])
+            publish_task_changes(request.user.pk, list(by_id))
+        return self._bulk_response(list(by_id))
+
+    @action(detail=False, methods=['post'], url_path='bulk-complete')
+    def bulk_complete(self, request):
+        ids = request.data.get('ids') if isinstance(request.data, dict) else None
+        if not isinstance(ids, list) or not all(isinstance(pk, int) for pk in ids):
+            raise ValidationError({'ids': 'Expected a list of task ids.'})
+        if len(ids) > MAX_BULK_SIZE:
+            raise ValidationError(f'At most {MAX_BULK_SIZE} tasks per request.')
+        apply_bulk_action(Task.objects.filter(user=request.user, pk__in=ids), 'complete')
+        return self._bulk_response(ids)
+
+
+class TaskStepViewSet(viewsets.ModelViewSet):
+    """Steps of the user's tasks; writes keep the task's step counters in sync."""
+    serializer_class = TaskStepSerializer
+
+    def get_queryset(self):
+        queryset = TaskStep.objects.filter(task__user=self.request.user)
+        if 'task' in self.request.query_params:
+            queryset = queryset.filter(task_id=self.request.query_params['task'])
+        return queryset
+
+    @transaction.atomic
+    def perform_create(self, serializer):
+        step = serializer.save()
+        adjust_step_counters(step.task_id, total=1, done=int(step.is_completed))
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        before = TaskStep.objects.select_for_update().get(pk=serializer.instance.pk)
+        step = serializer.save()
+        if step.task_id != before.task_id:
+            adjust_step_counters(before.task_id, total=-1, done=-int(before.is_completed))
+            adjust_step_counters(step.task_id, total=1, done=int(step.is_completed))
+        elif step.is_completed != before.is_completed:
+            adjust_step_counters(step.task_id, done=1 if step.is_completed else -1)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        task_id, was_completed = instance.task_id, instance.is_completed
+        instance.delete()
+        adjust_step_counters(task_id, total=-1, done=-int(was_completed))
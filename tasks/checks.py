@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+from tasks.routers import replicas
+
+# Each process has its own copy, so a pin set by one is invisible to the rest
+PROCESS_LOCAL_CACHES = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+@register(Tags.caches)
+def check_replica_pin_cache(app_configs, **kwargs):
+    """Replicas need a shared cache, or read-your-writes pins don't reach other processes."""
+    if replicas() and settings.CACHES['default']['BACKEND'] in PROCESS_LOCAL_CACHES:
+        return [Error(
+            'Read replicas are configured but the default cache is process-local.',
+            hint=(
+                'Primary pins set after a write must be seen by every web and Celery process; '
+                'point CACHE_BACKEND at Redis, Memcached, the database or the file system.'
+            ),
+            id='tasks.E001',
+        )]
+    return []
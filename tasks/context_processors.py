@@ -1,13 +1,73 @@
-from tasks.models import Project, Area, Tag
+import asyncio
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from tasks.models import Project, Area, Tag, SavedFilter
+from tasks.services.cache import auser_cache_key, user_cache_key
+from tasks.services.counts import asidebar_counts, sidebar_counts
+from tasks.shortcuts import alist, auser
+
+SIDEBAR_CACHE_SCOPE = 'sidebar'
+
+
+def _is_partial(request):
+    """HTMX swaps render fragments only; boosts and history restores need the full page."""
+    htmx = getattr(request, 'htmx', None)
+    return bool(htmx) and not htmx.boosted and not htmx.history_restore_request
+
+
+def _sidebar_lists(user):
+    return {
+        'sidebar_projects': Project.objects.filter(user=user, is_completed=False)[:20],
+        'sidebar_areas': Area.objects.filter(user=user)[:20],
+        'sidebar_tags': Tag.objects.filter(user=user)[:20],
+        'sidebar_saved_filters': SavedFilter.objects.filter(user=user)[:20],
+    }
+
+
+def _with_counts(data, counts):
+    for project in data['sidebar_projects']:
+        project.open_count = counts.projects.get(project.pk, 0)
+    for tag in data['sidebar_tags']:
+        tag.open_count = counts.tags.get(tag.pk, 0)
+    for saved_filter in data['sidebar_saved_filters']:
+        saved_filter.task_count = counts.filters[saved_filter.pk]
+    return {**data, 'sidebar_counts': counts}
 
 
 def sidebar_data(request):
     """Provide sidebar navigation data to all templates."""
-    if not request.user.is_authenticated:
+    if hasattr(request, 'sidebar_data'):
+        return request.sidebar_data  # gathered by an async view, see tasks.shortcuts.arender
+    if not request.user.is_authenticated or _is_partial(request):
         return {}
 
-    return {
-        'sidebar_projects': Project.objects.filter(user=request.user, is_completed=False)[:20],
-        'sidebar_areas': Area.objects.filter(user=request.user)[:20],
-        'sidebar_tags': Tag.objects.filter(user=request.user)[:20],
-    }
+    key = user_cache_key(request.user.pk, SIDEBAR_CACHE_SCOPE)
+    data = cache.get(key)
+    if data is None:
+        data = {name: list(queryset) for name, queryset in _sidebar_lists(request.user).items()}
+        cache.set(key, data, settings.SIDEBAR_CACHE_TIMEOUT)
+
+    # Counts move with every task change, so they are not cached; however
+    # long the lists, they cost a fixed three queries
+    counts = sidebar_counts(request.user, timezone.localdate(), data['sidebar_saved_filters'])
+    return _with_counts(data, counts)
+
+
+async def asidebar_data(request):
+    """sidebar_data() for async views, with the list and count queries each issued together."""
+    user = await auser(request)
+    if not user.is_authenticated or _is_partial(request):
+        return {}
+
+    key = await auser_cache_key(user.pk, SIDEBAR_CACHE_SCOPE)
+    data = await cache.aget(key)
+    if data is None:
+        lists = _sidebar_lists(user)
+        data = dict(zip(lists, await asyncio.gather(*map(alist, lists.values()))))
+        await cache.aset(key, data, settings.SIDEBAR_CACHE_TIMEOUT)
+
+    counts = await asidebar_counts(user, timezone.localdate(), data['sidebar_saved_filters'])
+    return _with_counts(data, counts)
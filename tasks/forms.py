@@ -1,5 +1,6 @@
 from django import forms
-from .models import Task, TaskStep, TaskNote, Project, Area, Tag
+from .models import Task, TaskStep, TaskNote, Project, Area, Tag, SavedFilter
+from .services.filters import FilterError, compile_filter
 
 
 class TaskForm(forms.ModelForm):
@@ -162,3 +163,33 @@ class TagForm(forms.ModelForm):
                 'class': 'h-10 w-20 rounded border border-gray-300 cursor-pointer',
             }),
         }
+
+
+class SavedFilterForm(forms.ModelForm):
+    class Meta:
+        model = SavedFilter
+        fields = ['name', 'filter_config']
+        labels = {'filter_config': 'Filter'}
+        widgets = {
+            'name': forms.TextInput(attrs={
+                'class': 'w-full px-3 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-indigo-500 focus:border-indigo-500',
+                'placeholder': 'Filter name',
+            }),
+            'filter_config': forms.Textarea(attrs={
+                'class': 'w-full px-3 py-2 border border-gray-300 rounded-lg font-mono text-sm focus:ring-2 focus:ring-indigo-500 focus:border-indigo-500',
+                'rows': 10,
+                'placeholder': '{"tags": {"any": ["work"]}, "due": "week"}',
+            }),
+        }
+
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.user = user
+
+    def clean_filter_config(self):
+        config = self.cleaned_data['filter_config']
+        try:
+            compile_filter(config, self.user, strict=True)
+        except FilterError as exc:
+            raise forms.ValidationError(str(exc))
+        return config
@@ -0,0 +1,169 @@
+import asyncio
+import io
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from itertools import cycle, islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from tasks.models import Project, Tag, Task
+
+USERNAME = 'benchmark-asgi'
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare throughput of the dashboard views served through WSGIHandler, with a '
+        'thread per request, and ASGIHandler, with every request on one event loop, at '
+        'high concurrency. Requests go straight to the handlers, without a server or '
+        'socket in between. The seeded user is committed, since the handlers read it '
+        'on their own connections, and deleted afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=2000)
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--concurrency', type=int, default=100)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, tasks, requests, concurrency, seed, **options):
+        get_user_model().objects.filter(username=USERNAME).delete()
+        user = self._seed(tasks, random.Random(seed))
+        try:
+            client = Client()
+            client.force_login(user)
+            cookie = f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}'
+            task = Task.objects.filter(user=user).first()
+            paths = [
+                reverse('tasks:my_day'), reverse('tasks:upcoming'), reverse('tasks:anytime'),
+                reverse('tasks:task_detail', args=[task.pk]),
+            ]
+
+            for label, run in [('WSGI', self._wsgi), ('ASGI', self._asgi)]:
+                run(paths[:1], cookie, len(paths), 1)  # warm caches, workspace stamp, templates
+                start = time.perf_counter()
+                results = run(paths, cookie, requests, concurrency)
+                elapsed = time.perf_counter() - start
+                timings = [ms for ms, _ in results]
+                errors = sum(1 for _, status in results if status != 200)
+                self.stdout.write(
+                    f'{label}: {len(results) / elapsed:.0f} req/s, p50={statistics.median(timings):.1f}ms '
+                    f'p95={self._p95(timings):.1f}ms, {errors} errors, '
+                    f'{requests} requests at concurrency {concurrency}'
+                )
+        finally:
+            user.delete()
+
+    def _seed(self, count, rng):
+        user = get_user_model().objects.create_user(username=USERNAME, email=f'{USERNAME}@example.com')
+        today = timezone.localdate()
+        projects = Project.objects.bulk_create([Project(user=user, name=f'Project {i}') for i in range(10)])
+        tags = Tag.objects.bulk_create([Tag(user=user, name=f'tag-{i}') for i in range(10)])
+        created = Task.objects.bulk_create([
+            Task(
+                user=user,
+                title=f'Benchmark task {i}',
+                project=rng.choice(projects) if rng.random() < 0.5 else None,
+                due_date=today + timedelta(days=rng.randint(0, 60)) if rng.random() < 0.6 else None,
+                is_my_day=rng.random() < 0.02,
+            )
+            for i in range(count)
+        ], batch_size=1000)
+        Task.tags.through.objects.bulk_create([
+            Task.tags.through(task_id=task.pk, tag_id=rng.choice(tags).pk)
+            for task in created if rng.random() < 0.3
+        ], batch_size=1000)
+        self.stdout.write(f'Seeded {count} tasks.')
+        return user
+
+    def _wsgi(self, paths, cookie, requests, concurrency):
+        handler = WSGIHandler()
+
+        def call(path):
+            statuses = []
+            start = time.perf_counter()
+            body = handler(self._environ(path, cookie), lambda status, headers: statuses.append(status))
+            try:
+                b''.join(body)
+            finally:
+                body.close()
+            return (time.perf_counter() - start) * 1000, int(statuses[0].split()[0])
+
+        with ThreadPoolExecutor(concurrency) as pool:
+            return list(pool.map(call, islice(cycle(paths), requests)))
+
+    def _asgi(self, paths, cookie, requests, concurrency):
+        handler = ASGIHandler()
+        limit = asyncio.Semaphore(concurrency)
+
+        async def call(path):
+            received = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+            statuses = []
+
+            async def receive():
+                if received:
+                    return received.pop()
+                await asyncio.Event().wait()  # the client never disconnects; Django cancels this wait
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    statuses.append(message['status'])
+
+            async with limit:
+                start = time.perf_counter()
+                await handler(self._scope(path, cookie), receive, send)
+                return (time.perf_counter() - start) * 1000, statuses[0]
+
+        async def main():
+            return await asyncio.gather(*[call(path) for path in islice(cycle(paths), requests)])
+
+        return asyncio.run(main())
+
+    @staticmethod
+    def _environ(path, cookie):
+        return {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': path,
+            'QUERY_STRING': '',
+            'SERVER_NAME': 'localhost',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'HTTP_HOST': 'localhost',
+            'HTTP_COOKIE': cookie,
+            'wsgi.input': io.BytesIO(),
+            'wsgi.errors': sys.stderr,
+            'wsgi.url_scheme': 'http',
+        }
+
+    @staticmethod
+    def _scope(path, cookie):
+        return {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': b'',
+            'root_path': '',
+            'headers': [(b'host', b'localhost'), (b'cookie', cookie.encode())],
+            'client': ('127.0.0.1', 0),
+            'server': ('localhost', 80),
+        }
+
+    @staticmethod
+    def _p95(timings):
+        ordered = sorted(timings)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
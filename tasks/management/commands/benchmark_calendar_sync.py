@@ -0,0 +1,103 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import override_settings
+from django.utils import timezone
+
+from tasks.models import GoogleCalendarConnection, Task
+from tasks.services.fake_calendar import FakeCalendarServer
+from tasks.services.google_calendar import sync_connection
+from tasks.services.http import HttpSession
+
+
+class Command(BaseCommand):
+    help = (
+        'Sync a throwaway user\'s tasks to an in-process fake Calendar API through a full '
+        'first sync and a few rounds of edits, reporting the work and API calls each took. '
+        'All seeded rows are rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=2000)
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Share of calls the server fails with 503.')
+        parser.add_argument('--rate-limit', type=int, default=None, help='Server-side calls per second before 429s.')
+        parser.add_argument('--client-rate', type=float, default=0, help='GOOGLE_CALENDAR_RATE_LIMIT (0 = unpaced).')
+        parser.add_argument('--latency', type=float, default=0.0, help='Seconds the server adds to every request.')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, tasks, error_rate, rate_limit, client_rate, latency, seed, **options):
+        server = FakeCalendarServer(error_rate=error_rate, rate_limit=rate_limit, latency=latency, seed=seed)
+        server.start()
+        session = HttpSession()
+        try:
+            with transaction.atomic(), override_settings(
+                GOOGLE_CALENDAR_API_URL=server.url,
+                GOOGLE_OAUTH_TOKEN_URL=server.token_url,
+                GOOGLE_CALENDAR_RATE_LIMIT=client_rate,
+            ):
+                rng = random.Random(seed)
+                connection = self._seed(tasks, rng)
+                user_tasks = Task.objects.filter(user=connection.user)
+                self._run('first sync (full scan)', connection, session, server)
+                self._run('nothing changed', connection, session, server)
+                user_tasks.update(updated_at=timezone.now())
+                self._run('every task saved, no visible change', connection, session, server)
+                edited = rng.sample(list(user_tasks.values_list('pk', flat=True)), max(1, tasks // 100))
+                user_tasks.filter(pk__in=edited).update(title='Benchmark task (renamed)', updated_at=timezone.now())
+                self._run('1% of tasks renamed', connection, session, server)
+                transaction.set_rollback(True)
+        finally:
+            session.close()
+            server.stop()
+
+    def _seed(self, count, rng):
+        user = get_user_model().objects.create_user(
+            username='benchmark-calendar', email='benchmark-calendar@example.com',
+        )
+        # An already expired token, so the first run refreshes it
+        connection = GoogleCalendarConnection.objects.create(
+            user=user, access_token='expired', refresh_token='benchmark', token_expiry=timezone.now(),
+        )
+        today = timezone.localdate()
+        Task.objects.bulk_create(
+            [
+                Task(user=user, title=f'Benchmark task {i}', sync_to_google_calendar=True,
+                     due_date=today + timedelta(days=rng.randint(0, 90)))
+                for i in range(count)
+            ],
+            batch_size=5000,
+        )
+        self.stdout.write(f'Seeded {count} tasks.\n')
+        return connection
+
+    def _run(self, label, connection, session, server):
+        server.stats.clear()
+        pushed = flagged = unchanged = calls = retried = backoffs = 0
+        waited = 0.0
+        start = time.perf_counter()
+        while True:
+            connection.refresh_from_db()
+            result = sync_connection(connection, session=session)
+            pushed += result.pushed
+            flagged += result.flagged
+            unchanged += result.unchanged
+            calls += result.calls
+            retried += result.retried
+            if result.retry_at:
+                backoffs += 1
+                pause = max(0.0, (result.retry_at - timezone.now()).total_seconds())
+                waited += pause
+                time.sleep(pause)
+            elif not result.remaining:
+                break
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.MIGRATE_HEADING(label))
+        self.stdout.write(
+            f'flagged={flagged} pushed={pushed} unchanged={unchanged} in {elapsed:.2f}s '
+            f'({waited:.1f}s backing off) calls={calls} retried={retried} backoffs={backoffs}\n'
+            f'server: ' + ' '.join(f'{key}={value}' for key, value in sorted(server.stats.items())) + '\n'
+        )
@@ -0,0 +1,85 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from tasks.models import Task
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway user with many tasks and compare query plans and timings '
+        'for the legacy OR/DISTINCT My Day query against the single-filter one. '
+        'All seeded rows are rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=100_000)
+        parser.add_argument('--runs', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, tasks, runs, seed, **options):
+        with transaction.atomic():
+            user = self._seed(tasks, random.Random(seed))
+            today = timezone.localdate()
+            open_statuses = [Task.Status.TODO, Task.Status.IN_PROGRESS]
+
+            legacy = (
+                Task.objects.filter(user=user, status__in=open_statuses).filter(is_my_day=True)
+                | Task.objects.filter(user=user, status__in=open_statuses, due_date=today)
+            ).distinct()
+            current = Task.objects.my_day(user, today)
+
+            for label, qs in [('legacy (OR + DISTINCT)', legacy), ('single filter', current)]:
+                self.stdout.write(self.style.MIGRATE_HEADING(label))
+                self.stdout.write(qs.explain())
+                timings = self._time(qs, runs)
+                self.stdout.write(
+                    f'rows={qs.count()} p50={statistics.median(timings):.2f}ms '
+                    f'p95={self._p95(timings):.2f}ms over {runs} runs\n'
+                )
+            transaction.set_rollback(True)
+
+    def _seed(self, count, rng):
+        User = get_user_model()
+        user = User.objects.create_user(
+            username='benchmark-my-day', email='benchmark-my-day@example.com',
+        )
+        today = timezone.localdate()
+        statuses = [Task.Status.TODO, Task.Status.IN_PROGRESS, Task.Status.COMPLETED, Task.Status.CANCELLED]
+        batch = []
+        for i in range(count):
+            batch.append(Task(
+                user=user,
+                title=f'Benchmark task {i}',
+                status=rng.choices(statuses, weights=[5, 1, 12, 1])[0],
+                due_date=today + timedelta(days=rng.randint(-365, 365)) if rng.random() < 0.7 else None,
+                is_my_day=rng.random() < 0.01,
+            ))
+            if len(batch) == 5000:
+                Task.objects.bulk_create(batch)
+                batch = []
+        Task.objects.bulk_create(batch)
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        self.stdout.write(f'Seeded {count} tasks on {connection.vendor}.\n')
+        return user
+
+    def _time(self, qs, runs):
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            list(qs.all())
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings
+
+    @staticmethod
+    def _p95(timings):
+        ordered = sorted(timings)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
@@ -0,0 +1,34 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.services.workspace import KINDS_BY_NAME, iter_csv, iter_ndjson
+
+
+class Command(BaseCommand):
+    help = "Stream a user's whole workspace as NDJSON, or one row type as CSV."
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('--format', choices=['ndjson', 'csv'], default='ndjson')
+        parser.add_argument(
+            '--type', choices=list(KINDS_BY_NAME), default='task',
+            help='Row type to write with --format csv.',
+        )
+        parser.add_argument('--output', '-o', help='File to write; defaults to stdout.')
+
+    def handle(self, *args, username, format, type, output, **options):
+        try:
+            user = get_user_model().objects.get(username=username)
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'No user named {username!r}')
+
+        chunks = iter_csv(user, type) if format == 'csv' else iter_ndjson(user)
+        newline = '' if format == 'csv' else None  # csv writes its own line endings
+        if not output:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+        with open(output, 'w', encoding='utf-8', newline=newline) as stream:
+            for chunk in chunks:
+                stream.write(chunk)
+        self.stderr.write(self.style.SUCCESS(f'Exported {username} to {output}.'))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from tasks.services.fake_calendar import FakeCalendarServer
+
+
+class Command(BaseCommand):
+    help = (
+        'Run an in-memory stand-in for the Google Calendar API, with optional latency, '
+        'server errors and rate limiting, so calendar sync can be tested offline.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Share of calls answered with 503.')
+        parser.add_argument('--rate-limit', type=int, default=None, help='Calls per second per token before 429s.')
+        parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every request.')
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, host, port, error_rate, rate_limit, latency, seed, **options):
+        server = FakeCalendarServer(host, port, error_rate=error_rate, rate_limit=rate_limit, latency=latency, seed=seed)
+        self.stdout.write(
+            f'Serving on {server.url}; run the app with\n'
+            f'  GOOGLE_CALENDAR_API_URL={server.url} GOOGLE_OAUTH_TOKEN_URL={server.token_url}'
+        )
+        try:
+            server.httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.httpd.server_close()
+            self.stdout.write(' '.join(f'{key}={value}' for key, value in sorted(server.stats.items())))
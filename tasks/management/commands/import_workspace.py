@@ -0,0 +1,36 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.services.workspace import CHUNK_SIZE, WorkspaceImportError, import_ndjson
+
+
+class Command(BaseCommand):
+    help = "Import an NDJSON workspace export into a user's workspace."
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('path', help="Export file, or '-' for stdin.")
+        parser.add_argument('--batch-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, username, path, batch_size, **options):
+        try:
+            user = get_user_model().objects.get(username=username)
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'No user named {username!r}')
+
+        log = self.stderr.write if options['verbosity'] > 1 else None
+        stream = sys.stdin if path == '-' else open(path, encoding='utf-8')
+        try:
+            result = import_ndjson(user, stream, batch_size=batch_size, log=log)
+        except WorkspaceImportError as exc:
+            raise CommandError(f'{exc}; nothing was imported.')
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        for label, counts in (('Created', result.created), ('Merged', result.merged), ('Skipped', result.skipped)):
+            if counts:
+                self.stdout.write(f'{label}: ' + ', '.join(f'{n} {kind}' for kind, n in counts.items()))
+        self.stdout.write(self.style.SUCCESS(f'Imported {sum(result.created.values())} rows for {username}.'))
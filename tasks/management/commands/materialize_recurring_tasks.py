@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.services.recurrence import materialize_occurrences
+
+
+class Command(BaseCommand):
+    help = (
+        'Create the occurrences of every recurring task due within the rolling horizon. '
+        'Idempotent; the tasks.tasks.materialize_recurring_tasks Celery job runs the same code.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--horizon-days', type=int, default=settings.RECURRENCE_HORIZON_DAYS,
+            help='Create occurrences due up to this many days ahead (default: RECURRENCE_HORIZON_DAYS).',
+        )
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, horizon_days, batch_size, **options):
+        if settings.RECURRENCE_VIRTUAL_UPCOMING:
+            raise CommandError('RECURRENCE_VIRTUAL_UPCOMING is set; occurrences are generated on the fly.')
+        created, invalid = materialize_occurrences(horizon_days, batch_size, log=self.stdout.write)
+        if invalid:
+            self.stderr.write(f'{invalid} recurring tasks skipped for invalid rules.')
+        self.stdout.write(self.style.SUCCESS(f'{created} occurrences created.'))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from tasks.services.partitions import (
+    convert_to_partitioned, ensure_partitions, is_partitioned, month_start,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'PostgreSQL only. Create upcoming monthly ActivityLog partitions, or with --convert '
+        'rebuild the table as a partitioned one (run it in a quiet period). Schedule it '
+        'monthly so inserts never fall through to the DEFAULT partition.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months-ahead', type=int, default=3)
+        parser.add_argument(
+            '--convert', action='store_true',
+            help='Rebuild an unpartitioned ActivityLog table as a partitioned one.',
+        )
+        parser.add_argument('--batch-size', type=int, default=50_000)
+
+    def handle(self, *args, months_ahead, convert, batch_size, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('ActivityLog partitioning requires PostgreSQL.')
+
+        now = timezone.now()
+        end = month_start(now.year, now.month + months_ahead + 1)
+
+        if not is_partitioned():
+            if not convert:
+                raise CommandError('ActivityLog is not partitioned; rerun with --convert.')
+            convert_to_partitioned(batch_size, end, log=self.stdout.write)
+            self.stdout.write(self.style.SUCCESS(
+                'ActivityLog is now partitioned; the old table was kept as tasks_activitylog_legacy.'
+            ))
+            return
+
+        created = ensure_partitions(month_start(now.year, now.month), end)
+        self.stdout.write(self.style.SUCCESS(f'Partitions ensured through {end:%Y-%m}: {", ".join(created)}'))
@@ -0,0 +1,121 @@
+import gzip
+import json
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils import timezone
+
+from tasks.models import ActivityLog
+from tasks.services.partitions import activity_log_partitions, drop_partition
+
+COMPACTED = 'compacted'
+
+
+class Command(BaseCommand):
+    help = (
+        'Apply the ActivityLog retention policy: delete (optionally archiving) or compact '
+        'entries older than the retention window, in bounded batches.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.ACTIVITY_LOG_RETENTION_DAYS,
+            help='Keep entries newer than this many days (default: ACTIVITY_LOG_RETENTION_DAYS).',
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--compact', action='store_true',
+            help="Replace old entries with one 'compacted' summary per task and batch instead of deleting them.",
+        )
+        parser.add_argument(
+            '--archive', metavar='PATH',
+            help='Append removed entries to PATH as NDJSON (gzipped if PATH ends in .gz).',
+        )
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, days, batch_size, compact, archive, dry_run, **options):
+        cutoff = timezone.now() - timedelta(days=days)
+        old = ActivityLog.objects.filter(created_at__lt=cutoff)
+        if compact:
+            old = old.exclude(action=COMPACTED)
+
+        if dry_run:
+            self.stdout.write(f'{old.count()} entries older than {cutoff:%Y-%m-%d} would be processed.')
+            return
+
+        removed = 0
+        if not (compact or archive):
+            removed += self._drop_partitions(cutoff)
+
+        archive_file = None
+        if archive:
+            opener = gzip.open if archive.endswith('.gz') else open
+            archive_file = opener(archive, 'at', encoding='utf-8')
+        try:
+            last_pk = 0
+            while True:
+                batch = list(
+                    old.filter(pk__gt=last_pk).order_by('pk')
+                    .values('pk', 'task_id', 'action', 'detail', 'metadata', 'created_at')[:batch_size]
+                )
+                if not batch:
+                    break
+                last_pk = batch[-1]['pk']
+                if archive_file:
+                    for row in batch:
+                        archive_file.write(json.dumps(row, cls=DjangoJSONEncoder) + '\n')
+                    archive_file.flush()
+                with transaction.atomic():
+                    if compact:
+                        self._compact(batch)
+                    ActivityLog.objects.filter(pk__in=[row['pk'] for row in batch]).delete()
+                removed += len(batch)
+                self.stdout.write(f'  {removed} entries processed...')
+        finally:
+            if archive_file:
+                archive_file.close()
+
+        verb = 'compacted' if compact else 'removed'
+        self.stdout.write(self.style.SUCCESS(f'{removed} entries older than {cutoff:%Y-%m-%d} {verb}.'))
+
+    def _compact(self, batch):
+        """Summarize a batch as per-task action counts dated at its newest entry."""
+        per_task = defaultdict(list)
+        for row in batch:
+            per_task[row['task_id']].append(row)
+
+        summaries = []
+        for task_id, rows in per_task.items():
+            counts = defaultdict(int)
+            for row in rows:
+                counts[row['action']] += 1
+            summaries.append(ActivityLog(
+                task_id=task_id,
+                action=COMPACTED,
+                detail=f'{len(rows)} older entries compacted',
+                metadata={
+                    'counts': dict(counts),
+                    'from': min(row['created_at'] for row in rows).isoformat(),
+                    'to': max(row['created_at'] for row in rows).isoformat(),
+                },
+            ))
+        ActivityLog.objects.bulk_create(summaries)
+        # created_at is auto_now_add; backdate the summaries to the period they cover
+        for summary in summaries:
+            summary.created_at = max(row['created_at'] for row in per_task[summary.task_id])
+        ActivityLog.objects.bulk_update(summaries, ['created_at'])
+
+    def _drop_partitions(self, cutoff):
+        """On a partitioned PostgreSQL table, drop whole partitions past the cutoff."""
+        if connection.vendor != 'postgresql':
+            return 0
+        removed = 0
+        for partition in activity_log_partitions():
+            if partition.upper <= cutoff:
+                removed += drop_partition(partition)
+                self.stdout.write(f'  dropped partition {partition.name}')
+        return removed
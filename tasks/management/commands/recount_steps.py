@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tasks.models import Task
+from tasks.services.stamps import touch_workspace
+
+
+class Command(BaseCommand):
+    help = 'Recompute the denormalized Task.steps_total/steps_done counters from TaskStep rows.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Report tasks whose counters have drifted without fixing them.',
+        )
+
+    def handle(self, *args, batch_size, check, **options):
+        last_pk = 0
+        scanned = drifted = 0
+        while True:
+            # Keyset over pk so each batch is one bounded aggregate query
+            batch = list(
+                Task.objects.filter(pk__gt=last_pk)
+                .order_by('pk')
+                .with_step_counts()
+                .only('pk', 'user_id', 'steps_total', 'steps_done')[:batch_size]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            scanned += len(batch)
+
+            stale = []
+            for task in batch:
+                if (task.steps_total, task.steps_done) != (task.steps_total_count, task.steps_done_count):
+                    if check:
+                        self.stdout.write(
+                            f'Task {task.pk}: stored {task.steps_done}/{task.steps_total}, '
+                            f'actual {task.steps_done_count}/{task.steps_total_count}'
+                        )
+                    task.steps_total = task.steps_total_count
+                    task.steps_done = task.steps_done_count
+                    task.updated_at = timezone.now()  # cached task rows show the counters
+                    stale.append(task)
+            drifted += len(stale)
+            if stale and not check:
+                Task.objects.bulk_update(stale, ['steps_total', 'steps_done', 'updated_at'])
+                touch_workspace(*{task.user_id for task in stale})
+
+        verb = 'drifted' if check else 'updated'
+        self.stdout.write(self.style.SUCCESS(f'Scanned {scanned} tasks, {drifted} {verb}.'))
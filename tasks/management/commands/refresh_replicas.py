@@ -0,0 +1,38 @@
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from tasks.routers import replicas
+
+
+class Command(BaseCommand):
+    help = (
+        'Copy the primary SQLite database over each SQLite replica, to try read replicas '
+        'locally. With --every, keeps copying, so the replicas lag like real ones.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--every', type=float, default=0, help='Repeat every this many seconds.')
+
+    def handle(self, *args, every, **options):
+        aliases = replicas()
+        if not aliases:
+            raise CommandError('No replicas configured; set DB_REPLICA_NAMES.')
+        if any(connections[alias].vendor != 'sqlite' for alias in [DEFAULT_DB_ALIAS, *aliases]):
+            raise CommandError('refresh_replicas only copies SQLite databases; real replicas replicate themselves.')
+
+        while True:
+            primary = connections[DEFAULT_DB_ALIAS]
+            primary.ensure_connection()
+            for alias in aliases:
+                target = sqlite3.connect(connections[alias].settings_dict['NAME'])
+                try:
+                    primary.connection.backup(target)
+                finally:
+                    target.close()
+            self.stdout.write(f'Copied to {", ".join(aliases)}.')
+            if not every:
+                break
+            time.sleep(every)
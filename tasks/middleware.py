@@ -0,0 +1,63 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
+from tasks.routers import choose_replica, stick_to_primary, use_replica
+from tasks.services.activity import aactivity_batch, activity_batch
+
+
+class ActivityLogMiddleware:
+    """Collect a request's ActivityLog entries and write them in one batch."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with activity_batch():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        async with aactivity_batch():
+            return await self.get_response(request)
+
+
+class ReplicaMiddleware:
+    """Serve read-only views from a replica, and keep writers on the primary for a while."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            use_replica(None)
+        if request.method not in ('GET', 'HEAD', 'OPTIONS') and request.user.is_authenticated:
+            stick_to_primary(request.user.pk)
+        return response
+
+    async def __acall__(self, request):
+        try:
+            response = await self.get_response(request)
+        finally:
+            use_replica(None)
+        if request.method not in ('GET', 'HEAD', 'OPTIONS'):
+            user = await request.auser()
+            if user.is_authenticated:
+                await sync_to_async(stick_to_primary)(user.pk)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        use_replica(choose_replica(request, view_func))
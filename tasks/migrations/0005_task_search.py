@@ -0,0 +1,166 @@
+"""Full-text search index for tasks.
+
+PostgreSQL gets a weighted tsvector column on tasks_task with a GIN index;
+SQLite gets an FTS5 table keyed by task id, with an owner token column so
+the per-user filter is answered by the index too. On both, triggers keep the
+index current when a task's title or description, or any of its step
+titles or note bodies, change. Existing rows are indexed by the
+``rebuild_search_index`` command rather than inside this migration.
+"""
+from django.db import migrations
+
+POSTGRESQL_FORWARD = [
+    'ALTER TABLE tasks_task ADD COLUMN search_vector tsvector',
+    'CREATE INDEX tasks_task_search_idx ON tasks_task USING gin (search_vector)',
+    """
+    CREATE FUNCTION tasks_task_search_vector(p_task_id bigint, p_title text, p_description text)
+    RETURNS tsvector AS $$
+        SELECT setweight(to_tsvector('english', coalesce(p_title, '')), 'A')
+            || setweight(to_tsvector('english', coalesce(p_description, '')), 'B')
+            || setweight(to_tsvector('english', coalesce(
+                (SELECT string_agg(s.title, ' ') FROM tasks_taskstep s WHERE s.task_id = p_task_id), '')), 'C')
+            || setweight(to_tsvector('english', coalesce(
+                (SELECT string_agg(regexp_replace(n.content_html, '<[^>]*>', ' ', 'g'), ' ')
+                 FROM tasks_tasknote n WHERE n.task_id = p_task_id), '')), 'D')
+    $$ LANGUAGE sql STABLE
+    """,
+    """
+    CREATE FUNCTION tasks_task_search_trigger() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := tasks_task_search_vector(NEW.id, NEW.title, NEW.description);
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER tasks_task_search_insert BEFORE INSERT ON tasks_task
+    FOR EACH ROW EXECUTE FUNCTION tasks_task_search_trigger()
+    """,
+    """
+    CREATE TRIGGER tasks_task_search_update BEFORE UPDATE OF title, description ON tasks_task
+    FOR EACH ROW WHEN (OLD.title IS DISTINCT FROM NEW.title OR OLD.description IS DISTINCT FROM NEW.description)
+    EXECUTE FUNCTION tasks_task_search_trigger()
+    """,
+    """
+    CREATE FUNCTION tasks_task_children_search_trigger() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP <> 'INSERT' THEN
+            UPDATE tasks_task SET search_vector = tasks_task_search_vector(id, title, description)
+            WHERE id = OLD.task_id;
+        END IF;
+        IF TG_OP <> 'DELETE' AND (TG_OP = 'INSERT' OR NEW.task_id <> OLD.task_id) THEN
+            UPDATE tasks_task SET search_vector = tasks_task_search_vector(id, title, description)
+            WHERE id = NEW.task_id;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER tasks_taskstep_search AFTER INSERT OR DELETE OR UPDATE OF title, task_id ON tasks_taskstep
+    FOR EACH ROW EXECUTE FUNCTION tasks_task_children_search_trigger()
+    """,
+    """
+    CREATE TRIGGER tasks_tasknote_search AFTER INSERT OR DELETE OR UPDATE OF content_html, task_id ON tasks_tasknote
+    FOR EACH ROW EXECUTE FUNCTION tasks_task_children_search_trigger()
+    """,
+]
+
+POSTGRESQL_REVERSE = [
+    'DROP TRIGGER IF EXISTS tasks_tasknote_search ON tasks_tasknote',
+    'DROP TRIGGER IF EXISTS tasks_taskstep_search ON tasks_taskstep',
+    'DROP TRIGGER IF EXISTS tasks_task_search_update ON tasks_task',
+    'DROP TRIGGER IF EXISTS tasks_task_search_insert ON tasks_task',
+    'DROP FUNCTION IF EXISTS tasks_task_children_search_trigger()',
+    'DROP FUNCTION IF EXISTS tasks_task_search_trigger()',
+    'DROP FUNCTION IF EXISTS tasks_task_search_vector(bigint, text, text)',
+    'ALTER TABLE tasks_task DROP COLUMN IF EXISTS search_vector',
+]
+
+SQLITE_STEPS = (
+    "coalesce((SELECT group_concat(title, ' ') FROM tasks_taskstep WHERE task_id = {task_id}), '')"
+)
+SQLITE_NOTES = (
+    "coalesce((SELECT group_concat(content_html, ' ') FROM tasks_tasknote WHERE task_id = {task_id}), '')"
+)
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE tasks_task_fts USING fts5(
+        owner, title, description, steps, notes, tokenize = 'porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER tasks_task_fts_insert AFTER INSERT ON tasks_task BEGIN
+        INSERT INTO tasks_task_fts (rowid, owner, title, description, steps, notes)
+        VALUES (new.id, 'u' || new.user_id, new.title, new.description, '', '');
+    END
+    """,
+    """
+    CREATE TRIGGER tasks_task_fts_update AFTER UPDATE OF user_id, title, description ON tasks_task
+    WHEN old.user_id IS NOT new.user_id OR old.title IS NOT new.title OR old.description IS NOT new.description
+    BEGIN
+        UPDATE tasks_task_fts SET owner = 'u' || new.user_id, title = new.title, description = new.description
+        WHERE rowid = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER tasks_task_fts_delete AFTER DELETE ON tasks_task BEGIN
+        DELETE FROM tasks_task_fts WHERE rowid = old.id;
+    END
+    """,
+]
+for table, column, expression in (
+    ('tasks_taskstep', 'steps', SQLITE_STEPS),
+    ('tasks_tasknote', 'notes', SQLITE_NOTES),
+):
+    watched = 'title' if column == 'steps' else 'content_html'
+    SQLITE_FORWARD += [
+        f"""
+        CREATE TRIGGER {table}_fts_insert AFTER INSERT ON {table} BEGIN
+            UPDATE tasks_task_fts SET {column} = {expression.format(task_id='new.task_id')}
+            WHERE rowid = new.task_id;
+        END
+        """,
+        f"""
+        CREATE TRIGGER {table}_fts_update AFTER UPDATE OF {watched}, task_id ON {table} BEGIN
+            UPDATE tasks_task_fts SET {column} = {expression.format(task_id='old.task_id')}
+            WHERE rowid = old.task_id;
+            UPDATE tasks_task_fts SET {column} = {expression.format(task_id='new.task_id')}
+            WHERE rowid = new.task_id;
+        END
+        """,
+        f"""
+        CREATE TRIGGER {table}_fts_delete AFTER DELETE ON {table} BEGIN
+            UPDATE tasks_task_fts SET {column} = {expression.format(task_id='old.task_id')}
+            WHERE rowid = old.task_id;
+        END
+        """,
+    ]
+
+SQLITE_REVERSE = [
+    f'DROP TRIGGER IF EXISTS {table}_fts_{event}'
+    for table in ('tasks_task', 'tasks_taskstep', 'tasks_tasknote')
+    for event in ('insert', 'update', 'delete')
+] + ['DROP TABLE IF EXISTS tasks_task_fts']
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0004_activitylog_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({'postgresql': POSTGRESQL_FORWARD, 'sqlite': SQLITE_FORWARD}),
+            _run({'postgresql': POSTGRESQL_REVERSE, 'sqlite': SQLITE_REVERSE}),
+        ),
+    ]
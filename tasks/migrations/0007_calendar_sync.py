@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def link_connections(apps, schema_editor):
+    GoogleCalendarConnection = apps.get_model('tasks', 'GoogleCalendarConnection')
+    GoogleCalendarSync = apps.get_model('tasks', 'GoogleCalendarSync')
+    for connection_id, user_id in GoogleCalendarConnection.objects.values_list('id', 'user_id'):
+        GoogleCalendarSync.objects.filter(task__user_id=user_id).update(connection_id=connection_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0006_task_recurrence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='googlecalendarconnection',
+            name='backoff_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='googlecalendarconnection',
+            name='consecutive_failures',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='googlecalendarsync',
+            name='connection',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='syncs', to='tasks.googlecalendarconnection'),
+        ),
+        migrations.AlterField(
+            model_name='googlecalendarsync',
+            name='task',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='calendar_sync', to='tasks.task'),
+        ),
+        migrations.AddIndex(
+            model_name='googlecalendarsync',
+            index=models.Index(fields=['connection', 'sync_status'], name='calendar_sync_pending_idx'),
+        ),
+        migrations.RunPython(link_connections, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0010_workspace_stamp'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='googlecalendarconnection',
+            name='needs_reauth',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='googlecalendarconnection',
+            name='sync_lease_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
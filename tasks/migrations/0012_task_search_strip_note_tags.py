@@ -0,0 +1,90 @@
+"""Index SQLite note bodies without their HTML tags.
+
+0005's SQLite triggers indexed raw ``content_html``, so searching for "p"
+or "div" matched every note; PostgreSQL already stripped tags. Notes now
+keep their plain text in ``content_text``, written by ``TaskNote.save()``,
+and the SQLite note triggers index that column in plain SQL. Existing
+notes are backfilled and their tasks' notes column re-indexed.
+"""
+import re
+from html import unescape
+
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+_TAG = re.compile(r'<[^>]*>')
+
+NOTES = "coalesce((SELECT group_concat({column}, ' ') FROM tasks_tasknote WHERE task_id = {task_id}), '')"
+
+
+def _triggers(column):
+    def notes(task_id):
+        return NOTES.format(column=column, task_id=task_id)
+
+    return [
+        f"""
+        CREATE TRIGGER tasks_tasknote_fts_insert AFTER INSERT ON tasks_tasknote BEGIN
+            UPDATE tasks_task_fts SET notes = {notes('new.task_id')} WHERE rowid = new.task_id;
+        END
+        """,
+        f"""
+        CREATE TRIGGER tasks_tasknote_fts_update AFTER UPDATE OF {column}, task_id ON tasks_tasknote BEGIN
+            UPDATE tasks_task_fts SET notes = {notes('old.task_id')} WHERE rowid = old.task_id;
+            UPDATE tasks_task_fts SET notes = {notes('new.task_id')} WHERE rowid = new.task_id;
+        END
+        """,
+        f"""
+        CREATE TRIGGER tasks_tasknote_fts_delete AFTER DELETE ON tasks_tasknote BEGIN
+            UPDATE tasks_task_fts SET notes = {notes('old.task_id')} WHERE rowid = old.task_id;
+        END
+        """,
+        f"""
+        UPDATE tasks_task_fts SET notes = {notes('tasks_task_fts.rowid')}
+        WHERE rowid IN (SELECT task_id FROM tasks_tasknote)
+        """,
+    ]
+
+
+DROP_TRIGGERS = [f'DROP TRIGGER IF EXISTS tasks_tasknote_fts_{event}' for event in ('insert', 'update', 'delete')]
+
+
+def backfill_content_text(apps, schema_editor):
+    # A copy of tasks.models.html_to_text, which may change after this migration
+    TaskNote = apps.get_model('tasks', 'TaskNote')
+    last_pk = 0
+    while True:
+        notes = list(TaskNote.objects.filter(pk__gt=last_pk).order_by('pk').only('content_html')[:BATCH_SIZE])
+        if not notes:
+            break
+        for note in notes:
+            note.content_text = ' '.join(unescape(_TAG.sub(' ', note.content_html or '')).split())
+        TaskNote.objects.bulk_update(notes, ['content_text'])
+        last_pk = notes[-1].pk
+
+
+def _sqlite(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == 'sqlite':
+            for statement in statements:
+                schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0011_google_calendar_lease_and_reauth'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tasknote',
+            name='content_text',
+            field=models.TextField(default='', editable=False),
+        ),
+        migrations.RunPython(backfill_content_text, migrations.RunPython.noop),
+        migrations.RunPython(
+            _sqlite(DROP_TRIGGERS + _triggers('content_text')),
+            _sqlite(DROP_TRIGGERS + _triggers('content_html')),
+        ),
+    ]
@@ -1,8 +1,21 @@
+import re
+import secrets
+from html import unescape
+
 from django.conf import settings
 from django.db import models
+from django.db.models import Count, Q
 from django.utils import timezone
 
 
+_TAG = re.compile(r'<[^>]*>')
+
+
+def html_to_text(html):
+    """The text of an HTML fragment, with words that tags separated kept apart."""
+    return ' '.join(unescape(_TAG.sub(' ', html or '')).split())
+
+
 class BaseModel(models.Model):
     """Abstract base with created/updated timestamps."""
     created_at = models.DateTimeField(auto_now_add=True)
@@ -65,6 +78,37 @@ class Tag(BaseModel):
         return self.name
 
 
+class TaskQuerySet(models.QuerySet):
+    """Shared filters and list-view loading for tasks."""
+
+    def open(self):
+        return self.filter(status__in=[Task.Status.TODO, Task.Status.IN_PROGRESS])
+
+    def my_day(self, user, today):
+        """Open tasks explicitly added to My Day or due today.
+
+        Each OR branch repeats the user/status conditions so the planner can
+        satisfy both from their own index (BitmapOr on PostgreSQL, MULTI-INDEX
+        OR on SQLite) instead of scanning every open task of the user.
+        """
+        open_statuses = [Task.Status.TODO, Task.Status.IN_PROGRESS]
+        return self.filter(
+            Q(user=user, status__in=open_statuses, is_my_day=True)
+            | Q(user=user, status__in=open_statuses, due_date=today)
+        )
+
+    def with_step_counts(self):
+        """Annotate step totals computed from TaskStep rows."""
+        return self.annotate(
+            steps_total_count=Count('steps', distinct=True),
+            steps_done_count=Count('steps', filter=Q(steps__is_completed=True), distinct=True),
+        )
+
+    def for_list(self):
+        """Tasks for a list page; attach_rows() loads tags for the rows it has to render."""
+        return self.select_related('project')
+
+
 class Task(BaseModel):
     """Core task model."""
 
@@ -105,6 +149,11 @@ class Task(BaseModel):
     # Recurrence
     is_recurring = models.BooleanField(default=False)
     recurrence_rule = models.CharField(max_length=500, blank=True, default='')  # iCalendar RRULE
+    # Set on occurrences spawned from a recurring task; covered by task_occurrence_unique
+    recurrence_parent = models.ForeignKey(
+        'self', on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='occurrences', db_index=False,
+    )
 
     # Google Calendar
     sync_to_google_calendar = models.BooleanField(default=False)
@@ -118,8 +167,39 @@ class Task(BaseModel):
     # Ordering
     sort_order = models.IntegerField(default=0)
 
+    # Denormalized step counters, maintained by the step views
+    steps_total = models.PositiveIntegerField(default=0)
+    steps_done = models.PositiveIntegerField(default=0)
+
+    objects = TaskQuerySet.as_manager()
+
     class Meta:
         ordering = ['sort_order', '-priority', 'due_date', 'created_at']
+        indexes = [
+            models.Index(fields=['user', 'status', 'due_date'], name='task_user_status_due_idx'),
+            models.Index(fields=['user', 'status', 'is_my_day'], name='task_user_status_myday_idx'),
+            # Partial indexes over open tasks only; skipped on backends without support
+            models.Index(
+                fields=['user', 'due_date'], name='task_open_due_idx',
+                condition=Q(status__in=['todo', 'in_progress']),
+            ),
+            models.Index(
+                fields=['user'], name='task_open_myday_idx',
+                condition=Q(status__in=['todo', 'in_progress'], is_my_day=True),
+            ),
+            models.Index(fields=['id'], name='task_recurring_idx', condition=Q(is_recurring=True)),
+            # Changed-since scans for calendar sync
+            models.Index(fields=['user', 'updated_at'], name='task_user_updated_idx'),
+        ]
+        constraints = [
+            # One occurrence per series and date, so spawning them is idempotent. The
+            # condition also keeps SQLite from rebuilding the table (and dropping the
+            # search triggers) to add it.
+            models.UniqueConstraint(
+                fields=['recurrence_parent', 'due_date'], name='task_occurrence_unique',
+                condition=Q(recurrence_parent__isnull=False),
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -131,21 +211,22 @@ class Task(BaseModel):
     @property
     def is_overdue(self):
         if self.due_date and self.status != self.Status.COMPLETED:
-            return self.due_date < timezone.now().date()
+            return self.due_date < timezone.localdate()
         return False
 
     @property
     def steps_progress(self):
-        total = self.steps.count()
-        if total == 0:
+        if self.steps_total == 0:
             return None
-        done = self.steps.filter(is_completed=True).count()
-        return f"{done}/{total}"
+        return f"{self.steps_done}/{self.steps_total}"
 
     def complete(self):
         self.status = self.Status.COMPLETED
         self.completed_at = timezone.now()
         self.save(update_fields=['status', 'completed_at', 'updated_at'])
+        if self.is_recurring or self.recurrence_parent_id:
+            from tasks.services.recurrence import spawn_next_occurrences
+            spawn_next_occurrences([self])
 
     def uncomplete(self):
         self.status = self.Status.TODO
@@ -172,6 +253,8 @@ class TaskNote(BaseModel):
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='notes')
     title = models.CharField(max_length=200, blank=True, default='')
     content_html = models.TextField(default='')
+    # content_html without markup, for the search index; kept current by save()
+    content_text = models.TextField(default='', editable=False)
     content_json = models.JSONField(default=dict, blank=True)
     is_pinned = models.BooleanField(default=False)
 
@@ -181,16 +264,30 @@ class TaskNote(BaseModel):
     def __str__(self):
         return self.title or f"Note on {self.task.title}"
 
+    def save(self, *args, **kwargs):
+        self.content_text = html_to_text(self.content_html)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'content_html' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'content_text'}
+        super().save(*args, **kwargs)
+
 
 class ActivityLog(BaseModel):
     """Change history for a task."""
-    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='activity_logs')
+    # Covered by activity_task_created_idx, which leads with task
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='activity_logs', db_index=False)
     action = models.CharField(max_length=50)  # e.g., 'created', 'completed', 'edited'
     detail = models.TextField(blank=True, default='')
     metadata = models.JSONField(default=dict, blank=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Task history lookups, newest first
+            models.Index(fields=['task', '-created_at'], name='activity_task_created_idx'),
+            # Age-based retention scans
+            models.Index(fields=['created_at'], name='activity_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.action} - {self.task.title}"
@@ -205,6 +302,15 @@ class GoogleCalendarConnection(BaseModel):
     calendar_id = models.CharField(max_length=200, default='primary')
     sync_all_tasks = models.BooleanField(default=False)
     remove_on_complete = models.BooleanField(default=True)
+    # Exponential backoff after rate limiting or server errors
+    backoff_until = models.DateTimeField(null=True, blank=True)
+    consecutive_failures = models.PositiveIntegerField(default=0)
+    # Task.updated_at up to which changes have been picked up
+    synced_through = models.DateTimeField(null=True, blank=True)
+    # Held by the worker running a sync; expires, so a dead worker can't block the connection
+    sync_lease_until = models.DateTimeField(null=True, blank=True)
+    # Google revoked the refresh token; nothing syncs until the user reconnects
+    needs_reauth = models.BooleanField(default=False)
 
     def __str__(self):
         return f"Google Calendar - {self.user.email}"
@@ -218,14 +324,45 @@ class GoogleCalendarSync(BaseModel):
         SYNCED = 'synced', 'Synced'
         FAILED = 'failed', 'Failed'
 
-    task = models.OneToOneField(Task, on_delete=models.CASCADE, related_name='calendar_sync')
+    # Kept with task=NULL after the task is deleted, until its event is removed
+    task = models.OneToOneField(Task, on_delete=models.SET_NULL, null=True, blank=True, related_name='calendar_sync')
+    # Covered by calendar_sync_pending_idx, which leads with connection
+    connection = models.ForeignKey(
+        GoogleCalendarConnection, on_delete=models.CASCADE, null=True, blank=True,
+        related_name='syncs', db_index=False,
+    )
     google_event_id = models.CharField(max_length=300, blank=True, default='')
     last_synced_at = models.DateTimeField(null=True, blank=True)
     sync_status = models.CharField(max_length=20, choices=SyncStatus.choices, default=SyncStatus.PENDING)
     error_message = models.TextField(blank=True, default='')
+    # What was last pushed: a hash of the event body and the task's updated_at then
+    content_hash = models.CharField(max_length=64, blank=True, default='')
+    task_updated_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['connection', 'sync_status'], name='calendar_sync_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f"Sync: {self.task.title if self.task else '(deleted task)'} ({self.sync_status})"
+
+
+def _feed_token():
+    return secrets.token_urlsafe(32)
+
+
+class CalendarFeed(BaseModel):
+    """Secret URL serving a user's due tasks as a read-only iCalendar feed."""
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='calendar_feed')
+    token = models.CharField(max_length=64, unique=True, default=_feed_token)
+
+    def reset_token(self):
+        self.token = _feed_token()
+        self.save(update_fields=['token', 'updated_at'])
 
     def __str__(self):
-        return f"Sync: {self.task.title} ({self.sync_status})"
+        return f"Calendar feed - {self.user.email}"
 
 
 class SavedFilter(BaseModel):
@@ -254,3 +391,12 @@ class PomodoroSession(BaseModel):
 
     def __str__(self):
         return f"Pomodoro: {self.task.title} ({self.duration_minutes}min)"
+
+
+class WorkspaceStamp(models.Model):
+    """A version for everything a user's task lists show, bumped on every change."""
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='workspace_stamp')
+    version = models.BigIntegerField()
+
+    def __str__(self):
+        return f"Workspace stamp - {self.user_id}: {self.version}"
@@ -0,0 +1,96 @@
+"""Read replica routing.
+
+With replicas configured (DB_REPLICA_NAMES in settings), GET requests
+to read-only views read the tasks app's tables from a replica picked per
+request: the dashboard lists, the *_list and *_detail views and the
+API. Everything else, and every write, uses the primary. Sessions, users
+and other apps' tables are always read from the primary, so a login is
+never lost to replication lag.
+
+Replicas trail the primary, so once a user writes, their reads stay on
+the primary for REPLICA_STICKY_SECONDS: the HTMX request that follows a
+change must see it. Any unsafe request pins its user, and so does any
+change to their workspace stamp, which covers writes made outside a
+request, such as bulk jobs and imports. Pins live in the cache, so with
+replicas it must be shared across processes; tasks.checks enforces that.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICATED_APPS = {'tasks'}
+READ_ONLY_VIEW_MODULES = {'tasks.views.dashboard', 'tasks.api.views'}
+
+# Per request, not per thread: async requests share threads
+_replica = ContextVar('replica', default=None)
+
+
+def _location(alias):
+    config = connections[alias].settings_dict
+    return config['HOST'], config['PORT'], config['NAME']
+
+
+def replicas():
+    """The replica aliases; in tests they mirror the primary and don't count."""
+    primary = _location(DEFAULT_DB_ALIAS)
+    return [alias for alias in settings.DATABASES if alias.startswith('replica') and _location(alias) != primary]
+
+
+def _pin_key(user_id):
+    return f'srtask:primary-pin:{user_id}'
+
+
+def stick_to_primary(*user_ids):
+    """Send user_ids' reads to the primary for the next REPLICA_STICKY_SECONDS."""
+    if replicas():
+        cache.set_many({_pin_key(user_id): True for user_id in user_ids}, settings.REPLICA_STICKY_SECONDS)
+
+
+def is_pinned(user_id):
+    return bool(cache.get(_pin_key(user_id)))
+
+
+def is_read_only_view(view_func):
+    """Whether view_func only reads, on GET, and may be served from a replica."""
+    module = view_func.__module__
+    return module in READ_ONLY_VIEW_MODULES or (
+        module.startswith('tasks.views.') and view_func.__name__.endswith(('_list', '_detail'))
+    )
+
+
+def use_replica(alias):
+    """Read the replicated apps from alias (None for the primary) in this request."""
+    _replica.set(alias)
+
+
+def choose_replica(request, view_func):
+    """The replica to serve request from, or None for the primary."""
+    available = replicas()
+    if not available or request.method not in ('GET', 'HEAD') or not is_read_only_view(view_func):
+        return None
+    if request.user.is_authenticated and is_pinned(request.user.pk):
+        return None
+    return random.choice(available)
+
+
+class ReplicaRouter:
+    """Route reads chosen by ReplicaMiddleware to a replica; everything else to the primary."""
+
+    def db_for_read(self, model, **hints):
+        alias = _replica.get()
+        if alias and model._meta.app_label in REPLICATED_APPS:
+            return alias
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the primary's rows, so objects from either relate freely
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,110 @@
+"""Buffered ActivityLog writes.
+
+log_activity() never inserts inline. Each entry is queued with
+transaction.on_commit, so entries from rolled-back work are dropped, and
+committed entries collect in a buffer held in a context variable, so
+concurrent async requests on one thread keep separate buffers. The
+buffer is written with a single bulk_create when the surrounding
+activity_batch() scope exits (ActivityLogMiddleware opens one per
+request; async code uses aactivity_batch()) or when it reaches
+ACTIVITY_LOG_BATCH_SIZE.
+
+ACTIVITY_LOG_MODE selects where the buffer goes:
+
+- 'on_commit': bulk_create in-process (default)
+- 'celery': hand the batch to the write_activity_logs Celery task
+- 'sync': write each entry immediately; for tests, where on_commit
+  callbacks never fire inside TestCase transactions
+"""
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+
+from tasks.models import ActivityLog
+
+# The open activity_batch()'s entries; None outside any batch
+_buffer = ContextVar('activity_buffer', default=None)
+
+
+def log_activity(task, action, detail='', metadata=None):
+    """Record an ActivityLog entry for task once the current transaction commits."""
+    log_activity_bulk([task.pk], action, detail, metadata)
+
+
+def log_activity_bulk(task_ids, action, detail='', metadata=None):
+    """Record the same ActivityLog entry for many tasks at once."""
+    entries = [
+        {'task_id': task_id, 'action': action, 'detail': detail, 'metadata': metadata or {}}
+        for task_id in task_ids
+    ]
+    if settings.ACTIVITY_LOG_MODE == 'sync':
+        write_entries(entries)
+        return
+    transaction.on_commit(partial(_extend, entries))
+
+
+def _extend(entries):
+    buffer = _buffer.get()
+    if buffer is None:
+        _write(entries)
+        return
+    buffer.extend(entries)
+    if len(buffer) >= settings.ACTIVITY_LOG_BATCH_SIZE:
+        flush()
+
+
+def flush():
+    """Write out everything buffered in the current batch."""
+    buffer = _buffer.get()
+    if buffer:
+        entries = buffer[:]
+        buffer.clear()
+        _write(entries)
+
+
+def _write(entries):
+    if settings.ACTIVITY_LOG_MODE == 'celery':
+        from tasks.tasks import write_activity_logs
+        write_activity_logs.delay(entries)
+    else:
+        write_entries(entries)
+
+
+def write_entries(entries):
+    ActivityLog.objects.bulk_create([ActivityLog(**entry) for entry in entries])
+
+
+@contextmanager
+def activity_batch():
+    """Hold committed entries until the outermost scope exits, then flush once."""
+    if _buffer.get() is not None:
+        yield
+        return
+    token = _buffer.set([])
+    try:
+        yield
+    finally:
+        try:
+            flush()
+        finally:
+            _buffer.reset(token)
+
+
+@asynccontextmanager
+async def aactivity_batch():
+    """activity_batch() for async code; the flush runs on a worker thread."""
+    if _buffer.get() is not None:
+        yield
+        return
+    token = _buffer.set([])
+    try:
+        yield
+    finally:
+        try:
+            await sync_to_async(flush)()
+        finally:
+            _buffer.reset(token)
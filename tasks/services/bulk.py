@@ -0,0 +1,158 @@
+"""Set-based task state changes shared by the bulk UI and the API.
+
+Each operation selects the affected ids once, applies a single UPDATE (or
+link-table insert/delete) and logs one batched ActivityLog write, so the
+query count does not grow with the number of tasks. Updates and link-table
+writes fire no model signals, so apply_bulk_action() publishes the live
+update itself.
+"""
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from tasks.models import Task
+from tasks.services.activity import log_activity_bulk
+from tasks.services.google_calendar import sync_soon
+from tasks.services.live import publish_task_changes_by_owner
+from tasks.services.recurrence import spawn_next_occurrences
+from tasks.services.stamps import touch_workspace
+
+BULK_ACTIONS = {
+    'complete': 'Complete',
+    'reopen': 'Reopen',
+    'move': 'Move to project',
+    'tag': 'Add tag',
+    'untag': 'Remove tag',
+    'my_day_add': 'Add to My Day',
+    'my_day_remove': 'Remove from My Day',
+    'delete': 'Delete',
+}
+
+
+def _lock(queryset):
+    """Lock queryset's rows and mark their owners' workspaces changed; returns {task id: owner id}."""
+    owners = dict(queryset.select_for_update().values_list('pk', 'user_id'))
+    touch_workspace(*set(owners.values()))
+    return owners
+
+
+def complete_tasks(queryset):
+    """Complete the open tasks in queryset; returns {task id: owner id} for those that changed.
+
+    Recurring series among them get their next occurrence, as Task.complete() does.
+    """
+    owners = _lock(queryset.exclude(status=Task.Status.COMPLETED))
+    ids = list(owners)
+    now = timezone.now()
+    Task.objects.filter(pk__in=ids).update(status=Task.Status.COMPLETED, completed_at=now, updated_at=now)
+    log_activity_bulk(ids, 'completed', 'Task completed')
+    spawn_next_occurrences(
+        Task.objects.filter(Q(is_recurring=True) | Q(recurrence_parent__isnull=False), pk__in=ids)
+        .only('is_recurring', 'recurrence_parent', 'due_date')
+    )
+    sync_soon(ids)
+    return owners
+
+
+def reopen_tasks(queryset, status=Task.Status.TODO):
+    owners = _lock(queryset.filter(status=Task.Status.COMPLETED))
+    ids = list(owners)
+    Task.objects.filter(pk__in=ids).update(status=status, completed_at=None, updated_at=timezone.now())
+    log_activity_bulk(ids, 'uncompleted', 'Task reopened')
+    sync_soon(ids)
+    return owners
+
+
+def set_status(queryset, status):
+    """Move the tasks in queryset to status; returns {task id: owner id} for those that changed.
+
+    Completing and reopening go through complete_tasks() and reopen_tasks(),
+    so completed_at, the activity log and the next occurrence follow.
+    """
+    if status == Task.Status.COMPLETED:
+        return complete_tasks(queryset)
+    owners = reopen_tasks(queryset, status)
+    others = _lock(queryset.exclude(status=status))
+    if others:
+        Task.objects.filter(pk__in=list(others)).update(status=status, updated_at=timezone.now())
+        sync_soon(list(others), others.values())
+    return {**owners, **others}
+
+
+def move_tasks(queryset, project):
+    owners = _lock(queryset)
+    ids = list(owners)
+    Task.objects.filter(pk__in=ids).update(project=project, updated_at=timezone.now())
+    detail = f'Moved to {project.name}' if project else 'Removed from project'
+    log_activity_bulk(ids, 'moved', detail, {'project_id': project.pk if project else None})
+    return owners
+
+
+def tag_tasks(queryset, tag):
+    owners = _lock(queryset)
+    ids = list(owners)
+    through = Task.tags.through
+    through.objects.bulk_create([through(task_id=pk, tag_id=tag.pk) for pk in ids], ignore_conflicts=True)
+    Task.objects.filter(pk__in=ids).update(updated_at=timezone.now())
+    log_activity_bulk(ids, 'tagged', f'Tagged #{tag.name}', {'tag_id': tag.pk})
+    return owners
+
+
+def untag_tasks(queryset, tag):
+    owners = _lock(queryset)
+    ids = list(owners)
+    Task.tags.through.objects.filter(task_id__in=ids, tag_id=tag.pk).delete()
+    Task.objects.filter(pk__in=ids).update(updated_at=timezone.now())
+    log_activity_bulk(ids, 'untagged', f'Removed #{tag.name}', {'tag_id': tag.pk})
+    return owners
+
+
+def set_my_day(queryset, on):
+    owners = _lock(queryset)
+    ids = list(owners)
+    now = timezone.now()
+    updates = {'is_my_day': on, 'updated_at': now}
+    if on:
+        updates['my_day_date'] = timezone.localdate(now)
+    Task.objects.filter(pk__in=ids).update(**updates)
+    log_activity_bulk(ids, 'my_day', 'Added to My Day' if on else 'Removed from My Day')
+    return owners
+
+
+def delete_tasks(queryset):
+    owners = _lock(queryset)
+    ids = list(owners)
+    Task.objects.filter(pk__in=ids).delete()
+    return owners
+
+
+@transaction.atomic
+def apply_bulk_action(queryset, action, project=None, tag=None):
+    """Run one of BULK_ACTIONS over queryset; returns the ids it touched.
+
+    The owners' open tabs hear about every touched task in one live update
+    each, after commit. Deletes need nothing extra: QuerySet.delete() sends
+    post_delete per task, which publishes already.
+    """
+    if action not in BULK_ACTIONS:
+        raise ValueError(f'Unknown bulk action: {action}')
+    owners = _run(queryset, action, project, tag)
+    if action != 'delete':
+        publish_task_changes_by_owner(owners)
+    return list(owners)
+
+
+def _run(queryset, action, project, tag):
+    if action == 'complete':
+        return complete_tasks(queryset)
+    if action == 'reopen':
+        return reopen_tasks(queryset)
+    if action == 'move':
+        return move_tasks(queryset, project)
+    if action == 'tag':
+        return tag_tasks(queryset, tag)
+    if action == 'untag':
+        return untag_tasks(queryset, tag)
+    if action in ('my_day_add', 'my_day_remove'):
+        return set_my_day(queryset, action == 'my_day_add')
+    return delete_tasks(queryset)
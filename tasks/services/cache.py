@@ -0,0 +1,48 @@
+"""Per-user cache versioning.
+
+Cached payloads embed the user's current version for a scope in their key.
+Writes bump the version, so stale entries are never read again and simply
+age out of the cache instead of having to be found and deleted.
+"""
+import time
+
+from django.core.cache import cache
+
+VERSION_TIMEOUT = None  # versions must outlive the entries keyed on them
+
+
+def _version_key(user_id, scope):
+    return f'srtask:version:{scope}:{user_id}'
+
+
+def get_user_version(user_id, scope):
+    """Return the current cache version for a user's scope."""
+    # Seed from the clock so an evicted version never resurrects old entries
+    return cache.get_or_set(_version_key(user_id, scope), time.time_ns, VERSION_TIMEOUT)
+
+
+async def aget_user_version(user_id, scope):
+    return await cache.aget_or_set(_version_key(user_id, scope), time.time_ns, VERSION_TIMEOUT)
+
+
+def bump_user_version(user_id, scope):
+    """Invalidate everything cached under a user's scope."""
+    key = _version_key(user_id, scope)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), VERSION_TIMEOUT)
+
+
+def user_cache_key(user_id, scope, *parts):
+    """Build a cache key bound to the user's current version for scope."""
+    return _versioned_key(user_id, scope, get_user_version(user_id, scope), parts)
+
+
+async def auser_cache_key(user_id, scope, *parts):
+    return _versioned_key(user_id, scope, await aget_user_version(user_id, scope), parts)
+
+
+def _versioned_key(user_id, scope, version, parts):
+    suffix = ':'.join(str(part) for part in parts)
+    return f'srtask:{scope}:{user_id}:{version}' + (f':{suffix}' if suffix else '')
@@ -0,0 +1,200 @@
+"""In-process stand-in for the Google Calendar API, for offline testing.
+
+Serves the OAuth token endpoint, the events collection and the batch
+endpoint closely enough for the sync worker, keeping events in memory. It
+can inject latency, random server errors and a per-token rate limit, so
+throughput, retries and backoff can be exercised without a Google
+account. Run it with ``manage.py fake_calendar_server`` or embed it with
+``FakeCalendarServer().start()``.
+"""
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote
+from uuid import uuid4
+
+from tasks.services.http import split_multipart
+
+EVENT_PATH = re.compile(r'^/calendar/v3/calendars/([^/]+)/events(?:/([^/]+))?$')
+BATCH_PATH = '/batch/calendar/v3'
+TOKEN_PATH = '/token'
+
+REASONS = {400: 'Bad Request', 401: 'Unauthorized', 404: 'Not Found', 429: 'Too Many Requests', 503: 'Service Unavailable'}
+
+
+def _error(status, message, reason):
+    return status, {'error': {'code': status, 'message': message, 'errors': [{'reason': reason, 'message': message}]}}
+
+
+class FakeCalendarServer:
+    """Threaded HTTP server holding calendars' events in memory.
+
+    error_rate is the chance any API call answers 503; rate_limit caps
+    calls per second per access token, answering 429 beyond it.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, error_rate=0.0, rate_limit=None, latency=0.0,
+                 token_ttl=3600, seed=None):
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.latency = latency
+        self.token_ttl = token_ttl
+        self.events = {}  # (calendar_id, event_id) -> event
+        self.stats = Counter()
+        self._tokens = {}  # access token -> monotonic expiry
+        self._windows = {}  # access token -> (second, calls)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread = None
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.fake = self
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def token_url(self):
+        return f'{self.url}{TOKEN_PATH}'
+
+    def start(self):
+        """Serve from a background thread; returns the base URL."""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def issue_token(self, form):
+        if form.get('grant_type') != ['refresh_token'] or not form.get('refresh_token'):
+            return 400, {'error': 'invalid_grant'}
+        token = f'fake-{uuid4().hex}'
+        with self._lock:
+            self._tokens[token] = time.monotonic() + self.token_ttl
+            self.stats['tokens'] += 1
+        return 200, {'access_token': token, 'expires_in': self.token_ttl, 'token_type': 'Bearer'}
+
+    def token_valid(self, authorization):
+        token = (authorization or '').removeprefix('Bearer ')
+        with self._lock:
+            return self._tokens.get(token, 0) > time.monotonic()
+
+    def _admit(self, token):
+        """Count a call against the token's rate limit and failure injection."""
+        with self._lock:
+            self.stats['calls'] += 1
+            if self.rate_limit:
+                second = int(time.monotonic())
+                window, calls = self._windows.get(token, (second, 0))
+                if window != second:
+                    window, calls = second, 0
+                self._windows[token] = (window, calls + 1)
+                if calls >= self.rate_limit:
+                    self.stats['rate_limited'] += 1
+                    return _error(429, 'Rate Limit Exceeded', 'rateLimitExceeded')
+            if self.error_rate and self._rng.random() < self.error_rate:
+                self.stats['errors'] += 1
+                return _error(503, 'Backend Error', 'backendError')
+        return None
+
+    def handle_call(self, method, path, body, token):
+        """Answer one events API call with (status, payload)."""
+        refused = self._admit(token)
+        if refused:
+            return refused
+        match = EVENT_PATH.match(path.split('?')[0])
+        if not match:
+            return _error(404, 'Not Found', 'notFound')
+        calendar_id, event_id = unquote(match[1]), match[2] and unquote(match[2])
+        with self._lock:
+            if event_id is None and method == 'POST':
+                event = {**json.loads(body or b'{}'), 'id': uuid4().hex, 'status': 'confirmed'}
+                self.events[calendar_id, event['id']] = event
+                self.stats['inserted'] += 1
+                return 200, event
+            key = (calendar_id, event_id)
+            if event_id is None or key not in self.events:
+                return _error(404, 'Not Found', 'notFound')
+            if method == 'GET':
+                return 200, self.events[key]
+            if method in ('PUT', 'PATCH'):
+                event = json.loads(body or b'{}')
+                if method == 'PATCH':
+                    event = {**self.events[key], **event}
+                self.events[key] = {**event, 'id': event_id, 'status': 'confirmed'}
+                self.stats['updated'] += 1
+                return 200, self.events[key]
+            if method == 'DELETE':
+                del self.events[key]
+                self.stats['deleted'] += 1
+                return 204, None
+        return _error(400, 'Unsupported method', 'badRequest')
+
+    def handle_batch(self, content_type, body, token):
+        """Run each part of a multipart/mixed batch; returns (content type, body)."""
+        boundary = f'batch_{uuid4().hex}'
+        parts = []
+        for headers, request in split_multipart(content_type, body):
+            head, payload = (re.split(rb'\r?\n\r?\n', request, maxsplit=1) + [b''])[:2]
+            method, path = head.split(b'\n', 1)[0].decode().split()[:2]
+            status, result = self.handle_call(method, path, payload.strip(), token)
+            content_id = headers.get('content-id', '').strip('<>')
+            lines = [
+                f'--{boundary}', 'Content-Type: application/http', f'Content-ID: <response-{content_id}>', '',
+                f'HTTP/1.1 {status} {REASONS.get(status, "OK")}',
+            ]
+            if result is None:
+                lines += ['', '']
+            else:
+                lines += ['Content-Type: application/json; charset=UTF-8', '', json.dumps(result)]
+            parts.append('\r\n'.join(lines))
+        with self._lock:
+            self.stats['batches'] += 1
+        return f'multipart/mixed; boundary={boundary}', ('\r\n'.join(parts) + f'\r\n--{boundary}--\r\n').encode()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, as the real API
+
+    def _dispatch(self):
+        fake = self.server.fake
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if fake.latency:
+            time.sleep(fake.latency)
+        path = self.path.split('?')[0]
+        with fake._lock:
+            fake.stats['requests'] += 1
+
+        if path == TOKEN_PATH and self.command == 'POST':
+            return self._send_json(*fake.issue_token(parse_qs(body.decode())))
+        authorization = self.headers.get('Authorization')
+        if not fake.token_valid(authorization):
+            return self._send_json(*_error(401, 'Invalid Credentials', 'authError'))
+        token = authorization.removeprefix('Bearer ')
+        if path == BATCH_PATH and self.command == 'POST':
+            content_type, payload = fake.handle_batch(self.headers.get('Content-Type', ''), body, token)
+            return self._send(200, content_type, payload)
+        return self._send_json(*fake.handle_call(self.command, path, body, token))
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _dispatch
+
+    def _send_json(self, status, payload):
+        self._send(status, 'application/json; charset=UTF-8', b'' if payload is None else json.dumps(payload).encode())
+
+    def _send(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
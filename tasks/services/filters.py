@@ -0,0 +1,281 @@
+"""Saved filter queries.
+
+``SavedFilter.filter_config`` holds a small JSON query language::
+
+    {
+        "status": ["todo", "in_progress"],      # or "open" (default), "any"
+        "priority": [1, 2],
+        "tags": {"any": ["work"], "all": [], "none": ["someday"]},  # names or ids
+        "project": [3, 4],                      # null for tasks without a project
+        "area": [1],
+        "due": {"from": "today", "to": 7},      # or "overdue", "today", "week", "none"
+        "my_day": true,
+        "estimate": {"min": 15, "max": 60}      # minutes; {"none": true} for unestimated
+    }
+
+Every key is optional and they combine with AND. Dates are ISO dates,
+"today", or a number of days from today, so a plan can be reused across
+days. A config compiles into a FilterPlan: validated, with tag names
+resolved to ids, and cheap to turn into a ``Q`` for any date. Plans are
+cached per filter and its updated_at, and tag edits invalidate them.
+"""
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from tasks.models import Area, Project, Tag, Task
+from tasks.services.cache import user_cache_key
+
+FILTER_CACHE_SCOPE = 'filters'
+PLAN_TIMEOUT = 60 * 60 * 24
+
+OPEN_STATUSES = (Task.Status.TODO, Task.Status.IN_PROGRESS)
+DUE_SHORTHANDS = {
+    'overdue': {'to': -1},
+    'today': {'from': 0, 'to': 0},
+    'week': {'from': 0, 'to': 6},
+    'none': {'none': True},
+}
+MAX_DAY_OFFSET = 100 * 366  # relative dates further out overflow date arithmetic
+KEYS = {'status', 'priority', 'tags', 'project', 'area', 'due', 'my_day', 'estimate'}
+
+TaskTag = Task.tags.through
+
+
+class FilterError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class FilterPlan:
+    """A validated filter config, ready to become a Q for a given day."""
+    statuses: tuple = OPEN_STATUSES
+    priorities: tuple = ()
+    tags_any: tuple = ()
+    tags_all: tuple = ()
+    tags_none: tuple = ()
+    projects: tuple = ()
+    without_project: bool = False
+    areas: tuple = ()
+    due_from: object = None  # a date, or an int offset from today
+    due_to: object = None
+    due_none: bool = False
+    my_day: object = None  # True, False or None for either
+    estimate_min: object = None
+    estimate_max: object = None
+    estimate_none: bool = False
+    broken: bool = False  # the config no longer compiles; match nothing
+
+    def q(self, today):
+        """The plan as a Q on Task, relative dates resolved against today.
+
+        Tag conditions are subqueries on the tag table rather than joins,
+        so the Q never duplicates rows and can also serve as an
+        aggregate's filter.
+        """
+        if self.broken:
+            return Q(pk__in=[])
+        q = Q()
+        if self.statuses:
+            q &= Q(status__in=self.statuses)
+        if self.priorities:
+            q &= Q(priority__in=self.priorities)
+        if self.tags_any:
+            q &= Q(pk__in=TaskTag.objects.filter(tag_id__in=self.tags_any).values('task_id'))
+        if self.tags_all:
+            q &= Q(pk__in=(
+                TaskTag.objects.filter(tag_id__in=self.tags_all).values('task_id')
+                .annotate(matched=Count('tag_id')).filter(matched=len(set(self.tags_all))).values('task_id')
+            ))
+        if self.tags_none:
+            q &= ~Q(pk__in=TaskTag.objects.filter(tag_id__in=self.tags_none).values('task_id'))
+        if self.projects or self.without_project:
+            projects = Q(project_id__in=self.projects) if self.projects else Q(pk__in=[])
+            if self.without_project:
+                projects |= Q(project__isnull=True)
+            q &= projects
+        if self.areas:
+            q &= Q(project__area_id__in=self.areas)
+        if self.due_none:
+            q &= Q(due_date__isnull=True)
+        if self.due_from is not None:
+            q &= Q(due_date__gte=_resolve(self.due_from, today))
+        if self.due_to is not None:
+            q &= Q(due_date__lte=_resolve(self.due_to, today))
+        if self.my_day is not None:
+            my_day = Q(is_my_day=True) | Q(due_date=today)
+            q &= my_day if self.my_day else ~my_day
+        if self.estimate_none:
+            q &= Q(estimated_minutes__isnull=True)
+        if self.estimate_min is not None:
+            q &= Q(estimated_minutes__gte=self.estimate_min)
+        if self.estimate_max is not None:
+            q &= Q(estimated_minutes__lte=self.estimate_max)
+        return q
+
+
+def _resolve(value, today):
+    return today + timedelta(days=value) if isinstance(value, int) else value
+
+
+def _as_list(value):
+    return list(value) if isinstance(value, (list, tuple)) else [value]
+
+
+def _ids(value, label):
+    ids = _as_list(value)
+    if not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in ids):
+        raise FilterError(f'{label} must be ids')
+    return tuple(ids)
+
+
+def _day(value, label):
+    if isinstance(value, int) and not isinstance(value, bool):
+        if abs(value) > MAX_DAY_OFFSET:
+            raise FilterError(f'{label} must be within {MAX_DAY_OFFSET} days of today')
+        return value
+    if value == 'today':
+        return 0
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise FilterError(f'{label} must be a date, "today" or a number of days')
+
+
+def _minutes(value, label):
+    if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+        raise FilterError(f'{label} must be a number of minutes')
+    return value
+
+
+def _resolve_tags(user, names, strict):
+    """Tag ids for names or ids; unknown ones become 0, which matches no tag."""
+    wanted = _as_list(names)
+    if not all(isinstance(name, (str, int)) and not isinstance(name, bool) for name in wanted):
+        raise FilterError('tags must be names or ids')
+    by_name = dict(Tag.objects.filter(user=user, name__in=[n for n in wanted if isinstance(n, str)]).values_list('name', 'pk'))
+    by_pk = set(Tag.objects.filter(user=user, pk__in=[n for n in wanted if isinstance(n, int)]).values_list('pk', flat=True))
+    ids = []
+    for name in wanted:
+        pk = by_name.get(name) if isinstance(name, str) else (name if name in by_pk else None)
+        if pk is None and strict:
+            raise FilterError(f'Unknown tag {name!r}')
+        ids.append(pk or 0)
+    return tuple(ids)
+
+
+def compile_filter(config, user, strict=False):
+    """Validate a filter config and resolve it into a FilterPlan for user.
+
+    With strict, references to tags, projects or areas the user does not
+    have are errors; otherwise they simply match nothing, as when a saved
+    filter outlives a tag it names.
+    """
+    if not isinstance(config, dict):
+        raise FilterError('A filter must be an object')
+    unknown = set(config) - KEYS
+    if unknown:
+        raise FilterError(f'Unknown filter keys: {", ".join(sorted(unknown))}')
+    plan = {}
+
+    status = config.get('status', 'open')
+    if status == 'any':
+        plan['statuses'] = ()
+    elif status != 'open':
+        statuses = tuple(_as_list(status))
+        if not all(value in Task.Status.values for value in statuses):
+            raise FilterError(f'status must be "open", "any" or some of {", ".join(Task.Status.values)}')
+        plan['statuses'] = statuses
+
+    if 'priority' in config:
+        priorities = _ids(config['priority'], 'priority')
+        if not all(value in Task.Priority.values for value in priorities):
+            raise FilterError('priority must be between 1 and 4')
+        plan['priorities'] = priorities
+
+    if 'tags' in config:
+        tags = config['tags']
+        if not isinstance(tags, dict):
+            tags = {'any': tags}
+        if set(tags) - {'any', 'all', 'none'}:
+            raise FilterError('tags takes "any", "all" and "none"')
+        for mode, names in tags.items():
+            if names:
+                plan[f'tags_{mode}'] = _resolve_tags(user, names, strict)
+
+    if 'project' in config:
+        projects = _as_list(config['project'])
+        plan['without_project'] = None in projects
+        plan['projects'] = _ids([pk for pk in projects if pk is not None], 'project')
+        if strict and Project.objects.filter(user=user, pk__in=plan['projects']).count() != len(set(plan['projects'])):
+            raise FilterError('Unknown project')
+
+    if 'area' in config:
+        plan['areas'] = _ids(config['area'], 'area')
+        if strict and Area.objects.filter(user=user, pk__in=plan['areas']).count() != len(set(plan['areas'])):
+            raise FilterError('Unknown area')
+
+    if 'due' in config:
+        due = config['due']
+        due = DUE_SHORTHANDS.get(due, due) if isinstance(due, str) else due
+        if not isinstance(due, dict) or set(due) - {'from', 'to', 'none'}:
+            raise FilterError(f'due must be an object with from/to/none, or one of {", ".join(DUE_SHORTHANDS)}')
+        plan['due_none'] = bool(due.get('none'))
+        if due.get('from') is not None:
+            plan['due_from'] = _day(due['from'], 'due.from')
+        if due.get('to') is not None:
+            plan['due_to'] = _day(due['to'], 'due.to')
+
+    if config.get('my_day') is not None:
+        plan['my_day'] = bool(config['my_day'])
+
+    if 'estimate' in config:
+        estimate = config['estimate']
+        if not isinstance(estimate, dict) or set(estimate) - {'min', 'max', 'none'}:
+            raise FilterError('estimate must be an object with min/max/none')
+        plan['estimate_none'] = bool(estimate.get('none'))
+        if estimate.get('min') is not None:
+            plan['estimate_min'] = _minutes(estimate['min'], 'estimate.min')
+        if estimate.get('max') is not None:
+            plan['estimate_max'] = _minutes(estimate['max'], 'estimate.max')
+
+    return FilterPlan(**plan)
+
+
+def get_plan(saved_filter):
+    """The cached FilterPlan for saved_filter, compiling it on a miss."""
+    key = user_cache_key(
+        saved_filter.user_id, FILTER_CACHE_SCOPE, saved_filter.pk, int(saved_filter.updated_at.timestamp() * 1_000_000),
+    )
+    plan = cache.get(key)
+    if plan is None:
+        try:
+            plan = compile_filter(saved_filter.filter_config, saved_filter.user_id)
+        except FilterError:
+            plan = FilterPlan(broken=True)  # edited into nonsense outside the form
+        cache.set(key, plan, PLAN_TIMEOUT)
+    return plan
+
+
+def filter_tasks(saved_filter, today):
+    """The user's tasks matching saved_filter."""
+    return Task.objects.filter(get_plan(saved_filter).q(today), user_id=saved_filter.user_id)
+
+
+def filter_aggregates(saved_filters, today):
+    """Count() aggregates on Task, one per filter, keyed 'filter_<pk>'."""
+    aggregates = {}
+    for saved_filter in saved_filters:
+        q = get_plan(saved_filter).q(today)
+        aggregates[f'filter_{saved_filter.pk}'] = Count('pk', filter=q) if q else Count('pk')
+    return aggregates
+
+
+def filter_counts(user, saved_filters, today):
+    """{filter pk: matching task count} for all of saved_filters in one aggregate query."""
+    if not saved_filters:
+        return {}
+    counts = Task.objects.filter(user=user).order_by().aggregate(**filter_aggregates(saved_filters, today))
+    return {saved_filter.pk: counts[f'filter_{saved_filter.pk}'] for saved_filter in saved_filters}
@@ -0,0 +1,563 @@
+"""Push tasks to Google Calendar.
+
+Edits schedule a debounced Celery run for the user's connection and
+nothing else. The run finds what changed itself: it reads only the tasks
+whose updated_at is past the connection's ``synced_through`` watermark
+(through the (user, updated_at) index), flags their GoogleCalendarSync
+rows and advances the watermark, so a run's cost follows the number of
+edits rather than the number of tasks. Rows whose event body hashes the
+same as what was last pushed are settled without an API call.
+
+Pending rows become inserts, updates or deletes of the task's event and
+go through the Calendar batch endpoint, BATCH_SIZE calls per HTTP
+request, over a pooled keep-alive connection. Calls are paced per
+connection by GOOGLE_CALENDAR_RATE_LIMIT. Rate limiting and server errors
+leave rows pending and put the connection into exponential backoff.
+Access tokens are refreshed TOKEN_REFRESH_MARGIN before they expire; a
+refresh Google rejects means the grant was revoked, and the connection is
+flagged needs_reauth and left alone until the user reconnects.
+
+Only one worker syncs a connection at a time: run_sync() claims a lease
+on the connection row with a conditional UPDATE, which holds across
+processes whatever the cache backend.
+Point GOOGLE_CALENDAR_API_URL and GOOGLE_OAUTH_TOKEN_URL at ``manage.py
+fake_calendar_server`` to run all of this offline.
+"""
+import hashlib
+import json
+import random
+import re
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from urllib.parse import quote, urlencode
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from tasks.models import GoogleCalendarConnection, GoogleCalendarSync, Task
+from tasks.services.http import get_session, split_multipart
+
+BATCH_SIZE = 50  # Calendar API limit per batch request
+ROWS_PER_READ = 500
+MAX_PER_RUN = 2000
+TOKEN_REFRESH_MARGIN = timedelta(minutes=5)
+BACKOFF_BASE_SECONDS = 5
+BACKOFF_MAX_SECONDS = 60 * 60
+LOCK_TIMEOUT = 15 * 60
+CALL_RETRIES = 2
+CALL_RETRY_DELAY = 0.5  # seconds, doubled per retry
+DEFAULT_EVENT_MINUTES = 30
+SCAN_CHUNK_SIZE = 2000
+# Changes are re-read this far behind the watermark, for transactions that
+# committed after a later one had already been scanned
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+# Task fields that show up in the event
+SYNCED_FIELDS = frozenset({
+    'title', 'description', 'status', 'due_date', 'due_time', 'estimated_minutes', 'sync_to_google_calendar',
+})
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+RATE_LIMIT_REASONS = frozenset({'rateLimitExceeded', 'userRateLimitExceeded'})
+
+
+class CalendarSyncError(Exception):
+    pass
+
+
+class RetryLater(CalendarSyncError):
+    """Transient failure; the connection should back off and retry."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenRejected(CalendarSyncError):
+    pass
+
+
+class GrantRevoked(TokenRejected):
+    """The refresh token itself was rejected; only reconnecting helps."""
+
+
+@dataclass
+class SyncResult:
+    pushed: int = 0
+    failed: int = 0
+    remaining: bool = False
+    retry_at: datetime = None
+    error: str = ''
+    flagged: int = 0
+    unchanged: int = 0
+    calls: int = 0
+    retried: int = 0
+
+
+# Change tracking
+
+def _connection_cache_key(user_id):
+    return f'srtask:gcal-connection:{user_id}'
+
+
+def connection_id_for(user_id):
+    """The user's connection id (0 if none), cached so task saves stay cheap."""
+    return cache.get_or_set(
+        _connection_cache_key(user_id),
+        lambda: GoogleCalendarConnection.objects.filter(user_id=user_id, needs_reauth=False)
+        .values_list('pk', flat=True).first() or 0,
+        None,
+    )
+
+
+def forget_connection(user_id):
+    cache.delete(_connection_cache_key(user_id))
+
+
+def sync_soon(task_ids, user_ids=None):
+    """Schedule a run for the connections owning these tasks.
+
+    Tasks of users without a connection cost at most one cached lookup.
+    """
+    if user_ids is None:
+        user_ids = Task.objects.filter(pk__in=task_ids).order_by().values_list('user_id', flat=True).distinct()
+    for user_id in set(user_ids):
+        connection_id = connection_id_for(user_id)
+        if connection_id:
+            schedule_sync(connection_id)
+
+
+def _queued_key(connection_id):
+    return f'srtask:gcal-queued:{connection_id}'
+
+
+def schedule_sync(connection_id, delay=None):
+    """Queue one run for the connection; requests within the delay share it.
+
+    With a per-process cache, processes may each queue a run; run_sync's
+    lease still lets only one of them work at a time.
+    """
+    delay = settings.GOOGLE_CALENDAR_SYNC_DELAY if delay is None else delay
+    if cache.add(_queued_key(connection_id), 1, max(delay, 1)):
+        from tasks.tasks import sync_google_calendar
+        transaction.on_commit(lambda: sync_google_calendar.apply_async((connection_id,), countdown=delay))
+
+
+def pending_syncs(connection):
+    """Rows with work to do: flagged changes, plus events of deleted tasks."""
+    return GoogleCalendarSync.objects.filter(
+        Q(sync_status=GoogleCalendarSync.SyncStatus.PENDING) | Q(task__isnull=True), connection=connection,
+    )
+
+
+def connections_with_changes():
+    """Ids of connections with tasks past their watermark or rows pending."""
+    changed = Task.objects.filter(user_id=OuterRef('user_id'), updated_at__gt=OuterRef('synced_through'))
+    pending = GoogleCalendarSync.objects.filter(
+        Q(sync_status=GoogleCalendarSync.SyncStatus.PENDING) | Q(task__isnull=True), connection=OuterRef('pk'),
+    )
+    return GoogleCalendarConnection.objects.filter(
+        Q(synced_through__isnull=True) | Exists(changed) | Exists(pending), needs_reauth=False,
+    ).values_list('pk', flat=True)
+
+
+def collect_changes(connection):
+    """Flag rows for tasks changed since the connection's watermark, then advance it.
+
+    A task whose updated_at is the one its row last pushed is skipped, so
+    re-reading the overlap is cheap. The first scan covers every task.
+    Returns the number of rows flagged or created.
+    """
+    tasks = Task.objects.filter(user_id=connection.user_id).order_by()
+    if connection.synced_through:
+        tasks = tasks.filter(updated_at__gt=connection.synced_through - WATERMARK_OVERLAP)
+    rows = tasks.values_list(
+        'pk', 'updated_at', 'due_date', 'sync_to_google_calendar',
+        'calendar_sync__pk', 'calendar_sync__task_updated_at', 'calendar_sync__sync_status',
+    )
+
+    watermark = connection.synced_through
+    stale, new = [], []
+    for pk, updated_at, due_date, sync_flag, sync_pk, pushed_at, status in rows.iterator(SCAN_CHUNK_SIZE):
+        watermark = max(watermark or updated_at, updated_at)
+        if sync_pk is not None:
+            if pushed_at != updated_at and status != GoogleCalendarSync.SyncStatus.PENDING:
+                stale.append(sync_pk)
+        elif due_date and (sync_flag or connection.sync_all_tasks):
+            new.append(GoogleCalendarSync(task_id=pk, connection=connection))
+
+    for start in range(0, len(stale), SCAN_CHUNK_SIZE):
+        GoogleCalendarSync.objects.filter(pk__in=stale[start:start + SCAN_CHUNK_SIZE]).update(
+            sync_status=GoogleCalendarSync.SyncStatus.PENDING,
+        )
+    GoogleCalendarSync.objects.bulk_create(new, batch_size=SCAN_CHUNK_SIZE, ignore_conflicts=True)
+    if watermark != connection.synced_through:
+        connection.synced_through = watermark
+        connection.save(update_fields=['synced_through', 'updated_at'])
+    return len(stale) + len(new)
+
+
+# API client
+
+def _encode_batch(calls, boundary):
+    parts = []
+    for index, (method, path, payload) in enumerate(calls):
+        lines = [f'--{boundary}', 'Content-Type: application/http', f'Content-ID: <item{index}>', '', f'{method} {path} HTTP/1.1']
+        if payload is None:
+            lines += ['', '']
+        else:
+            lines += ['Content-Type: application/json', '', json.dumps(payload)]
+        parts.append('\r\n'.join(lines))
+    return ('\r\n'.join(parts) + f'\r\n--{boundary}--\r\n').encode()
+
+
+def _decode_batch(content_type, body, count):
+    """Per-call (status, payload) from a multipart/mixed batch response."""
+    results = [(0, None)] * count  # a missing part counts as a transient failure
+    for headers, message in split_multipart(content_type, body):
+        match = re.search(r'item(\d+)', headers.get('content-id', ''))
+        if not match or int(match[1]) >= count:
+            continue
+        head, payload = (re.split(rb'\r?\n\r?\n', message, maxsplit=1) + [b''])[:2]
+        status = int(head.split(None, 2)[1])
+        payload = payload.strip()
+        results[int(match[1])] = (status, json.loads(payload) if payload else None)
+    return results
+
+
+def _retry_after(headers):
+    try:
+        return int(headers.get('retry-after', ''))
+    except ValueError:
+        return None
+
+
+class CalendarClient:
+    """Calendar API calls for one connection, with token refresh and pacing."""
+
+    def __init__(self, connection, session=None):
+        self.connection = connection
+        self.session = session or get_session()
+        self.rate = settings.GOOGLE_CALENDAR_RATE_LIMIT
+        self._next_call_at = 0.0
+        self.calls = 0
+        self.retried = 0
+
+    def ensure_token(self, force=False):
+        connection = self.connection
+        if not force and connection.token_expiry - timezone.now() > TOKEN_REFRESH_MARGIN:
+            return
+        response = self.session.request(
+            'POST', settings.GOOGLE_OAUTH_TOKEN_URL,
+            body=urlencode({
+                'grant_type': 'refresh_token',
+                'refresh_token': connection.refresh_token,
+                'client_id': settings.GOOGLE_CLIENT_ID,
+                'client_secret': settings.GOOGLE_CLIENT_SECRET,
+            }).encode(),
+            headers={'Content-Type': 'application/x-www-form-urlencoded'},
+        )
+        if response.status in RETRYABLE_STATUSES:
+            raise RetryLater(f'Token refresh failed ({response.status})', _retry_after(response.headers))
+        if response.status != 200:
+            raise GrantRevoked(f'Token refresh rejected ({response.status})')
+        data = response.json()
+        connection.access_token = data['access_token']
+        connection.refresh_token = data.get('refresh_token') or connection.refresh_token
+        connection.token_expiry = timezone.now() + timedelta(seconds=int(data.get('expires_in', 3600)))
+        connection.save(update_fields=['access_token', 'refresh_token', 'token_expiry', 'updated_at'])
+
+    def _pace(self, calls):
+        """Block until calls more requests fit the per-connection rate."""
+        if not self.rate:
+            return
+        now = time.monotonic()
+        if self._next_call_at > now:
+            time.sleep(self._next_call_at - now)
+        self._next_call_at = max(now, self._next_call_at) + calls / self.rate
+
+    def batch(self, calls):
+        """Send [(method, path, payload)] as one batch; returns [(status, payload)] in order."""
+        self._pace(len(calls))
+        self.calls += len(calls)
+        boundary = f'batch_{uuid4().hex}'
+        response = self.session.request(
+            'POST', f'{settings.GOOGLE_CALENDAR_API_URL}/batch/calendar/v3',
+            body=_encode_batch(calls, boundary),
+            headers={
+                'Authorization': f'Bearer {self.connection.access_token}',
+                'Content-Type': f'multipart/mixed; boundary={boundary}',
+            },
+        )
+        if response.status == 401:
+            raise TokenRejected('Access token rejected')
+        if response.status in RETRYABLE_STATUSES or response.status == 403:
+            raise RetryLater(f'Batch request failed ({response.status})', _retry_after(response.headers))
+        if response.status != 200:
+            raise CalendarSyncError(f'Batch request failed ({response.status})')
+        return _decode_batch(response.headers.get('content-type', ''), response.body, len(calls))
+
+    def batch_with_refresh(self, calls):
+        try:
+            return self.batch(calls)
+        except TokenRejected:
+            self.ensure_token(force=True)
+            return self.batch(calls)
+
+
+# Sync
+
+def wants_event(connection, task):
+    if task is None or task.due_date is None or task.status == Task.Status.CANCELLED:
+        return False
+    if task.status == Task.Status.COMPLETED and connection.remove_on_complete:
+        return False
+    return task.sync_to_google_calendar or connection.sync_all_tasks
+
+
+def event_body(task):
+    if task.due_time:
+        start = datetime.combine(task.due_date, task.due_time)
+        end = start + timedelta(minutes=task.estimated_minutes or DEFAULT_EVENT_MINUTES)
+        when = {
+            'start': {'dateTime': start.isoformat(), 'timeZone': settings.TIME_ZONE},
+            'end': {'dateTime': end.isoformat(), 'timeZone': settings.TIME_ZONE},
+        }
+    else:
+        when = {
+            'start': {'date': task.due_date.isoformat()},
+            'end': {'date': (task.due_date + timedelta(days=1)).isoformat()},
+        }
+    return {
+        'summary': task.title,
+        'description': task.description,
+        'extendedProperties': {'private': {'srtaskTaskId': str(task.pk)}},
+        **when,
+    }
+
+
+def event_hash(body):
+    return hashlib.sha256(json.dumps(body, sort_keys=True).encode()).hexdigest()
+
+
+def _operation(connection, row):
+    """(kind, method, path, payload) for a row, or None if nothing needs sending.
+
+    Sets row.content_hash to what the event will hold once the call succeeds.
+    """
+    events = f'/calendar/v3/calendars/{quote(connection.calendar_id, safe="")}/events'
+    if wants_event(connection, row.task):
+        body = event_body(row.task)
+        digest = event_hash(body)
+        if row.google_event_id and digest == row.content_hash:
+            return None
+        row.content_hash = digest
+        if row.google_event_id:
+            return 'update', 'PUT', f'{events}/{quote(row.google_event_id, safe="")}', body
+        return 'insert', 'POST', events, body
+    row.content_hash = ''
+    if row.google_event_id:
+        return 'delete', 'DELETE', f'{events}/{quote(row.google_event_id, safe="")}', None
+    return None
+
+
+def _is_rate_limited(status, payload):
+    if status == 429:
+        return True
+    errors = ((payload or {}).get('error') or {}).get('errors') or []
+    return status == 403 and any(error.get('reason') in RATE_LIMIT_REASONS for error in errors)
+
+
+def _error_text(status, payload):
+    message = ((payload or {}).get('error') or {}).get('message', '')
+    return f'{status} {message}'.strip()
+
+
+def _send(client, operations):
+    """Send up to BATCH_SIZE operations in one batch, retrying transient failures.
+
+    Returns (done, failed, still failing) lists of rows.
+    """
+    connection = client.connection
+    done, failed = [], []
+    for attempt in range(CALL_RETRIES + 1):
+        if not operations:
+            break
+        if attempt:
+            client.retried += len(operations)
+            time.sleep(CALL_RETRY_DELAY * 2 ** (attempt - 1))
+        results = client.batch_with_refresh([operation[1:] for _, operation in operations])
+        transient = []
+        for (row, operation), (status, payload) in zip(operations, results):
+            kind = operation[0]
+            if 200 <= status < 300 or (kind == 'delete' and status in (404, 410)):
+                if kind == 'insert':
+                    row.google_event_id = payload['id']
+                elif kind == 'delete':
+                    row.google_event_id = ''
+                done.append(row)
+            elif kind == 'update' and status in (404, 410):
+                # Deleted on Google's side; insert it again
+                row.google_event_id = ''
+                transient.append((row, _operation(connection, row)))
+            elif status in RETRYABLE_STATUSES or status == 0 or _is_rate_limited(status, payload):
+                transient.append((row, operation))
+            else:
+                row.error_message = _error_text(status, payload)
+                failed.append(row)
+        operations = transient
+    return done, failed, [row for row, _ in operations]
+
+
+def _save(unchanged, done, failed, failing):
+    """Record a chunk's outcome.
+
+    Settled rows keep the task version they saw, so collect_changes only
+    flags them again once the task is edited. Shared values go out as plain
+    UPDATEs grouped by value; only per-event fields need bulk_update.
+    """
+    now = timezone.now()
+    gone = [row.pk for row in unchanged + done if row.task_id is None]
+    GoogleCalendarSync.objects.filter(pk__in=gone).delete()
+
+    by_version = defaultdict(list)
+    for row in unchanged:
+        if row.task_id is not None:
+            by_version[row.task.updated_at].append(row.pk)
+    for version, pks in by_version.items():
+        GoogleCalendarSync.objects.filter(pk__in=pks).update(
+            sync_status=GoogleCalendarSync.SyncStatus.SYNCED, error_message='', last_synced_at=now, task_updated_at=version,
+        )
+
+    for row in done + failed:
+        row.task_updated_at = row.task.updated_at if row.task else None
+    for row in failing:
+        row.content_hash = ''  # unknown until a call succeeds
+    pushed = [row for row in done if row.task_id is not None]
+    GoogleCalendarSync.objects.filter(pk__in=[row.pk for row in pushed]).update(
+        sync_status=GoogleCalendarSync.SyncStatus.SYNCED, error_message='', last_synced_at=now,
+    )
+    GoogleCalendarSync.objects.filter(pk__in=[row.pk for row in failed]).update(
+        sync_status=GoogleCalendarSync.SyncStatus.FAILED, last_synced_at=now,
+    )
+    GoogleCalendarSync.objects.bulk_update(failed, ['error_message'])
+    GoogleCalendarSync.objects.bulk_update(
+        pushed + failed + failing, ['google_event_id', 'content_hash', 'task_updated_at'],
+    )
+
+
+def _push(client, rows):
+    """Settle a chunk of pending rows, sending what changed in batches.
+
+    Returns (pushed, unchanged, failed, still failing) counts. Once a batch
+    keeps failing the rest of the chunk is left pending untouched.
+    """
+    unchanged, operations = [], []
+    for row in rows:
+        operation = _operation(client.connection, row)
+        if operation is None:
+            unchanged.append(row)
+        else:
+            operations.append((row, operation))
+
+    done, failed, failing = [], [], []
+    for start in range(0, len(operations), BATCH_SIZE):
+        sent = _send(client, operations[start:start + BATCH_SIZE])
+        done += sent[0]
+        failed += sent[1]
+        failing += sent[2]
+        if failing:
+            break
+    _save(unchanged, done, failed, failing)
+    return len(done), len(unchanged), len(failed), len(failing)
+
+
+def _back_off(connection, exc, progressed):
+    # A run that got some calls through restarts the backoff from its base
+    failures = 1 if progressed else connection.consecutive_failures + 1
+    delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** (failures - 1)) * random.uniform(0.8, 1.2)
+    delay = max(delay, exc.retry_after or 0)
+    connection.consecutive_failures = failures
+    connection.backoff_until = timezone.now() + timedelta(seconds=delay)
+    connection.save(update_fields=['consecutive_failures', 'backoff_until', 'updated_at'])
+    return connection.backoff_until
+
+
+def sync_connection(connection, limit=MAX_PER_RUN, session=None):
+    """Pick up changes and push up to limit pending rows; returns a SyncResult."""
+    if connection.needs_reauth:
+        return SyncResult(error='Needs reauthorisation')
+    if connection.backoff_until and connection.backoff_until > timezone.now():
+        return SyncResult(remaining=True, retry_at=connection.backoff_until)
+
+    client = CalendarClient(connection, session)
+    result = SyncResult()
+    last_pk = 0
+    try:
+        result.flagged = collect_changes(connection)
+        while (handled := result.pushed + result.unchanged + result.failed) < limit:
+            rows = list(
+                pending_syncs(connection).filter(pk__gt=last_pk).select_related('task')
+                .order_by('pk')[:min(ROWS_PER_READ, limit - handled)]
+            )
+            if not rows:
+                break
+            last_pk = rows[-1].pk
+            client.ensure_token()
+            pushed, unchanged, failed, failing = _push(client, rows)
+            result.pushed += pushed
+            result.unchanged += unchanged
+            result.failed += failed
+            if failing:
+                raise RetryLater(f'{failing} calendar calls still failing after {CALL_RETRIES} retries')
+        else:
+            result.remaining = pending_syncs(connection).filter(pk__gt=last_pk).exists()
+    except GrantRevoked as exc:
+        # Retrying can't help; the user has to reconnect
+        result.error = str(exc)
+        connection.needs_reauth = True
+        connection.save(update_fields=['needs_reauth', 'updated_at'])
+        return result
+    except (CalendarSyncError, OSError) as exc:
+        if not isinstance(exc, RetryLater):
+            exc = RetryLater(str(exc))
+        result.remaining = True
+        result.error = str(exc)
+        result.retry_at = _back_off(connection, exc, result.pushed + result.failed > 0)
+        return result
+    finally:
+        result.calls, result.retried = client.calls, client.retried
+
+    if connection.consecutive_failures or connection.backoff_until:
+        connection.consecutive_failures = 0
+        connection.backoff_until = None
+        connection.save(update_fields=['consecutive_failures', 'backoff_until', 'updated_at'])
+    return result
+
+
+def _claim(connection_id):
+    """Take the connection's sync lease; False if another worker holds it."""
+    now = timezone.now()
+    return GoogleCalendarConnection.objects.filter(
+        Q(sync_lease_until__isnull=True) | Q(sync_lease_until__lt=now), pk=connection_id,
+    ).update(sync_lease_until=now + timedelta(seconds=LOCK_TIMEOUT)) == 1
+
+
+def run_sync(connection_id, limit=MAX_PER_RUN, session=None):
+    """Sync one connection unless another worker already is; None if skipped."""
+    if not _claim(connection_id):
+        return None
+    try:
+        # Edits from here on schedule a fresh run
+        cache.delete(_queued_key(connection_id))
+        connection = GoogleCalendarConnection.objects.filter(pk=connection_id).first()
+        if connection is None:
+            return None
+        return sync_connection(connection, limit, session)
+    finally:
+        GoogleCalendarConnection.objects.filter(pk=connection_id).update(sync_lease_until=None)
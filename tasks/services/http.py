@@ -0,0 +1,116 @@
+"""Pooled keep-alive HTTP for outbound API calls.
+
+Each thread keeps one persistent connection per origin and reuses it
+across calls, so a Celery worker pays for the TCP and TLS handshakes once
+rather than on every request. A connection the server has closed while
+idle is reopened and the request re-sent once.
+"""
+import http.client
+import json
+import re
+import threading
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+DEFAULT_TIMEOUT = 30
+
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected, http.client.CannotSendRequest, BrokenPipeError, ConnectionResetError,
+)
+
+
+@dataclass
+class HttpResponse:
+    status: int
+    headers: dict
+    body: bytes
+
+    def json(self):
+        return json.loads(self.body) if self.body else None
+
+
+class HttpSession:
+    """Keep-alive connections keyed by origin; not shared between threads."""
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT):
+        self.timeout = timeout
+        self._connections = {}
+
+    def _connection(self, scheme, netloc):
+        key = (scheme, netloc)
+        if key not in self._connections:
+            factory = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+            self._connections[key] = factory(netloc, timeout=self.timeout)
+        return self._connections[key]
+
+    def _discard(self, scheme, netloc):
+        conn = self._connections.pop((scheme, netloc), None)
+        if conn is not None:
+            conn.close()
+
+    def request(self, method, url, body=None, headers=None):
+        parts = urlsplit(url)
+        path = parts.path or '/'
+        if parts.query:
+            path = f'{path}?{parts.query}'
+        for attempt in range(2):
+            conn = self._connection(parts.scheme, parts.netloc)
+            try:
+                conn.request(method, path, body=body, headers=headers or {})
+                response = conn.getresponse()
+                data = response.read()
+            except _STALE_CONNECTION_ERRORS:
+                self._discard(parts.scheme, parts.netloc)
+                if attempt:
+                    raise
+                continue
+            except OSError:
+                self._discard(parts.scheme, parts.netloc)
+                raise
+            if response.will_close:
+                self._discard(parts.scheme, parts.netloc)
+            return HttpResponse(response.status, {k.lower(): v for k, v in response.getheaders()}, data)
+
+    def close(self):
+        for scheme, netloc in list(self._connections):
+            self._discard(scheme, netloc)
+
+
+_BOUNDARY = re.compile(r'boundary="?([^";]+)"?', re.IGNORECASE)
+_BLANK_LINE = re.compile(rb'\r?\n\r?\n')
+
+
+def _parse_headers(block):
+    headers = {}
+    for line in block.decode('latin-1').splitlines():
+        name, _, value = line.partition(':')
+        if value:
+            headers[name.strip().lower()] = value.strip()
+    return headers
+
+
+def split_multipart(content_type, body):
+    """(headers, payload) for each part of a multipart body; header names lowercased."""
+    match = _BOUNDARY.search(content_type)
+    if not match:
+        return []
+    delimiter = b'--' + match[1].encode()
+    parts = []
+    for chunk in body.split(delimiter)[1:]:
+        if chunk.startswith(b'--'):
+            break
+        head, payload = (_BLANK_LINE.split(chunk.lstrip(b'\r\n'), maxsplit=1) + [b''])[:2]
+        # The CRLF before the next delimiter belongs to the delimiter
+        parts.append((_parse_headers(head), payload.removesuffix(b'\r\n')))
+    return parts
+
+
+_local = threading.local()
+
+
+def get_session():
+    """This thread's shared HttpSession."""
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = _local.session = HttpSession()
+    return session
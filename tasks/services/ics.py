@@ -0,0 +1,202 @@
+"""iCalendar (RFC 5545) feed of a user's due tasks.
+
+Every open task with a due date becomes a VEVENT: all-day, or timed when
+it has a due time, lasting its estimate. A recurring series is emitted
+once with its RRULE instead of being expanded, so its stored occurrences
+are left out; clients generate the dates themselves. Timed events are in
+settings.TIME_ZONE, which the calendar defines in a VTIMEZONE built from
+the zone database.
+
+The document is produced by a generator reading tasks in chunks, so it
+can be streamed without holding the whole calendar in memory.
+"""
+import re
+from datetime import datetime, timedelta, timezone as dt_timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.utils import timezone
+from django.db.models import Count, Max, Q
+
+from tasks.models import Task
+from tasks.services.google_calendar import DEFAULT_EVENT_MINUTES
+from tasks.services.recurrence import parse_rule, series_anchor
+
+CHUNK_SIZE = 500
+EVENTS_PER_WRITE = 100
+PRODID = '-//SRTask//Task feed//EN'
+VTIMEZONE_YEARS = 10  # offset changes described either side of the current year
+
+FEED_FIELDS = [
+    'title', 'description', 'status', 'due_date', 'due_time', 'start_date', 'estimated_minutes',
+    'is_recurring', 'recurrence_rule', 'created_at', 'updated_at',
+]
+
+_UNTIL = re.compile(r'UNTIL=(\d{8})(T\d{6}Z?)?', re.IGNORECASE)
+
+
+def feed_version(user):
+    """(last modified, ETag) for the user's feed.
+
+    Every change to a task bumps the latest updated_at and a deletion
+    lowers the count, so together they change whenever the feed could.
+    Both come from the (user, updated_at) index.
+    """
+    stats = Task.objects.filter(user=user).order_by().aggregate(latest=Max('updated_at'), count=Count('pk'))
+    latest = stats['latest'] or datetime(2000, 1, 1, tzinfo=dt_timezone.utc)
+    return latest, f'"{int(latest.timestamp() * 1_000_000):x}-{stats["count"]:x}"'
+
+
+def feed_tasks(user):
+    series = Q(is_recurring=True) & ~Q(recurrence_rule='')
+    return (
+        Task.objects.filter(user=user)
+        .filter(Q(due_date__isnull=False, recurrence_parent__isnull=True, is_recurring=False) | series)
+        .filter(Q(status__in=[Task.Status.TODO, Task.Status.IN_PROGRESS]) | series)
+        .exclude(status=Task.Status.CANCELLED)
+        .only(*FEED_FIELDS).order_by('pk')
+    )
+
+
+def _escape(text):
+    return (
+        text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def _fold(line):
+    """Split a content line into 75-octet pieces, as RFC 5545 requires."""
+    data = line.encode()
+    if len(data) <= 75:
+        return line + '\r\n'
+    pieces, start, limit = [], 0, 75
+    while start < len(data):
+        end = min(start + limit, len(data))
+        while end < len(data) and (data[end] & 0xC0) == 0x80:  # keep UTF-8 sequences whole
+            end -= 1
+        pieces.append(data[start:end].decode())
+        start, limit = end, 74  # continuation lines start with a space
+    return '\r\n '.join(pieces) + '\r\n'
+
+
+def _utc_stamp(moment):
+    return moment.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _utc_offset(offset):
+    sign = '-' if offset < timedelta(0) else '+'
+    minutes, seconds = divmod(int(abs(offset).total_seconds()), 60)
+    text = f'{sign}{minutes // 60:02d}{minutes % 60:02d}'
+    return f'{text}{seconds:02d}' if seconds else text
+
+
+@lru_cache(maxsize=8)
+def _vtimezone(name, first_year, last_year):
+    """The VTIMEZONE lines for zone name between two years, inclusive.
+
+    Each offset change becomes its own observance with a fixed DTSTART,
+    found by scanning the zone a day at a time and narrowing to the
+    second. The first observance holds from the start of first_year, so
+    a zone without changes (or UTC) still gets one.
+    """
+    zone = ZoneInfo(name)
+
+    def observance(moment, before):
+        local = moment.astimezone(zone)
+        kind = 'DAYLIGHT' if local.dst() else 'STANDARD'
+        return [
+            f'BEGIN:{kind}',
+            f'DTSTART:{(moment + before).replace(tzinfo=None):%Y%m%dT%H%M%S}',
+            f'TZOFFSETFROM:{_utc_offset(before)}',
+            f'TZOFFSETTO:{_utc_offset(local.utcoffset())}',
+            f'TZNAME:{local.tzname()}',
+            f'END:{kind}',
+        ]
+
+    def offset(moment):
+        return moment.astimezone(zone).utcoffset()
+
+    start = datetime(first_year, 1, 1, tzinfo=zone).astimezone(dt_timezone.utc)
+    end = datetime(last_year + 1, 1, 1, tzinfo=dt_timezone.utc)
+    lines = ['BEGIN:VTIMEZONE', f'TZID:{name}'] + observance(start, offset(start))
+    moment, current = start, offset(start)
+    while moment < end:
+        following = moment + timedelta(days=1)
+        if offset(following) != current:
+            low, high = moment, following
+            while high - low > timedelta(seconds=1):
+                middle = low + (high - low) / 2
+                low, high = (middle, high) if offset(middle) == current else (low, middle)
+            lines += observance(high, current)
+            current = offset(high)
+        moment = following
+    return lines + ['END:VTIMEZONE']
+
+
+def _rule_line(rule, all_day):
+    """The RRULE property for a series, or None if its rule does not parse."""
+    try:
+        parse_rule(rule)
+    except ValueError:
+        return None
+    text = rule.strip()
+    if text[:6].upper() == 'RRULE:':
+        text = text[6:]
+    if all_day:
+        # UNTIL must be a DATE when DTSTART is one
+        text = _UNTIL.sub(r'UNTIL=\1', text)
+    return f'RRULE:{text}'
+
+
+def _event(task):
+    rule = None
+    start = task.due_date
+    if task.is_recurring and task.recurrence_rule:
+        rule = _rule_line(task.recurrence_rule, task.due_time is None)
+        start = series_anchor(task) if rule else task.due_date
+    if start is None:
+        return ''
+
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:task-{task.pk}@srtask',
+        f'DTSTAMP:{_utc_stamp(task.updated_at)}',
+        f'LAST-MODIFIED:{_utc_stamp(task.updated_at)}',
+        f'SUMMARY:{_escape(task.title)}',
+    ]
+    if task.description:
+        lines.append(f'DESCRIPTION:{_escape(task.description)}')
+    if task.due_time:
+        lines += [
+            f'DTSTART;TZID={settings.TIME_ZONE}:{datetime.combine(start, task.due_time):%Y%m%dT%H%M%S}',
+            f'DURATION:PT{task.estimated_minutes or DEFAULT_EVENT_MINUTES}M',
+        ]
+    else:
+        lines += [
+            f'DTSTART;VALUE=DATE:{start:%Y%m%d}',
+            f'DTEND;VALUE=DATE:{start + timedelta(days=1):%Y%m%d}',
+        ]
+    if rule:
+        lines.append(rule)
+    lines.append('END:VEVENT')
+    return ''.join(_fold(line) for line in lines)
+
+
+def iter_feed(user):
+    """Yield the user's feed as text chunks of up to EVENTS_PER_WRITE events."""
+    year = timezone.localdate().year
+    yield ''.join(_fold(line) for line in [
+        'BEGIN:VCALENDAR', 'VERSION:2.0', f'PRODID:{PRODID}', 'CALSCALE:GREGORIAN',
+        f'X-WR-CALNAME:{_escape(f"SRTask - {user.username}")}', f'X-WR-TIMEZONE:{settings.TIME_ZONE}',
+        *_vtimezone(settings.TIME_ZONE, year - VTIMEZONE_YEARS, year + VTIMEZONE_YEARS),
+    ])
+    buffer = []
+    for task in feed_tasks(user).iterator(chunk_size=CHUNK_SIZE):
+        buffer.append(_event(task))
+        if len(buffer) == EVENTS_PER_WRITE:
+            yield ''.join(buffer)
+            buffer = []
+    buffer.append(_fold('END:VCALENDAR'))
+    yield ''.join(buffer)
@@ -0,0 +1,143 @@
+"""Live task updates.
+
+Saving or deleting a task, or one of its steps or notes, publishes an
+event naming the task on its owner's channel once the transaction
+commits; set-based writes (bulk actions, recurrence, imports) publish
+one event naming all the tasks they touched. The live_events view streams the channel to every open tab as
+Server-Sent Events, and each task row swaps itself when its event
+arrives, so other tabs follow along without polling or re-fetching
+whole lists.
+
+LIVE_UPDATES_BACKEND selects the fan-out:
+
+- 'redis': Redis pub/sub on LIVE_UPDATES_REDIS_URL, the Celery broker by
+  default, so events reach streams served by any process (default)
+- 'memory': reaches streams in this process only; for tests and a
+  single runserver
+"""
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+from functools import partial
+
+import redis
+import redis.asyncio
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+def _channel(user_id):
+    return f'srtask:live:{user_id}'
+
+
+class RedisBroker:
+    def __init__(self, url):
+        self.url = url
+        self.client = redis.Redis.from_url(url, socket_connect_timeout=1, socket_timeout=1)
+
+    def publish(self, channel, message):
+        try:
+            self.client.publish(channel, message)
+        except redis.RedisError as exc:
+            # Tabs catch up on their next load; the write itself has committed
+            logger.warning('Could not publish live update on %s: %s', channel, exc)
+
+    async def subscribe(self, channel, timeout):
+        client = redis.asyncio.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        try:
+            await pubsub.subscribe(channel)
+            while True:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+                yield message['data'] if message else None
+        finally:
+            await pubsub.aclose()
+            await client.aclose()
+
+
+class MemoryBroker:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queues = defaultdict(set)  # channel -> {(loop, queue)}
+
+    def publish(self, channel, message):
+        with self.lock:
+            subscribers = list(self.queues[channel])
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(queue.put_nowait, message)
+
+    async def subscribe(self, channel, timeout):
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue())
+        with self.lock:
+            self.queues[channel].add(subscriber)
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(subscriber[1].get(), timeout)
+                except TimeoutError:
+                    yield None
+        finally:
+            with self.lock:
+                self.queues[channel].discard(subscriber)
+
+
+_brokers = {}
+
+
+def get_broker():
+    backend = settings.LIVE_UPDATES_BACKEND
+    if backend not in _brokers:
+        if backend == 'redis':
+            _brokers[backend] = RedisBroker(settings.LIVE_UPDATES_REDIS_URL)
+        elif backend == 'memory':
+            _brokers[backend] = MemoryBroker()
+        else:
+            raise ImproperlyConfigured(f'Unknown LIVE_UPDATES_BACKEND {backend!r}')
+    return _brokers[backend]
+
+
+def publish_task_change(user_id, task_id, deleted=False):
+    """Tell user_id's open streams that task_id changed, once the transaction commits."""
+    publish_task_changes(user_id, [task_id], deleted)
+
+
+def publish_task_changes(user_id, task_ids, deleted=False):
+    """publish_task_change() for many tasks, in one message.
+
+    For set-based writes (QuerySet.update(), bulk_create()), which fire no
+    signals.
+    """
+    if not task_ids:
+        return
+    message = json.dumps({'tasks': sorted(task_ids), 'deleted': deleted})
+    transaction.on_commit(partial(get_broker().publish, _channel(user_id), message))
+
+
+def publish_task_changes_by_owner(owners, deleted=False):
+    """publish_task_changes() for a {task_id: user_id} mapping, one message per owner."""
+    by_user = defaultdict(list)
+    for task_id, user_id in owners.items():
+        by_user[user_id].append(task_id)
+    for user_id, task_ids in by_user.items():
+        publish_task_changes(user_id, task_ids, deleted)
+
+
+async def task_changes(user_id):
+    """Yield user_id's task change events as they arrive.
+
+    Yields None whenever LIVE_UPDATES_KEEPALIVE seconds pass quietly, so
+    the stream can prove it's alive.
+    """
+    async for message in get_broker().subscribe(_channel(user_id), settings.LIVE_UPDATES_KEEPALIVE):
+        yield None if message is None else json.loads(message)
+
+
+def sse_event(name, data=''):
+    """Format one Server-Sent Event."""
+    lines = data.splitlines() or ['']
+    return f'event: {name}\n' + ''.join(f'data: {line}\n' for line in lines) + '\n'
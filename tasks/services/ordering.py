@@ -0,0 +1,122 @@
+"""Gap-based manual ordering.
+
+Rows that users can drag keep their sort_order GAP apart, so moving one
+row only rewrites that row: it takes the midpoint between its new
+neighbours. When two neighbours have no room left between them (or tie,
+as every row does before its list is first reordered), the list is
+renumbered in display order with one UPDATE per REBALANCE_CHUNK rows and
+the move then proceeds as usual. Each rebalance restores GAP, so with
+GAP = 1024 it takes about ten moves into the same spot to need another.
+
+A scope is the set of rows ordered together: the tasks of a project (or
+of no project), the steps of a task, the projects of an area, a user's
+areas.
+"""
+from django.db import transaction
+from django.db.models import Case, IntegerField, Max, Min, Subquery, Value, When
+from django.db.models.functions import Coalesce
+
+from tasks.models import Area, Project, Task, TaskStep
+
+GAP = 1024
+REBALANCE_CHUNK = 1000
+
+SCOPES = {
+    Task: ('user_id', 'project_id'),
+    TaskStep: ('task_id',),
+    Project: ('user_id', 'area_id'),
+    Area: ('user_id',),
+}
+
+
+def siblings(instance):
+    """Rows ordered together with instance, instance included."""
+    model = type(instance)
+    return model.objects.filter(**{name: getattr(instance, name) for name in SCOPES[model]})
+
+
+def append_position(queryset):
+    """An expression for a sort_order after every row in queryset.
+
+    Assign it to a new row's sort_order so the maximum is read by the
+    INSERT itself rather than a separate query. Two rows appended at the
+    same moment can still tie; that is harmless, and the next move among
+    them rebalances.
+    """
+    last = queryset.order_by().values(*SCOPES[queryset.model]).annotate(last=Max('sort_order') + GAP).values('last')
+    return Coalesce(Subquery(last), Value(GAP))
+
+
+def save_at_end(instance):
+    """Insert the new instance after every row of its scope."""
+    instance.sort_order = append_position(siblings(instance))
+    instance.save()
+    # The INSERT resolved the expression; read back the number it stored
+    instance.refresh_from_db(fields=['sort_order'])
+
+
+def rebalance(queryset):
+    """Renumber queryset's rows GAP apart in display order; returns {pk: sort_order}."""
+    model = queryset.model
+    pks = list(queryset.order_by(*model._meta.ordering, 'pk').values_list('pk', flat=True))
+    positions = {pk: (index + 1) * GAP for index, pk in enumerate(pks)}
+    for start in range(0, len(pks), REBALANCE_CHUNK):
+        chunk = pks[start:start + REBALANCE_CHUNK]
+        model.objects.filter(pk__in=chunk).update(sort_order=Case(
+            *[When(pk=pk, then=Value(positions[pk])) for pk in chunk], output_field=IntegerField(),
+        ))
+    return positions
+
+
+def _bounds(others, after, before):
+    """(lower, upper) sort_orders around the target slot, None for open ends.
+
+    Returns None when the slot has no free key: the anchor ties with
+    another row, or its neighbour is adjacent.
+    """
+    if after is None and before is None:
+        return others.aggregate(n=Max('sort_order'))['n'], None
+    anchor = after or before
+    if others.filter(sort_order=anchor.sort_order).count() > 1:
+        return None
+    if after is not None:
+        lower = after.sort_order
+        upper = others.filter(sort_order__gt=lower).aggregate(n=Min('sort_order'))['n']
+    else:
+        upper = before.sort_order
+        lower = others.filter(sort_order__lt=upper).aggregate(n=Max('sort_order'))['n']
+    if lower is not None and upper is not None and upper - lower < 2:
+        return None
+    return lower, upper
+
+
+def move(instance, after=None, before=None):
+    """Place instance right after the row after, or right before the row before.
+
+    Both are rows of the same scope, read fresh: the client's new
+    neighbours. With neither, instance moves to the end. Concurrent moves
+    into the same slot can tie; the next move there rebalances. Returns
+    instance's new sort_order.
+    """
+    with transaction.atomic():
+        others = siblings(instance).exclude(pk=instance.pk)
+        bounds = _bounds(others, after, before)
+        if bounds is None:
+            positions = rebalance(others)
+            for anchor in (after, before):
+                if anchor is not None:
+                    anchor.sort_order = positions[anchor.pk]
+            bounds = _bounds(others, after, before)
+
+        lower, upper = bounds
+        if lower is None and upper is None:
+            position = GAP
+        elif lower is None:
+            position = upper - GAP
+        elif upper is None:
+            position = lower + GAP
+        else:
+            position = (lower + upper) // 2
+        instance.sort_order = position
+        instance.save(update_fields=['sort_order', 'updated_at'])
+    return position
@@ -0,0 +1,175 @@
+"""Keyset (cursor) pagination.
+
+Instead of OFFSET, each page continues strictly after the last row of the
+previous one, so fetching page 100 costs the same as fetching page 1 and
+rows inserted mid-scroll never shift the window. Cursors are opaque,
+URL-safe encodings of the last row's ordering values.
+"""
+import base64
+import binascii
+import heapq
+import json
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from itertools import islice
+
+from django.core.exceptions import BadRequest
+from django.db.models import F, Q
+
+PAGE_SIZE = 50
+
+
+@dataclass(frozen=True)
+class OrderKey:
+    """One column of a keyset ordering."""
+    name: str
+    descending: bool = False
+    nullable: bool = False
+
+    @classmethod
+    def parse(cls, spec, nullable=()):
+        """Build from a Meta.ordering-style string such as '-priority'."""
+        name = spec.lstrip('-')
+        return cls(name, descending=spec.startswith('-'), nullable=name in nullable)
+
+    def order_by(self):
+        # NULLs always sort last so the cursor comparison is backend-independent
+        expr = F(self.name)
+        if self.descending:
+            return expr.desc(nulls_last=True) if self.nullable else expr.desc()
+        return expr.asc(nulls_last=True) if self.nullable else expr.asc()
+
+    def after(self, value):
+        """Rows that sort strictly after value in this column."""
+        if value is None:
+            return None  # NULLs are last; nothing follows them
+        q = Q(**{f'{self.name}__{"lt" if self.descending else "gt"}': value})
+        if self.nullable:
+            q |= Q(**{f'{self.name}__isnull': True})
+        return q
+
+    def equal(self, value):
+        if value is None:
+            return Q(**{f'{self.name}__isnull': True})
+        return Q(**{self.name: value})
+
+
+@dataclass
+class KeysetPage:
+    items: list
+    next_cursor: str = ''
+    after: dict = field(default_factory=dict)
+
+    @property
+    def has_next(self):
+        return bool(self.next_cursor)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def _encode(values):
+    def default(value):
+        if isinstance(value, (date, datetime)):
+            return value.isoformat()
+        raise TypeError(f'Cannot encode {type(value).__name__} in a cursor')
+
+    raw = json.dumps(values, default=default, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _decode(cursor, keys):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, ValueError):
+        raise BadRequest('Invalid cursor')
+    if not isinstance(values, list) or len(values) != len(keys):
+        raise BadRequest('Invalid cursor')
+    return values
+
+
+def _keyset(queryset, ordering, cursor, page_size, nullable):
+    keys = [OrderKey.parse(spec, nullable) for spec in ordering]
+    queryset = queryset.order_by(*[key.order_by() for key in keys])
+
+    after = {}
+    if cursor:
+        values = _decode(cursor, keys)
+        after = {key.name: value for key, value in zip(keys, values)}
+        # (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ... expanded per column,
+        # since mixed directions and NULLs rule out a row-value comparison
+        condition = Q(pk__in=[])
+        prefix = Q()
+        for key, value in zip(keys, values):
+            step = key.after(value)
+            if step is not None:
+                condition |= prefix & step
+            prefix &= key.equal(value)
+        queryset = queryset.filter(condition)
+    return queryset[:page_size + 1], keys, after
+
+
+def _page(rows, keys, after, page_size):
+    next_cursor = ''
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = _encode([getattr(rows[-1], key.name) for key in keys])
+    return KeysetPage(rows, next_cursor, after)
+
+
+def keyset_paginate(queryset, ordering, cursor='', page_size=PAGE_SIZE, nullable=()):
+    """Return the page of queryset that follows cursor.
+
+    ordering is a sequence of Meta.ordering-style field names that, together,
+    must be unique per row (end it with 'id'). Fields listed in nullable may
+    hold NULL and are ordered NULLS LAST.
+    """
+    queryset, keys, after = _keyset(queryset, ordering, cursor, page_size, nullable)
+    return _page(list(queryset), keys, after, page_size)
+
+
+async def akeyset_paginate(queryset, ordering, cursor='', page_size=PAGE_SIZE, nullable=()):
+    """keyset_paginate() for async views."""
+    queryset, keys, after = _keyset(queryset, ordering, cursor, page_size, nullable)
+    return _page([row async for row in queryset.aiterator()], keys, after, page_size)
+
+
+def merge_page(page, extra, ordering, page_size=PAGE_SIZE):
+    """Merge a sorted stream of non-database rows into a keyset page.
+
+    extra must yield rows positioned after page.after, sorted by the same
+    ascending ordering, with attributes named like its fields. Only as many
+    rows are pulled from it as the merged page needs. The returned cursor
+    is valid for both sources.
+    """
+    names = [spec.lstrip('-') for spec in ordering]
+
+    def key(row):
+        return tuple(getattr(row, name) for name in names)
+
+    rows = list(islice(heapq.merge(page.items, extra, key=key), page_size + 1))
+    next_cursor = ''
+    if len(rows) > page_size or page.has_next:
+        rows = rows[:page_size]
+        next_cursor = _encode(list(key(rows[-1])))
+    return KeysetPage(rows, next_cursor, page.after)
+
+
+def paginate_tasks(queryset, request, ordering=None):
+    """Keyset-paginate a task list on ?cursor=, defaulting to Task.Meta.ordering."""
+    return keyset_paginate(queryset, *_task_ordering(queryset, request, ordering), nullable=('due_date',))
+
+
+async def apaginate_tasks(queryset, request, ordering=None):
+    """paginate_tasks() for async views."""
+    return await akeyset_paginate(queryset, *_task_ordering(queryset, request, ordering), nullable=('due_date',))
+
+
+def _task_ordering(queryset, request, ordering):
+    if ordering is None:
+        ordering = [*queryset.model._meta.ordering, 'id']
+    return ordering, request.GET.get('cursor', '')
@@ -0,0 +1,177 @@
+"""Monthly range partitioning of the ActivityLog table (PostgreSQL only).
+
+Partitions are named ``<table>_pYYYYMM`` and cover one calendar month of
+``created_at``. A DEFAULT partition catches rows outside the prepared
+range. Retention then drops whole expired partitions instead of deleting
+rows one batch at a time. History lookups use the per-partition
+(task_id, created_at) indexes and skip months outside the queried range.
+"""
+import re
+from dataclasses import dataclass
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import connection, transaction
+
+from tasks.models import ActivityLog
+
+TABLE = ActivityLog._meta.db_table
+PARTITION_NAME = re.compile(rf'^{TABLE}_p(\d{{4}})(\d{{2}})$')
+
+
+@dataclass(frozen=True)
+class Partition:
+    name: str
+    lower: datetime
+    upper: datetime
+
+
+def month_start(year, month):
+    year, month = year + (month - 1) // 12, (month - 1) % 12 + 1
+    return datetime(year, month, 1, tzinfo=dt_timezone.utc)
+
+
+def _partition(year, month):
+    return Partition(f'{TABLE}_p{year:04d}{month:02d}', month_start(year, month), month_start(year, month + 1))
+
+
+def monthly_partitions(start, end):
+    """The monthly partitions covering [start, end), oldest first."""
+    partitions = []
+    year, month = start.year, start.month
+    while month_start(year, month) < end:
+        partitions.append(_partition(year, month))
+        year, month = year + month // 12, month % 12 + 1
+    return partitions
+
+
+def is_partitioned():
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass', [TABLE])
+        return cursor.fetchone() is not None
+
+
+def activity_log_partitions():
+    """Monthly partitions of the ActivityLog table, oldest first."""
+    if not is_partitioned():
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+            'WHERE i.inhparent = %s::regclass',
+            [TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    partitions = []
+    for name in names:
+        match = PARTITION_NAME.match(name)
+        if match:
+            partitions.append(_partition(int(match[1]), int(match[2])))
+    return sorted(partitions, key=lambda p: p.lower)
+
+
+def ensure_partitions(start, end, table=TABLE):
+    """Create monthly partitions covering [start, end) plus the DEFAULT partition."""
+    qn = connection.ops.quote_name
+    created = []
+    with connection.cursor() as cursor:
+        cursor.execute(f'CREATE TABLE IF NOT EXISTS {qn(table + "_default")} PARTITION OF {qn(table)} DEFAULT')
+        for partition in monthly_partitions(start, end):
+            name = partition.name.replace(TABLE, table, 1)
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {qn(name)} PARTITION OF {qn(table)} '
+                'FOR VALUES FROM (%s) TO (%s)',
+                [partition.lower, partition.upper],
+            )
+            created.append(name)
+    return created
+
+
+def drop_partition(partition):
+    """Drop a partition outright; returns the planner's row estimate for it."""
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE relname = %s', [partition.name])
+        row = cursor.fetchone()
+        cursor.execute(f'DROP TABLE IF EXISTS {qn(partition.name)}')
+    return max(row[0], 0) if row else 0
+
+
+def convert_to_partitioned(batch_size, end, log=print):
+    """Rebuild the ActivityLog table as a monthly range-partitioned table.
+
+    Rows are copied in id-range batches while the old table stays live; the
+    final catch-up and table swap run under a brief write lock. The old table
+    is kept as <table>_legacy so it can be verified and dropped by hand; its
+    foreign keys are dropped, so deleting tasks never touches it.
+
+    Setup is idempotent and the copy resumes after the highest id already
+    copied, so a run that failed part way can simply be repeated. Deleting
+    a task meanwhile cascades to its copied rows.
+    """
+    qn = connection.ops.quote_name
+    new, legacy, seq = f'{TABLE}_partitioned', f'{TABLE}_legacy', f'{TABLE}_part_id_seq'
+    indexes = {
+        'activity_task_created_idx': '(task_id, created_at DESC)',
+        'activity_created_idx': '(created_at)',
+    }
+    columns = 'id, created_at, updated_at, action, detail, metadata, task_id'
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT min(created_at), max(id) FROM {qn(TABLE)}')
+        oldest, max_id = cursor.fetchone()
+        cursor.execute(f'CREATE SEQUENCE IF NOT EXISTS {qn(seq)}')
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {qn(new)} (
+                id bigint NOT NULL DEFAULT nextval('{seq}'),
+                created_at timestamp with time zone NOT NULL,
+                updated_at timestamp with time zone NOT NULL,
+                action varchar(50) NOT NULL,
+                detail text NOT NULL,
+                metadata jsonb NOT NULL,
+                task_id bigint NOT NULL REFERENCES tasks_task (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED,
+                PRIMARY KEY (id, created_at)
+            ) PARTITION BY RANGE (created_at)
+        """)
+        for name, definition in indexes.items():
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS {qn(name + "_new")} ON {qn(new)} {definition}')
+        # Each batch commits on its own, so everything up to the highest id copied is there
+        cursor.execute(f'SELECT COALESCE(max(id), 0) FROM {qn(new)}')
+        copied = cursor.fetchone()[0]
+    partitions = ensure_partitions(oldest or end, end, table=new)
+
+    if max_id:
+        with connection.cursor() as cursor:
+            while copied < max_id:
+                cursor.execute(
+                    f'INSERT INTO {qn(new)} ({columns}) SELECT {columns} FROM {qn(TABLE)} '
+                    'WHERE id > %s AND id <= %s',
+                    [copied, copied + batch_size],
+                )
+                copied += batch_size
+                log(f'  copied ids up to {min(copied, max_id)} of {max_id}')
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {qn(TABLE)} IN EXCLUSIVE MODE')
+        # The last batch may have copied some rows written since max_id was read
+        cursor.execute(
+            f'INSERT INTO {qn(new)} ({columns}) SELECT {columns} FROM {qn(TABLE)} WHERE id > %s '
+            'ON CONFLICT DO NOTHING',
+            [max_id or 0],
+        )
+        cursor.execute(f"SELECT setval('{seq}', COALESCE((SELECT max(id) FROM {qn(new)}), 0) + 1, false)")
+        cursor.execute(f'ALTER TABLE {qn(TABLE)} RENAME TO {qn(legacy)}')
+        cursor.execute(
+            "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'", [legacy],
+        )
+        for (constraint,) in cursor.fetchall():
+            cursor.execute(f'ALTER TABLE {qn(legacy)} DROP CONSTRAINT {qn(constraint)}')
+        for name in indexes:
+            cursor.execute(f'ALTER INDEX {qn(name)} RENAME TO {qn(name + "_legacy")}')
+            cursor.execute(f'ALTER INDEX {qn(name + "_new")} RENAME TO {qn(name)}')
+        cursor.execute(f'ALTER TABLE {qn(new)} RENAME TO {qn(TABLE)}')
+        cursor.execute(f'ALTER SEQUENCE {qn(seq)} OWNED BY {qn(TABLE)}.id')
+        for partition in partitions:
+            cursor.execute(
+                f'ALTER TABLE {qn(partition)} RENAME TO {qn(partition.replace(new, TABLE, 1))}'
+            )
+        cursor.execute(f'ALTER TABLE {qn(new + "_default")} RENAME TO {qn(TABLE + "_default")}')
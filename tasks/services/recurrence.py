@@ -0,0 +1,281 @@
+"""Recurring tasks.
+
+A series is a task with ``is_recurring`` set and an iCalendar RRULE in
+``recurrence_rule``; it is also the series' first occurrence. Later
+occurrences are plain tasks copied from it with a new due date and
+``recurrence_parent`` pointing back at it. The (recurrence_parent,
+due_date) unique constraint makes creating an occurrence idempotent, so
+completion spawning and the materializer can overlap or be re-run safely.
+
+Rules are anchored on the series' due date (else start date, else creation
+date) and evaluated on whole days. A cancelled series stops producing
+occurrences.
+
+With RECURRENCE_VIRTUAL_UPCOMING set, future occurrences are not stored
+ahead of time; Upcoming merges generated VirtualOccurrence rows instead,
+and only the occurrence spawned on completion is written.
+"""
+import heapq
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+
+from dateutil.rrule import rrule, rrulestr
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+
+from tasks.models import Task
+from tasks.services.live import publish_task_changes_by_owner
+from tasks.services.stamps import touch_workspace
+
+# Fields an occurrence inherits from its series
+COPIED_FIELDS = [
+    'user_id', 'project_id', 'title', 'description', 'priority', 'due_time',
+    'estimated_minutes', 'sync_to_google_calendar', 'sort_order',
+]
+SERIES_FIELDS = [
+    'user', 'project', 'title', 'description', 'priority', 'due_time', 'estimated_minutes',
+    'sync_to_google_calendar', 'sort_order', 'status', 'recurrence_rule', 'due_date',
+    'start_date', 'created_at',
+]
+
+_UTC_UNTIL = re.compile(r'(UNTIL=\d{8}(?:T\d{6})?)Z', re.IGNORECASE)
+
+
+@lru_cache(maxsize=1024)
+def parse_rule(rule):
+    """Compile an RRULE string, with or without its 'RRULE:' prefix.
+
+    Raises ValueError for anything that is not a single valid rule.
+    """
+    text = rule.strip()
+    if text[:6].upper() == 'RRULE:':
+        text = text[6:]
+    # Occurrences are naive dates, so a UTC UNTIL is compared as a naive one too
+    text = _UTC_UNTIL.sub(r'\1', text)
+    try:
+        compiled = rrulestr(text, dtstart=datetime(2000, 1, 1))
+    except (ValueError, KeyError, TypeError) as exc:
+        raise ValueError(f'Invalid recurrence rule: {rule!r}') from exc
+    if not isinstance(compiled, rrule):
+        raise ValueError(f'Invalid recurrence rule: {rule!r}')
+    return compiled
+
+
+@lru_cache(maxsize=16384)
+def _anchored(rule, anchor):
+    # Re-anchoring a parsed rule skips the string parsing for every series sharing it
+    return parse_rule(rule).replace(dtstart=datetime.combine(anchor, time.min))
+
+
+def series_anchor(task):
+    return task.due_date or task.start_date or timezone.localdate(task.created_at)
+
+
+@lru_cache(maxsize=65536)
+def occurrence_dates(rule, anchor, after, until):
+    """Distinct dates on which rule fires in (after, until].
+
+    Cached: in a materializer run most series share a rule, an anchor date
+    and the same window, and expanding a rule walks it from its anchor.
+    """
+    dates = _anchored(rule, anchor).between(
+        datetime.combine(after + timedelta(days=1), time.min), datetime.combine(until, time.max), inc=True,
+    )
+    return tuple(dict.fromkeys(d.date() for d in dates))
+
+
+def next_occurrence(rule, anchor, after):
+    """First date after the given one on which rule fires, or None once it has ended."""
+    found = _anchored(rule, anchor).after(datetime.combine(after, time.max))
+    return found.date() if found else None
+
+
+def _series():
+    return (
+        Task.objects.filter(is_recurring=True).exclude(recurrence_rule='')
+        .exclude(status=Task.Status.CANCELLED).only(*SERIES_FIELDS)
+    )
+
+
+def _latest_occurrences(series_ids):
+    return dict(
+        Task.objects.filter(recurrence_parent_id__in=series_ids)
+        .values('recurrence_parent_id').annotate(last=Max('due_date'))
+        .values_list('recurrence_parent_id', 'last')
+    )
+
+
+def _create_occurrences(plans):
+    """Insert (series, due_date) occurrences and copy the series' tags onto them."""
+    if not plans:
+        return 0
+    Task.objects.bulk_create(
+        [
+            Task(recurrence_parent_id=series.pk, due_date=due_date,
+                 **{name: getattr(series, name) for name in COPIED_FIELDS})
+            for series, due_date in plans
+        ],
+        batch_size=1000, ignore_conflicts=True,
+    )
+    touch_workspace(*{series.user_id for series, _ in plans})
+
+    # bulk_create() sends no post_save and, ignoring conflicts, returns no
+    # pks; look the occurrences up for the live update and the tag copy
+    wanted = {(series.pk, due_date): series.user_id for series, due_date in plans}
+    created = [
+        (pk, parent_id, due_date)
+        for pk, parent_id, due_date in Task.objects.filter(
+            recurrence_parent_id__in={series.pk for series, _ in plans},
+            due_date__in={due_date for _, due_date in plans},
+        ).order_by().values_list('pk', 'recurrence_parent_id', 'due_date')
+        if (parent_id, due_date) in wanted
+    ]
+    publish_task_changes_by_owner({pk: wanted[parent_id, due_date] for pk, parent_id, due_date in created})
+
+    through = Task.tags.through
+    series_tags = defaultdict(list)
+    for task_id, tag_id in through.objects.filter(task_id__in={s.pk for s, _ in plans}).values_list('task_id', 'tag_id'):
+        series_tags[task_id].append(tag_id)
+    if series_tags:
+        through.objects.bulk_create(
+            [
+                through(task_id=pk, tag_id=tag_id)
+                for pk, parent_id, _ in created
+                for tag_id in series_tags[parent_id]
+            ],
+            batch_size=1000, ignore_conflicts=True,
+        )
+    return len(plans)
+
+
+def spawn_next_occurrences(tasks):
+    """After tasks were completed, give each affected series its next occurrence.
+
+    A series that still has an open occurrence is left alone. Returns the
+    number of occurrences created.
+    """
+    completed_due = {}
+    for task in tasks:
+        if task.is_recurring or task.recurrence_parent_id:
+            series_id = task.recurrence_parent_id or task.pk
+            completed_due[series_id] = max(filter(None, (completed_due.get(series_id), task.due_date)), default=None)
+    if not completed_due:
+        return 0
+
+    series = {s.pk: s for s in _series().filter(pk__in=completed_due)}
+    pending = set(
+        Task.objects.open().filter(recurrence_parent_id__in=series)
+        .order_by().values_list('recurrence_parent_id', flat=True).distinct()
+    )
+    latest = _latest_occurrences(series)
+    yesterday = timezone.localdate() - timedelta(days=1)
+
+    plans = []
+    for pk, s in series.items():
+        if pk in pending or s.status in (Task.Status.TODO, Task.Status.IN_PROGRESS):
+            continue
+        after = max(filter(None, (latest.get(pk), s.due_date, completed_due[pk], yesterday)))
+        try:
+            due_date = next_occurrence(s.recurrence_rule, series_anchor(s), after)
+        except ValueError:
+            continue
+        if due_date:
+            plans.append((s, due_date))
+    return _create_occurrences(plans)
+
+
+def materialize_occurrences(horizon_days=None, batch_size=2000, today=None, log=None):
+    """Create every series' occurrences due between today and the horizon.
+
+    Walks the series in primary-key batches with a fixed number of queries
+    per batch. Missed past occurrences are not back-filled, and dates up to
+    a series' latest existing occurrence are skipped, so deleted
+    occurrences stay deleted. Returns (occurrences created, invalid rules).
+    """
+    if horizon_days is None:
+        horizon_days = settings.RECURRENCE_HORIZON_DAYS
+    today = today or timezone.localdate()
+    until = today + timedelta(days=horizon_days)
+    created = invalid = 0
+    last_pk = 0
+    while True:
+        batch = list(_series().filter(pk__gt=last_pk).order_by('pk')[:batch_size])
+        if not batch:
+            break
+        last_pk = batch[-1].pk
+        latest = _latest_occurrences([s.pk for s in batch])
+
+        plans = []
+        for s in batch:
+            after = max(filter(None, (latest.get(s.pk), s.due_date, today - timedelta(days=1))))
+            try:
+                dates = occurrence_dates(s.recurrence_rule, series_anchor(s), after, until)
+            except ValueError:
+                invalid += 1
+                continue
+            plans += [(s, due_date) for due_date in dates]
+        created += _create_occurrences(plans)
+        if log:
+            log(f'  {created} occurrences created (through series {last_pk})...')
+    return created, invalid
+
+
+@dataclass(frozen=True)
+class VirtualOccurrence:
+    """An occurrence of series on due_date that is displayed but not stored.
+
+    Other attributes (title, project, sort_order, id...) read through to
+    the series, so it sorts and groups like a task in list views.
+    """
+    series: Task
+    due_date: date
+    is_virtual = True
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.series, name)
+
+
+def _virtual_stream(rule, series, after, until):
+    last = None
+    for moment in rule.xafter(datetime.combine(after, time.max)):
+        day = moment.date()
+        if day > until:
+            return
+        if day != last:
+            last = day
+            yield VirtualOccurrence(series, day)
+
+
+def iter_virtual_occurrences(user, start, until, after=None):
+    """Lazily yield the user's unstored occurrences due in [start, until].
+
+    Rows come in Upcoming order (due_date, sort_order, id), merged across
+    series as they are consumed. A series only contributes dates past its
+    own due date and its latest stored occurrence, so nothing appears
+    twice. after is an Upcoming position as a (due_date, sort_order, id)
+    tuple; rows at or before it are skipped.
+    """
+    series = list(_series().filter(user=user).select_related('project').prefetch_related('tags'))
+    latest = _latest_occurrences([s.pk for s in series])
+    first = start - timedelta(days=1)
+    if after:
+        first = max(first, after[0] - timedelta(days=1))
+
+    streams = []
+    for s in series:
+        try:
+            rule = _anchored(s.recurrence_rule, series_anchor(s))
+        except ValueError:
+            continue
+        streams.append(_virtual_stream(rule, s, max(filter(None, (latest.get(s.pk), s.due_date, first))), until))
+
+    for occurrence in heapq.merge(*streams, key=lambda o: (o.due_date, o.sort_order, o.id)):
+        if after and (occurrence.due_date, occurrence.sort_order, occurrence.id) <= after:
+            continue
+        yield occurrence
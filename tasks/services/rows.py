@@ -0,0 +1,90 @@
+"""Cached task row HTML.
+
+partials/task_item.html is rendered for every row of every task list and
+every HTMX toggle. attach_rows() renders it once per version of a task
+and keeps the HTML in the cache, so a list page is one get_many plus
+renders of whatever changed. Tags are only loaded for those misses.
+
+A row's key holds the task's updated_at, which every write to a task
+bumps (bulk actions and step counters included), and today's date, since
+rows show whether a task is overdue. Project and tag edits change how
+rows naming them look without touching the tasks, so they bump the
+user's ROW_CACHE_SCOPE version instead.
+"""
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db.models import aprefetch_related_objects, prefetch_related_objects
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.safestring import mark_safe
+
+from tasks.services.cache import auser_cache_key, user_cache_key
+
+ROW_CACHE_SCOPE = 'task_rows'
+ROW_TIMEOUT = 60 * 60 * 24
+ROW_TEMPLATE = 'partials/task_item.html'
+ROW_REVISION = 2  # bump when ROW_TEMPLATE changes, so rows cached before a deploy aren't served
+
+
+def _rows(tasks):
+    return [task for task in tasks if not getattr(task, 'is_virtual', False)]
+
+
+def _keys(rows, prefixes):
+    today = timezone.localdate().isoformat()
+    return [
+        f'{prefixes[task.user_id]}:{ROW_REVISION}:{task.pk}:{int(task.updated_at.timestamp() * 1_000_000)}:{today}'
+        for task in rows
+    ]
+
+
+def _render(rows, keys, cached):
+    return {key: render_to_string(ROW_TEMPLATE, {'task': task}) for task, key in zip(rows, keys) if key not in cached}
+
+
+def _attach(rows, keys, cached):
+    for task, key in zip(rows, keys):
+        task.row_html = mark_safe(cached[key])
+
+
+def attach_rows(tasks):
+    """Set row_html on each task in tasks, rendering only uncached rows.
+
+    Virtual occurrences mixed into a list are left alone. Returns the
+    tasks as a list.
+    """
+    tasks = list(tasks)
+    rows = _rows(tasks)
+    if not rows:
+        return tasks
+    prefixes = {user_id: user_cache_key(user_id, ROW_CACHE_SCOPE) for user_id in {task.user_id for task in rows}}
+    keys = _keys(rows, prefixes)
+    cached = cache.get_many(keys)
+
+    prefetch_related_objects([task for task, key in zip(rows, keys) if key not in cached], 'tags')
+    rendered = _render(rows, keys, cached)
+    if rendered:
+        cache.set_many(rendered, ROW_TIMEOUT)
+        cached.update(rendered)
+    _attach(rows, keys, cached)
+    return tasks
+
+
+async def aattach_rows(tasks):
+    """attach_rows() for async views; tasks must already be loaded."""
+    tasks = list(tasks)
+    rows = _rows(tasks)
+    if not rows:
+        return tasks
+    prefixes = {user_id: await auser_cache_key(user_id, ROW_CACHE_SCOPE) for user_id in {task.user_id for task in rows}}
+    keys = _keys(rows, prefixes)
+    cached = await cache.aget_many(keys)
+
+    misses = [task for task, key in zip(rows, keys) if key not in cached]
+    if misses:
+        await aprefetch_related_objects(misses, 'tags')
+        rendered = await sync_to_async(_render)(rows, keys, cached)
+        await cache.aset_many(rendered, ROW_TIMEOUT)
+        cached.update(rendered)
+    _attach(rows, keys, cached)
+    return tasks
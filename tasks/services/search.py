@@ -0,0 +1,157 @@
+"""Full-text task search.
+
+Covers task titles and descriptions plus step titles and note bodies,
+weighted in that order. PostgreSQL stores a ``tsvector`` in
+``tasks_task.search_vector`` behind a GIN index; SQLite keeps an FTS5 table,
+``tasks_task_fts``, whose rowid is the task id and whose ``owner`` column
+holds a ``u<user id>`` token, so per-user matching intersects posting lists
+instead of ranking every user's matches. Triggers from migration 0005
+refresh both as rows change, so ORM ``update()`` and bulk writes stay
+indexed; ``rebuild_search_index`` backfills existing rows. Other databases
+fall back to unindexed ``icontains`` matching.
+
+Note bodies are indexed without their HTML tags, so "div" or "strong"
+don't match every note. PostgreSQL strips them with ``regexp_replace()``;
+SQLite has no regular expressions, so it indexes ``TaskNote.content_text``,
+the plain text that ``TaskNote.save()`` derives.
+
+Queries are split into words and every word must match; the last one is
+matched as a prefix so results keep up while the user types.
+"""
+import re
+from dataclasses import dataclass
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from tasks.models import Task
+
+PAGE_SIZE = 50
+TABLE = Task._meta.db_table
+FTS_TABLE = f'{TABLE}_fts'
+# bm25 column weights for owner, title, description, steps, notes
+FTS_WEIGHTS = '0.0, 10.0, 4.0, 2.0, 1.0'
+
+_WORD = re.compile(r'\w+')
+
+
+@dataclass
+class SearchResults:
+    tasks: list
+    page: int = 1
+    has_next: bool = False
+
+    def __iter__(self):
+        return iter(self.tasks)
+
+    def __len__(self):
+        return len(self.tasks)
+
+    @property
+    def next_page(self):
+        return self.page + 1
+
+
+def _words(text):
+    return _WORD.findall(text.lower())
+
+
+def _match_expression(words, user=None):
+    """Backend query string for words, or None when the backend has no index."""
+    if connection.vendor == 'postgresql':
+        return ' & '.join(words) + ':*'
+    if connection.vendor == 'sqlite':
+        words = ' '.join(f'{{title description steps notes}} : "{word}"' for word in words) + '*'
+        return f'owner : "u{user.pk}" AND {words}' if user is not None else words
+    return None
+
+
+def _matching_ids_sql(match):
+    if connection.vendor == 'postgresql':
+        return f"SELECT id FROM {TABLE} WHERE search_vector @@ to_tsquery('english', %s)", [match]
+    return f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match]
+
+
+def filter_matching(queryset, text):
+    """Restrict a Task queryset to rows matching text, without ranking."""
+    words = _words(text)
+    if not words:
+        return queryset.none()
+    match = _match_expression(words)
+    if match is None:
+        for word in words:
+            queryset = queryset.filter(Q(title__icontains=word) | Q(description__icontains=word))
+        return queryset
+    sql, params = _matching_ids_sql(match)
+    return queryset.filter(pk__in=RawSQL(sql, params))
+
+
+def search_task_ids(user, text, offset=0, limit=PAGE_SIZE):
+    """Ids of the user's tasks matching text, best match first."""
+    words = _words(text)
+    if not words:
+        return []
+    match = _match_expression(words, user)
+    if match is None:
+        queryset = filter_matching(Task.objects.filter(user=user), text).order_by('-updated_at', '-id')
+        return list(queryset.values_list('pk', flat=True)[offset:offset + limit])
+
+    if connection.vendor == 'postgresql':
+        sql = (
+            f"SELECT t.id FROM {TABLE} t, to_tsquery('english', %s) q "
+            'WHERE t.user_id = %s AND t.search_vector @@ q '
+            'ORDER BY ts_rank(t.search_vector, q) DESC, t.id DESC LIMIT %s OFFSET %s'
+        )
+        params = [match, user.pk, limit, offset]
+    else:
+        # The owner token in match already limits this to the user's tasks
+        sql = (
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+            f'ORDER BY bm25({FTS_TABLE}, {FTS_WEIGHTS}), rowid DESC LIMIT %s OFFSET %s'
+        )
+        params = [match, limit, offset]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search_tasks(user, text, page=1, page_size=PAGE_SIZE, queryset=None):
+    """One page of ranked results, loaded from queryset (the task list's by default)."""
+    ids = search_task_ids(user, text, offset=(page - 1) * page_size, limit=page_size + 1)
+    has_next = len(ids) > page_size
+    ids = ids[:page_size]
+    if queryset is None:
+        queryset = Task.objects.for_list()
+    by_id = queryset.filter(pk__in=ids).in_bulk()
+    return SearchResults([by_id[pk] for pk in ids if pk in by_id], page=page, has_next=has_next)
+
+
+def rebuild_index(batch_size=5000, log=None):
+    """Re-index every task in id-range batches; returns the number of tasks covered."""
+    if connection.vendor not in ('postgresql', 'sqlite'):
+        return 0
+    last_id = Task.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+    done = 0
+    for start in range(0, last_id, batch_size):
+        with transaction.atomic(), connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(
+                    f'UPDATE {TABLE} SET search_vector = tasks_task_search_vector(id, title, description) '
+                    'WHERE id > %s AND id <= %s',
+                    [start, start + batch_size],
+                )
+            else:
+                cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid > %s AND rowid <= %s', [start, start + batch_size])
+                cursor.execute(
+                    f'INSERT INTO {FTS_TABLE} (rowid, owner, title, description, steps, notes) '
+                    "SELECT t.id, 'u' || t.user_id, t.title, t.description, "
+                    "coalesce((SELECT group_concat(s.title, ' ') FROM tasks_taskstep s WHERE s.task_id = t.id), ''), "
+                    "coalesce((SELECT group_concat(n.content_text, ' ') FROM tasks_tasknote n WHERE n.task_id = t.id), '') "
+                    f'FROM {TABLE} t WHERE t.id > %s AND t.id <= %s',
+                    [start, start + batch_size],
+                )
+            done += cursor.rowcount
+        if log:
+            log(f'  {done} tasks indexed...')
+    return done
@@ -0,0 +1,152 @@
+"""Per-user workspace versions for conditional GETs.
+
+Every write to a user's tasks, steps, projects, areas, tags or saved
+filters moves their WorkspaceStamp forward. The list views turn the
+stamp into an ETag, so a re-visit or HTMX poll with nothing changed is
+answered 304 without touching the task tables or rendering anything.
+
+The stamp lives in the cache; the WorkspaceStamp row is the fallback
+when the cache has lost it, so an eviction does not cost every client a
+full page. A write bumps the row inside its transaction, once per user
+however many rows it touches, and publishes the new version to the cache
+when the transaction commits.
+"""
+import hashlib
+import time
+import weakref
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+
+from tasks.models import WorkspaceStamp
+from tasks.routers import stick_to_primary
+from tasks.shortcuts import auser
+
+
+def _key(user_id):
+    return f'srtask:workspace:{user_id}'
+
+
+def _publish(user_ids, version):
+    cache.set_many({_key(user_id): version for user_id in user_ids}, None)
+    # Replicas may not have the change yet; new ETags must not be paired with old pages
+    stick_to_primary(*user_ids)
+
+
+class _PublishOnCommit:
+    """The on_commit callback of one touch_workspace() call."""
+
+    def __init__(self, pending, user_ids, version):
+        self.pending = pending
+        self.user_ids = user_ids
+        self.version = version
+
+    def __call__(self):
+        self.pending.discard(self)
+        _publish(self.user_ids, self.version)
+
+
+# connection -> its callbacks that haven't run yet. Held weakly: a rollback,
+# of the transaction or of the savepoint that registered one, makes Django
+# drop the callback, and with it the entry.
+_pending = weakref.WeakKeyDictionary()
+
+
+def touch_workspace(*user_ids):
+    """Move the workspace versions of user_ids forward."""
+    connection = transaction.get_connection()
+    # Once per transaction is enough
+    pending = _pending.setdefault(connection, weakref.WeakSet())
+    user_ids = {user_id for user_id in user_ids if user_id is not None}.difference(
+        *(callback.user_ids for callback in list(pending))
+    )
+    if not user_ids:
+        return
+    version = time.time_ns()
+    updated = WorkspaceStamp.objects.filter(user_id__in=user_ids).update(
+        version=Greatest(F('version') + 1, Value(version)),
+    )
+    if updated < len(user_ids):
+        WorkspaceStamp.objects.bulk_create(
+            [WorkspaceStamp(user_id=user_id, version=version) for user_id in user_ids], ignore_conflicts=True,
+        )
+    callback = _PublishOnCommit(pending, user_ids, version)
+    transaction.on_commit(callback)
+    # Outside a transaction on_commit() has already run it
+    if connection.in_atomic_block:
+        pending.add(callback)
+
+
+def workspace_version(user_id):
+    """The current version of user_id's workspace."""
+    version = cache.get(_key(user_id))
+    if version is None:
+        # From the primary even in a replica request: a lagging version cached
+        # with no timeout would keep answering 304 after the replica catches up
+        stamp, _ = WorkspaceStamp.objects.using(DEFAULT_DB_ALIAS).get_or_create(
+            user_id=user_id, defaults={'version': time.time_ns()},
+        )
+        version = stamp.version
+        # add, not set: a write committing meanwhile has published a newer one
+        cache.add(_key(user_id), version, None)
+    return version
+
+
+def workspace_etag(request, *args, **kwargs):
+    """A weak ETag for a task list page, or None when it must not be answered 304.
+
+    Besides the workspace version it covers what else changes the page:
+    the URL, full page or HTMX partial, the date (overdue rows, My Day)
+    and the CSRF secret the page's forms were rendered with.
+    """
+    if not request.user.is_authenticated or len(get_messages(request)):
+        return None
+    parts = [
+        request.user.pk,
+        request.get_full_path(),
+        request.headers.get('HX-Request', ''),
+        timezone.localdate().isoformat(),
+        request.META.get('CSRF_COOKIE', ''),
+    ]
+    digest = hashlib.sha256('|'.join(str(part) for part in parts).encode()).hexdigest()[:16]
+    return f'W/"{workspace_version(request.user.pk):x}-{digest}"'
+
+
+def _precondition(request, etag):
+    return get_conditional_response(request, etag=etag) if etag else None
+
+
+def _finish(request, response, etag):
+    if etag and request.method in ('GET', 'HEAD'):
+        response.headers.setdefault('ETag', etag)
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ['HX-Request'])
+    return response
+
+
+def conditional_on_workspace(view):
+    """Serve view with a workspace ETag and answer unchanged re-fetches with 304.
+
+    Works like Django's condition(), except that for an async view the
+    ETag, which may need the session and the database, is computed on a
+    worker thread.
+    """
+    if iscoroutinefunction(view):
+        async def wrapper(request, *args, **kwargs):
+            await auser(request)
+            etag = await sync_to_async(workspace_etag)(request)
+            response = _precondition(request, etag) or await view(request, *args, **kwargs)
+            return _finish(request, response, etag)
+    else:
+        def wrapper(request, *args, **kwargs):
+            etag = workspace_etag(request)
+            response = _precondition(request, etag) or view(request, *args, **kwargs)
+            return _finish(request, response, etag)
+    return wraps(view)(wrapper)
@@ -0,0 +1,27 @@
+"""Maintenance of the denormalized Task.steps_total/steps_done counters.
+
+Callers run these inside the transaction that writes the TaskStep row so
+the counters can never commit out of step with the steps themselves.
+"""
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from tasks.models import Task
+
+
+def _delta(field, amount):
+    if amount >= 0:
+        return F(field) + amount
+    # Clamp at zero so a drifted counter can't violate the unsigned column
+    return Greatest(F(field) + amount, 0)
+
+
+def adjust_step_counters(task_id, total=0, done=0):
+    """Shift a task's step counters by the given deltas in one UPDATE."""
+    updates = {'updated_at': timezone.now()}
+    if total:
+        updates['steps_total'] = _delta('steps_total', total)
+    if done:
+        updates['steps_done'] = _delta('steps_done', done)
+    Task.objects.filter(pk=task_id).update(**updates)
@@ -0,0 +1,269 @@
+"""Streaming export and import of a user's whole workspace.
+
+Exports are NDJSON: a header line, then one object per row carrying its
+``type`` and its exported ``id``, in dependency order (areas, projects,
+tags, tasks, task tags, steps, notes, activity). Rows are read with
+``iterator()``, so an export of any size holds one chunk in memory. CSV
+export covers one type at a time, for spreadsheets.
+
+Imports read NDJSON line by line and insert with batched ``bulk_create``,
+mapping exported ids to new ones in memory. Only areas, projects, tags
+and tasks are kept in those maps, since nothing refers to the other
+types; past them memory is bounded by the batch size. Areas and tags
+whose name the user already has are merged into the existing ones. Rows
+keep their exported created_at, but updated_at is the time of the import,
+so change tracking (calendar sync, feed ETags) sees them as new.
+"""
+import csv
+import json
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import cached_property
+from datetime import date, datetime, time
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from tasks.models import ActivityLog, Area, Project, Tag, Task, TaskNote, TaskStep, html_to_text
+from tasks.services.live import publish_task_changes
+from tasks.services.stamps import touch_workspace
+
+FORMAT = 'srtask-export'
+FORMAT_VERSION = 1
+CHUNK_SIZE = 2000
+LINES_PER_WRITE = 500
+
+
+class WorkspaceImportError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class Kind:
+    """One exported row type and how its rows belong to a user."""
+    name: str
+    model: type
+    owner: str  # lookup from the model to the user
+    refs: dict = field(default_factory=dict)  # attname -> kind it points at
+    merge_on: str = ''  # existing rows with the same value are reused, not duplicated
+    keep_ids: bool = False  # other kinds refer to it, so imports map its ids
+
+    @cached_property
+    def fields(self):
+        return [f for f in self.model._meta.concrete_fields if f.attname != 'user_id']
+
+
+KINDS = [
+    Kind('area', Area, 'user', merge_on='name', keep_ids=True),
+    Kind('project', Project, 'user', {'area_id': 'area'}, keep_ids=True),
+    Kind('tag', Tag, 'user', merge_on='name', keep_ids=True),
+    Kind('task', Task, 'user', {'project_id': 'project', 'recurrence_parent_id': 'task'}, keep_ids=True),
+    Kind('task_tag', Task.tags.through, 'task__user', {'task_id': 'task', 'tag_id': 'tag'}),
+    Kind('step', TaskStep, 'task__user', {'task_id': 'task'}),
+    Kind('note', TaskNote, 'task__user', {'task_id': 'task'}),
+    Kind('activity', ActivityLog, 'task__user', {'task_id': 'task'}),
+]
+KINDS_BY_NAME = {kind.name: kind for kind in KINDS}
+
+
+def _rows(user, kind, chunk_size):
+    attnames = [f.attname for f in kind.fields]
+    queryset = kind.model.objects.filter(**{kind.owner: user}).order_by('pk').values_list(*attnames)
+    for values in queryset.iterator(chunk_size=chunk_size):
+        yield dict(zip(attnames, values))
+
+
+def iter_ndjson(user, chunk_size=CHUNK_SIZE):
+    """Yield the user's workspace as NDJSON text, LINES_PER_WRITE rows at a time."""
+    encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    yield encoder.encode({'type': FORMAT, 'version': FORMAT_VERSION, 'exported_at': timezone.now()}) + '\n'
+    for kind in KINDS:
+        buffer = []
+        for row in _rows(user, kind, chunk_size):
+            buffer.append(encoder.encode({'type': kind.name, **row}))
+            if len(buffer) == LINES_PER_WRITE:
+                yield '\n'.join(buffer) + '\n'
+                buffer = []
+        if buffer:
+            yield '\n'.join(buffer) + '\n'
+
+
+class _Line:
+    """File-like target that hands back what csv.writer writes."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return value
+
+
+def iter_csv(user, kind_name, chunk_size=CHUNK_SIZE):
+    """Yield one kind of the user's rows as CSV text."""
+    kind = KINDS_BY_NAME[kind_name]
+    writer = csv.writer(_Line())
+    yield writer.writerow([f.attname for f in kind.fields])
+    buffer = []
+    for row in _rows(user, kind, chunk_size):
+        buffer.append(writer.writerow([_csv_value(value) for value in row.values()]))
+        if len(buffer) == LINES_PER_WRITE:
+            yield ''.join(buffer)
+            buffer = []
+    yield ''.join(buffer)
+
+
+@contextmanager
+def _keeping_created_at():
+    """Let bulk_create store exported created_at values instead of the current time.
+
+    This changes the model fields for the whole process, so it is only for
+    the import command, never a web request.
+    """
+    fields = [kind.model._meta.get_field('created_at') for kind in KINDS if kind.model is not Task.tags.through]
+    for model_field in fields:
+        model_field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for model_field in fields:
+            model_field.auto_now_add = True
+
+
+@dataclass
+class ImportResult:
+    created: Counter = field(default_factory=Counter)
+    merged: Counter = field(default_factory=Counter)
+    skipped: Counter = field(default_factory=Counter)
+
+
+class _Importer:
+    def __init__(self, user, batch_size, log):
+        self.user = user
+        self.batch_size = batch_size
+        self.log = log
+        self.result = ImportResult()
+        self.ids = {kind.name: {} for kind in KINDS if kind.keep_ids}
+        self.existing = {
+            kind.name: dict(kind.model.objects.filter(user=user).values_list(kind.merge_on, 'pk'))
+            for kind in KINDS if kind.merge_on
+        }
+        self.kind = None
+        self.batch = []  # (exported id, unsaved instance)
+        self.orphan_parents = []  # (imported task, exported parent id) exported after the task
+        self.now = timezone.now()
+
+    def add(self, record, line_number):
+        kind = KINDS_BY_NAME.get(record.pop('type', None))
+        if kind is None:
+            raise WorkspaceImportError(f'Line {line_number}: unknown row type')
+        if kind is not self.kind:
+            self.flush()
+            self.kind = kind
+
+        exported_id = record.pop('id', None)
+        values = {}
+        parent = None
+        for model_field in kind.fields:
+            if model_field.primary_key or model_field.attname not in record:
+                continue
+            value = record[model_field.attname]
+            target = kind.refs.get(model_field.attname)
+            if target is not None and value is not None:
+                mapped = self.ids[target].get(value)
+                if mapped is None and model_field.attname == 'recurrence_parent_id':
+                    parent = value
+                elif mapped is None and not model_field.null:
+                    self.result.skipped[kind.name] += 1
+                    return
+                value = mapped
+            elif target is None:
+                try:
+                    value = model_field.to_python(value)
+                except Exception as exc:
+                    raise WorkspaceImportError(f'Line {line_number}: bad {model_field.attname}: {exc}') from exc
+            values[model_field.attname] = value
+
+        if kind.merge_on:
+            existing = self.existing[kind.name].get(values.get(kind.merge_on))
+            if isinstance(existing, kind.model):
+                # Same name earlier in this batch; save it to learn its id
+                self.flush()
+                existing = existing.pk
+            if existing is not None:
+                self.ids[kind.name][exported_id] = existing
+                self.result.merged[kind.name] += 1
+                return
+        if kind.owner == 'user':
+            values['user'] = self.user
+        if kind.model is not Task.tags.through:
+            values['created_at'] = values.get('created_at') or self.now
+        instance = kind.model(**values)
+        if kind.model is TaskNote:
+            # bulk_create() skips save(), which derives this
+            instance.content_text = html_to_text(instance.content_html)
+        if kind.merge_on:
+            # Reserve the name, so a repeat later in the file is merged too
+            self.existing[kind.name][values.get(kind.merge_on)] = instance
+        if parent is not None:
+            self.orphan_parents.append((instance, parent))
+        self.batch.append((exported_id, instance))
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.batch:
+            return
+        kind = self.kind
+        instances = [instance for _, instance in self.batch]
+        kind.model.objects.bulk_create(instances, ignore_conflicts=kind.model is Task.tags.through)
+        if kind.keep_ids:
+            ids = self.ids[kind.name]
+            for exported_id, instance in self.batch:
+                ids[exported_id] = instance.pk
+        if kind.merge_on:
+            existing = self.existing[kind.name]
+            for instance in instances:
+                existing[getattr(instance, kind.merge_on)] = instance.pk
+        self.result.created[kind.name] += len(instances)
+        self.batch = []
+        if self.log:
+            self.log(f'  {self.result.created[kind.name]} {kind.name} rows imported...')
+
+    def finish(self):
+        self.flush()
+        for task, parent in self.orphan_parents:
+            Task.objects.filter(pk=task.pk).update(recurrence_parent_id=self.ids['task'].get(parent))
+
+
+def import_ndjson(user, lines, batch_size=CHUNK_SIZE, log=None):
+    """Import an NDJSON export into user's workspace, all or nothing; returns an ImportResult."""
+    importer = _Importer(user, batch_size, log)
+    header_seen = False
+    with transaction.atomic(), _keeping_created_at():
+        for line_number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as exc:
+                raise WorkspaceImportError(f'Line {line_number}: not valid JSON') from exc
+            if not header_seen:
+                if record.get('type') != FORMAT or record.get('version') != FORMAT_VERSION:
+                    raise WorkspaceImportError(f'Not an {FORMAT} version {FORMAT_VERSION} file')
+                header_seen = True
+                continue
+            importer.add(record, line_number)
+        importer.finish()
+        touch_workspace(user.pk)
+        # bulk_create() sends no post_save, so tell open tabs here
+        publish_task_changes(user.pk, list(importer.ids['task'].values()))
+    return importer.result
@@ -0,0 +1,38 @@
+"""Helpers for async views.
+
+Templates, context processors and lazy request attributes (request.user,
+messages) are sync code, so async views do their queries with the async
+ORM and hand the finished context to arender(), which renders on a worker
+thread in one hop.
+"""
+from asgiref.sync import sync_to_async
+from django.shortcuts import render
+
+
+async def auser(request):
+    """await request.auser(), also resolving request.user.
+
+    The two cache the user separately; without this, the sync code a
+    request ends in (ETags, templates) loads the user a second time.
+    """
+    request.user = await request.auser()
+    return request.user
+
+
+async def alist(queryset):
+    """list(queryset), for async code."""
+    return [row async for row in queryset]
+
+
+async def arender(request, template_name, context=None, status=None):
+    """render() for async views.
+
+    The sidebar is gathered first with its queries issued together
+    (sidebar_data then reuses it), and the template renders off the event
+    loop.
+    """
+    # context_processors imports this module
+    from tasks.context_processors import asidebar_data
+
+    request.sidebar_data = await asidebar_data(request)
+    return await sync_to_async(render)(request, template_name, context, status=status)
@@ -0,0 +1,84 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from tasks.context_processors import SIDEBAR_CACHE_SCOPE
+from tasks.models import Area, GoogleCalendarConnection, Project, SavedFilter, Tag, Task, TaskNote, TaskStep
+from tasks.services.cache import bump_user_version
+from tasks.services.filters import FILTER_CACHE_SCOPE
+from tasks.services.live import publish_task_change
+from tasks.services.google_calendar import SYNCED_FIELDS, forget_connection, sync_soon
+from tasks.services.rows import ROW_CACHE_SCOPE
+from tasks.services.stamps import touch_workspace
+
+
+@receiver([post_save, post_delete], sender=Project)
+@receiver([post_save, post_delete], sender=Area)
+@receiver([post_save, post_delete], sender=Tag)
+@receiver([post_save, post_delete], sender=SavedFilter)
+def invalidate_sidebar(sender, instance, **kwargs):
+    bump_user_version(instance.user_id, SIDEBAR_CACHE_SCOPE)
+
+
+@receiver([post_save, post_delete], sender=Tag)
+def invalidate_filter_plans(sender, instance, **kwargs):
+    # Plans hold tag ids resolved from names
+    bump_user_version(instance.user_id, FILTER_CACHE_SCOPE)
+
+
+@receiver([post_save, post_delete], sender=Project)
+@receiver([post_save, post_delete], sender=Tag)
+def invalidate_task_rows(sender, instance, update_fields=None, **kwargs):
+    # Rows show project and tag names and colours, but not their order
+    if update_fields and set(update_fields) <= {'sort_order', 'updated_at'}:
+        return
+    bump_user_version(instance.user_id, ROW_CACHE_SCOPE)
+
+
+def _owner_id(instance):
+    if isinstance(instance, (TaskStep, TaskNote)):
+        if type(instance).task.is_cached(instance):
+            return instance.task.user_id
+        return Task.objects.filter(pk=instance.task_id).values_list('user_id', flat=True).first()
+    return instance.user_id
+
+
+@receiver([post_save, post_delete], sender=Task)
+@receiver([post_save, post_delete], sender=TaskStep)
+@receiver([post_save, post_delete], sender=Project)
+@receiver([post_save, post_delete], sender=Area)
+@receiver([post_save, post_delete], sender=Tag)
+@receiver([post_save, post_delete], sender=SavedFilter)
+def touch_workspace_on_write(sender, instance, origin=None, **kwargs):
+    # Rows deleted in cascade are covered by whatever started the delete
+    if origin is not None and getattr(origin, 'model', type(origin)) is not sender:
+        return
+    touch_workspace(_owner_id(instance))
+
+
+@receiver([post_save, post_delete], sender=Task)
+@receiver([post_save, post_delete], sender=TaskStep)
+@receiver([post_save, post_delete], sender=TaskNote)
+def publish_live_update(sender, instance, signal, origin=None, **kwargs):
+    if origin is not None and getattr(origin, 'model', type(origin)) is not sender:
+        return
+    if sender is Task:
+        publish_task_change(instance.user_id, instance.pk, deleted=signal is post_delete)
+    elif (user_id := _owner_id(instance)) is not None:
+        publish_task_change(user_id, instance.task_id)
+
+
+@receiver(post_save, sender=Task)
+def schedule_calendar_sync(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or SYNCED_FIELDS.intersection(update_fields):
+        sync_soon([instance.pk], [instance.user_id])
+
+
+@receiver(post_delete, sender=Task)
+def remove_calendar_event(sender, instance, **kwargs):
+    # The sync row survives with task=NULL; the next run deletes its event
+    sync_soon([instance.pk], [instance.user_id])
+
+
+@receiver([post_save, post_delete], sender=GoogleCalendarConnection)
+def forget_calendar_connection(sender, instance, **kwargs):
+    forget_connection(instance.user_id)
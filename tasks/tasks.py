@@ -0,0 +1,42 @@
+from celery import shared_task
+from django.conf import settings
+
+from tasks.models import Task
+from tasks.services.activity import write_entries
+from tasks.services.google_calendar import connections_with_changes, run_sync, schedule_sync
+from tasks.services.recurrence import materialize_occurrences
+
+
+@shared_task(ignore_result=True)
+def write_activity_logs(entries):
+    """Persist a batch of ActivityLog entries buffered by a web request."""
+    # Tasks deleted since the entries were queued would fail the FK check
+    live = set(Task.objects.filter(pk__in={e['task_id'] for e in entries}).values_list('pk', flat=True))
+    write_entries([e for e in entries if e['task_id'] in live])
+
+
+@shared_task(ignore_result=True)
+def materialize_recurring_tasks():
+    """Create recurring tasks' occurrences inside the rolling horizon."""
+    if settings.RECURRENCE_VIRTUAL_UPCOMING:
+        return
+    materialize_occurrences()
+
+
+@shared_task(ignore_result=True)
+def sync_google_calendar(connection_id):
+    """Push a connection's pending task changes to Google Calendar."""
+    result = run_sync(connection_id)
+    if result is None:
+        return
+    if result.retry_at:
+        sync_google_calendar.apply_async((connection_id,), eta=result.retry_at)
+    elif result.remaining:
+        sync_google_calendar.delay(connection_id)
+
+
+@shared_task(ignore_result=True)
+def sync_all_google_calendars():
+    """Queue a run for every connection with pending changes."""
+    for connection_id in connections_with_changes():
+        schedule_sync(connection_id, delay=0)
@@ -1,3 +1,18 @@
 from django import template
 
+from tasks.models import Project, Tag
+from tasks.services.bulk import BULK_ACTIONS
+
 register = template.Library()
+
+
+@register.inclusion_tag('partials/bulk_bar.html', takes_context=True)
+def bulk_bar(context):
+    """Selection toolbar for applying bulk actions to checked task rows."""
+    user = context['request'].user
+    return {
+        'projects': Project.objects.filter(user=user, is_completed=False),
+        'tags': Tag.objects.filter(user=user),
+        'actions': BULK_ACTIONS,
+        'csrf_token': context.get('csrf_token'),
+    }
@@ -0,0 +1,124 @@
+"""Realistic workspaces for the view tests.
+
+seed_workspace() fills a user's workspace in bulk with the mix a real
+account accumulates: mostly finished tasks, a backlog of open ones with
+and without due dates, tags, steps, notes, history and a few recurring
+series. The same seed always produces the same workspace.
+"""
+import random
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from tasks.models import (
+    ActivityLog, Area, CalendarFeed, Project, SavedFilter, Tag, Task, TaskNote, TaskStep,
+)
+
+WORDS = (
+    'review draft invoice call plan fix update email report budget meeting design deploy write '
+    'read order book clean prepare check sync refactor migrate test release schedule'
+).split()
+BATCH_SIZE = 2000
+
+
+@dataclass
+class Workspace:
+    """The seeded user and one of each object the views are driven with."""
+    user: object
+    area: Area
+    project: Project
+    tag: Tag
+    task: Task
+    step: TaskStep
+    note: TaskNote
+    saved_filter: SavedFilter
+    feed: CalendarFeed
+    task_count: int
+
+
+def _title(rng):
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 6))).capitalize()
+
+
+def seed_workspace(username, task_count, seed=0):
+    """Create a user owning task_count tasks plus everything around them."""
+    rng = random.Random(seed)
+    today = timezone.localdate()
+    user = get_user_model().objects.create_user(username=username, email=f'{username}@example.com', password='pw')
+
+    areas = Area.objects.bulk_create([Area(user=user, name=name) for name in ('Work', 'Home', 'Side projects')])
+    projects = Project.objects.bulk_create([
+        Project(user=user, area=areas[i % len(areas)], name=f'Project {i}', sort_order=i)
+        for i in range(min(max(task_count // 50, 2), 40))
+    ])
+    tags = Tag.objects.bulk_create([Tag(user=user, name=name) for name in WORDS[:12]])
+
+    statuses = [Task.Status.TODO, Task.Status.IN_PROGRESS, Task.Status.COMPLETED, Task.Status.CANCELLED]
+    tasks = []
+    for i in range(task_count):
+        status = rng.choices(statuses, weights=[6, 1, 10, 1])[0]
+        due = rng.random() < 0.4
+        tasks.append(Task(
+            user=user,
+            title=_title(rng),
+            description=_title(rng) if rng.random() < 0.3 else '',
+            status=status,
+            priority=rng.randint(1, 4),
+            project=rng.choice(projects) if rng.random() < 0.7 else None,
+            due_date=today + timedelta(days=rng.randint(-10, 30)) if due else None,
+            is_my_day=status == Task.Status.TODO and rng.random() < 0.05,
+            estimated_minutes=rng.choice([None, 15, 30, 60, 120]),
+            completed_at=timezone.now() if status == Task.Status.COMPLETED else None,
+        ))
+    Task.objects.bulk_create(tasks, batch_size=BATCH_SIZE)
+    for series in tasks[:3]:
+        series.is_recurring = True
+        series.recurrence_rule = 'RRULE:FREQ=WEEKLY'
+        series.due_date = series.due_date or today
+    Task.objects.bulk_update(tasks[:3], ['is_recurring', 'recurrence_rule', 'due_date'])
+
+    links, steps, notes, history = [], [], [], []
+    for task in tasks:
+        for tag in rng.sample(tags, rng.choice([0, 1, 1, 2, 3])):
+            links.append(Task.tags.through(task_id=task.pk, tag_id=tag.pk))
+        if rng.random() < 0.3:
+            for position in range(rng.randint(1, 4)):
+                done = rng.random() < 0.4
+                steps.append(TaskStep(task=task, title=_title(rng), is_completed=done, sort_order=position))
+                task.steps_total += 1
+                task.steps_done += done
+        if rng.random() < 0.1:
+            notes.append(TaskNote(task=task, title=_title(rng), content_html=f'<p>{_title(rng)}</p>'))
+        if rng.random() < 0.2:
+            history.append(ActivityLog(task=task, action='created', detail='Task created'))
+    Task.tags.through.objects.bulk_create(links, batch_size=BATCH_SIZE)
+    TaskStep.objects.bulk_create(steps, batch_size=BATCH_SIZE)
+    TaskNote.objects.bulk_create(notes, batch_size=BATCH_SIZE)
+    ActivityLog.objects.bulk_create(history, batch_size=BATCH_SIZE)
+    Task.objects.bulk_update([t for t in tasks if t.steps_total], ['steps_total', 'steps_done'], batch_size=BATCH_SIZE)
+
+    # One task with everything attached, for the detail views
+    task = Task.objects.create(
+        user=user, title='Prepare quarterly review', project=projects[0], due_date=today, is_my_day=True,
+    )
+    task.tags.add(tags[0])
+    step = TaskStep.objects.create(task=task, title='Collect numbers', sort_order=1024)
+    Task.objects.filter(pk=task.pk).update(steps_total=1)
+    note = TaskNote.objects.create(task=task, title='Agenda', content_html='<p>Numbers first</p>')
+
+    return Workspace(
+        user=user,
+        area=areas[0],
+        project=projects[0],
+        tag=tags[0],
+        task=task,
+        step=step,
+        note=note,
+        saved_filter=SavedFilter.objects.create(
+            user=user, name='Urgent work', filter_config={'priority': [1, 2], 'tags': {'any': [tags[0].name]}},
+        ),
+        feed=CalendarFeed.objects.create(user=user),
+        task_count=task_count + 1,
+    )
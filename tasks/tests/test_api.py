@@ -0,0 +1,114 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from tasks.models import ActivityLog, Task
+
+
+@override_settings(ACTIVITY_LOG_MODE='sync')
+class TaskStatusApiTests(TestCase):
+    """Status changes through the API complete and reopen tasks like the UI does."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('api', 'api@example.com', 'pw')
+        self.client.force_login(self.user)
+        self.today = timezone.localdate()
+
+    def series(self, **fields):
+        return Task.objects.create(
+            user=self.user, title='Water plants', is_recurring=True, recurrence_rule='FREQ=DAILY',
+            due_date=self.today, **fields,
+        )
+
+    def actions(self, task):
+        return list(ActivityLog.objects.filter(task=task).values_list('action', flat=True))
+
+    def occurrences(self, task):
+        return Task.objects.filter(recurrence_parent=task)
+
+    def patch(self, task, data):
+        return self.client.patch(
+            reverse('tasks:api:task-detail', args=[task.pk]), data, content_type='application/json',
+        )
+
+    def post(self, name, data):
+        return self.client.post(reverse(f'tasks:api:{name}'), data, content_type='application/json')
+
+    def test_patch_completes(self):
+        task = self.series()
+        response = self.patch(task, {'status': 'completed'})
+        self.assertEqual(response.status_code, 200)
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.Status.COMPLETED)
+        self.assertIsNotNone(task.completed_at)
+        self.assertIsNotNone(response.json()['completed_at'])
+        self.assertIn('completed', self.actions(task))
+        self.assertEqual(
+            list(self.occurrences(task).values_list('due_date', flat=True)), [self.today + timedelta(days=1)],
+        )
+
+        # Only the transition spawns; saving it completed again does not
+        self.patch(task, {'status': 'completed', 'title': 'Water the plants'})
+        self.assertEqual(self.occurrences(task).count(), 1)
+
+    def test_patch_reopens(self):
+        task = Task.objects.create(
+            user=self.user, title='Done', status=Task.Status.COMPLETED, completed_at=timezone.now(),
+        )
+        self.assertEqual(self.patch(task, {'status': 'in_progress'}).status_code, 200)
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.Status.IN_PROGRESS)
+        self.assertIsNone(task.completed_at)
+        self.assertIn('uncompleted', self.actions(task))
+
+    def test_patch_between_open_statuses(self):
+        task = Task.objects.create(user=self.user, title='Open')
+        self.patch(task, {'status': 'in_progress'})
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.Status.IN_PROGRESS)
+        self.assertIsNone(task.completed_at)
+        self.assertNotIn('completed', self.actions(task))
+
+    @mock.patch('tasks.api.views.sync_soon')
+    def test_bulk_update_status(self, sync_soon):
+        series = self.series()
+        done = Task.objects.create(
+            user=self.user, title='Done', status=Task.Status.COMPLETED, completed_at=timezone.now(),
+        )
+        response = self.post('task-bulk-update', [
+            {'id': series.pk, 'status': 'completed'},
+            {'id': done.pk, 'status': 'todo', 'title': 'Not done after all'},
+        ])
+        self.assertEqual(response.status_code, 200)
+        series.refresh_from_db()
+        done.refresh_from_db()
+
+        self.assertEqual(series.status, Task.Status.COMPLETED)
+        self.assertIsNotNone(series.completed_at)
+        self.assertIn('completed', self.actions(series))
+        self.assertEqual(self.occurrences(series).count(), 1)
+
+        self.assertEqual((done.status, done.title), (Task.Status.TODO, 'Not done after all'))
+        self.assertIsNone(done.completed_at)
+        self.assertIn('uncompleted', self.actions(done))
+        sync_soon.assert_called_once()
+
+    def test_bulk_complete(self):
+        series = self.series()
+        response = self.post('task-bulk-complete', {'ids': [series.pk]})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(response.json()[0]['completed_at'])
+        self.assertIn('completed', self.actions(series))
+        self.assertEqual(self.occurrences(series).count(), 1)
+
+    def test_bulk_create_completed(self):
+        response = self.post('task-bulk-create', [{'title': 'Already done', 'status': 'completed'}, {'title': 'To do'}])
+        self.assertEqual(response.status_code, 201)
+        done, todo = response.json()
+        self.assertIsNotNone(done['completed_at'])
+        self.assertIsNone(todo['completed_at'])
+        self.assertEqual(self.actions(Task.objects.get(pk=done['id'])), ['created'])
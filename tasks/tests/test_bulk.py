@@ -0,0 +1,20 @@
+from datetime import date, datetime, timezone as dt_timezone
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from tasks.models import Task
+from tasks.services.bulk import apply_bulk_action
+
+
+class SetMyDayTests(TestCase):
+    @override_settings(TIME_ZONE='America/Jamaica')
+    def test_uses_the_local_date(self):
+        user = get_user_model().objects.create_user('bulk', 'bulk@example.com', 'pw')
+        task = Task.objects.create(user=user, title='Late night')
+        # 03:00 UTC is still the previous evening in America/Jamaica
+        with mock.patch('django.utils.timezone.now', return_value=datetime(2026, 3, 2, 3, tzinfo=dt_timezone.utc)):
+            apply_bulk_action(Task.objects.filter(pk=task.pk), 'my_day_add')
+        task.refresh_from_db()
+        self.assertEqual(task.my_day_date, date(2026, 3, 1))
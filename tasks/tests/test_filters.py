@@ -0,0 +1,172 @@
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from tasks.models import Area, Project, SavedFilter, Tag, Task
+from tasks.services.filters import OPEN_STATUSES, FilterError, FilterPlan, compile_filter, filter_tasks
+
+TODAY = date(2026, 3, 10)
+
+
+class CompileFilterTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('filters', 'filters@example.com', 'pw')
+        self.work = Tag.objects.create(user=self.user, name='work')
+        self.home = Tag.objects.create(user=self.user, name='home')
+        self.area = Area.objects.create(user=self.user, name='Job')
+        self.project = Project.objects.create(user=self.user, name='Launch', area=self.area)
+
+    def compile(self, config, **kwargs):
+        return compile_filter(config, self.user, **kwargs)
+
+    def test_empty_config_matches_open_tasks(self):
+        self.assertEqual(self.compile({}), FilterPlan())
+        self.assertEqual(FilterPlan().statuses, OPEN_STATUSES)
+
+    def test_status(self):
+        self.assertEqual(self.compile({'status': 'any'}).statuses, ())
+        self.assertEqual(self.compile({'status': 'completed'}).statuses, ('completed',))
+        self.assertEqual(self.compile({'status': ['todo', 'cancelled']}).statuses, ('todo', 'cancelled'))
+
+    def test_priority(self):
+        self.assertEqual(self.compile({'priority': [1, 2]}).priorities, (1, 2))
+        self.assertEqual(self.compile({'priority': 4}).priorities, (4,))
+
+    def test_tags(self):
+        plan = self.compile({'tags': {'any': ['work'], 'all': [self.home.pk], 'none': ['work', 'home']}})
+        self.assertEqual(plan.tags_any, (self.work.pk,))
+        self.assertEqual(plan.tags_all, (self.home.pk,))
+        self.assertEqual(plan.tags_none, (self.work.pk, self.home.pk))
+        # A bare list means any
+        self.assertEqual(self.compile({'tags': ['home']}).tags_any, (self.home.pk,))
+
+    def test_project_and_area(self):
+        plan = self.compile({'project': [self.project.pk, None], 'area': self.area.pk})
+        self.assertEqual(plan.projects, (self.project.pk,))
+        self.assertTrue(plan.without_project)
+        self.assertEqual(plan.areas, (self.area.pk,))
+
+    def test_due(self):
+        self.assertEqual(self.compile({'due': 'overdue'}).due_to, -1)
+        self.assertEqual(self.compile({'due': 'today'}).due_from, 0)
+        self.assertEqual(self.compile({'due': 'week'}).due_to, 6)
+        self.assertTrue(self.compile({'due': 'none'}).due_none)
+        plan = self.compile({'due': {'from': 'today', 'to': '2026-04-01'}})
+        self.assertEqual((plan.due_from, plan.due_to), (0, date(2026, 4, 1)))
+
+    def test_my_day_and_estimate(self):
+        self.assertIs(self.compile({'my_day': False}).my_day, False)
+        self.assertIsNone(self.compile({'my_day': None}).my_day)
+        plan = self.compile({'estimate': {'min': 15, 'max': 60}})
+        self.assertEqual((plan.estimate_min, plan.estimate_max), (15, 60))
+        self.assertTrue(self.compile({'estimate': {'none': True}}).estimate_none)
+
+    def test_malformed_configs(self):
+        for config in [
+            [], 'open', {'colour': 'red'},
+            {'status': 'finished'},
+            {'priority': [0]}, {'priority': ['1']}, {'priority': True},
+            {'tags': {'some': ['work']}}, {'tags': [['work']]}, {'tags': [{'name': 'work'}]}, {'tags': True},
+            {'project': ['Launch']},
+            {'due': 'soon'}, {'due': {'from': 'tomorrow'}}, {'due': {'until': 3}}, {'due': 5},
+            {'due': {'from': 10 ** 12}}, {'due': {'to': '2026-13-01'}},
+            {'estimate': 30}, {'estimate': {'min': -5}}, {'estimate': {'max': '1h'}},
+        ]:
+            with self.subTest(config=config), self.assertRaises(FilterError):
+                self.compile(config)
+
+    def test_other_users_references(self):
+        other = get_user_model().objects.create_user('other', 'other@example.com', 'pw')
+        theirs = Tag.objects.create(user=other, name='theirs')
+        their_project = Project.objects.create(user=other, name='Theirs')
+        their_area = Area.objects.create(user=other, name='Theirs')
+        for config in [
+            {'tags': ['theirs']}, {'tags': [theirs.pk]},
+            {'project': [their_project.pk]}, {'area': [their_area.pk]},
+        ]:
+            with self.subTest(config=config), self.assertRaises(FilterError):
+                self.compile(config, strict=True)
+        # Outside the form they resolve to nothing rather than to the other user's rows
+        self.assertEqual(self.compile({'tags': ['theirs', 'work']}).tags_any, (0, self.work.pk))
+
+
+class FilterTasksTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('matching', 'matching@example.com', 'pw')
+        self.work = Tag.objects.create(user=self.user, name='work')
+        self.home = Tag.objects.create(user=self.user, name='home')
+        self.project = Project.objects.create(user=self.user, name='Launch')
+
+    def task(self, title, tags=(), **fields):
+        task = Task.objects.create(user=self.user, title=title, **fields)
+        task.tags.set(tags)
+        return task
+
+    def matching(self, config):
+        saved_filter = SavedFilter.objects.create(user=self.user, name='Test', filter_config=config)
+        return set(filter_tasks(saved_filter, TODAY).values_list('title', flat=True))
+
+    def test_operators(self):
+        self.task('urgent work', tags=[self.work], priority=1, due_date=TODAY - timedelta(days=1), estimated_minutes=30)
+        self.task('both', tags=[self.work, self.home], project=self.project, due_date=TODAY, is_my_day=True)
+        self.task('home', tags=[self.home], due_date=TODAY + timedelta(days=10))
+        self.task('done', tags=[self.work], status=Task.Status.COMPLETED)
+
+        self.assertEqual(self.matching({}), {'urgent work', 'both', 'home'})
+        self.assertEqual(self.matching({'status': 'any', 'tags': ['work']}), {'urgent work', 'both', 'done'})
+        self.assertEqual(self.matching({'tags': {'all': ['work', 'home']}}), {'both'})
+        self.assertEqual(self.matching({'tags': {'none': ['work']}}), {'home'})
+        self.assertEqual(self.matching({'priority': [1]}), {'urgent work'})
+        self.assertEqual(self.matching({'project': [None]}), {'urgent work', 'home'})
+        self.assertEqual(self.matching({'due': 'overdue'}), {'urgent work'})
+        self.assertEqual(self.matching({'due': {'from': 1}}), {'home'})
+        self.assertEqual(self.matching({'my_day': True}), {'both'})
+        self.assertEqual(self.matching({'estimate': {'max': 30}}), {'urgent work'})
+        self.assertEqual(self.matching({'estimate': {'none': True}}), {'both', 'home'})
+
+    def test_only_the_owners_tasks(self):
+        other = get_user_model().objects.create_user('other', 'other@example.com', 'pw')
+        Task.objects.create(user=other, title='not mine')
+        self.task('mine')
+        self.assertEqual(self.matching({}), {'mine'})
+
+    def test_broken_config_matches_nothing(self):
+        self.task('mine')
+        self.assertEqual(self.matching({'due': 'soon'}), set())
+
+
+class SavedFilterViewTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('views', 'views@example.com', 'pw')
+        self.client.force_login(self.user)
+
+    def create(self, filter_config):
+        return self.client.post(reverse('tasks:filter_create'), {'name': 'Mine', 'filter_config': filter_config})
+
+    def test_malformed_input_is_a_form_error(self):
+        for text in [
+            '{not json', 'null', '[1, 2]', '{"due": "soon"}', '{"tags": ["nowhere"]}', '{"tags": [["work"]]}',
+            '{"due": {"from": 1000000000000}}',
+        ]:
+            with self.subTest(text=text):
+                response = self.create(text)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.context['form'].errors['filter_config'])
+        self.assertFalse(SavedFilter.objects.exists())
+
+    def test_valid_input_saves(self):
+        response = self.create('{"due": "week"}')
+        saved_filter = SavedFilter.objects.get(user=self.user)
+        self.assertRedirects(response, reverse('tasks:filter_detail', args=[saved_filter.pk]))
+
+    def test_another_users_filter_is_not_found(self):
+        other = get_user_model().objects.create_user('other', 'other@example.com', 'pw')
+        theirs = SavedFilter.objects.create(user=other, name='Theirs', filter_config={})
+        self.assertEqual(self.client.get(reverse('tasks:filter_detail', args=[theirs.pk])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('tasks:filter_edit', args=[theirs.pk])).status_code, 404)
+
+    def test_broken_saved_config_still_renders(self):
+        saved_filter = SavedFilter.objects.create(user=self.user, name='Old', filter_config={'due': 'soon'})
+        self.assertEqual(self.client.get(reverse('tasks:filter_detail', args=[saved_filter.pk])).status_code, 200)
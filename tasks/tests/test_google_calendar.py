@@ -0,0 +1,139 @@
+"""sync_connection against the in-process FakeCalendarServer."""
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from tasks.models import GoogleCalendarConnection, GoogleCalendarSync, Task
+from tasks.services.fake_calendar import FakeCalendarServer, _error
+from tasks.services.google_calendar import CALL_RETRIES, CALL_RETRY_DELAY, sync_connection
+from tasks.services.http import HttpSession
+
+
+class SyncConnectionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = FakeCalendarServer()
+        cls.server.start()
+        cls.addClassCleanup(cls.server.stop)
+
+    def setUp(self):
+        self.server.events.clear()
+        self.server.stats.clear()
+        self.server.error_rate = 0.0
+        settings = override_settings(
+            GOOGLE_CALENDAR_API_URL=self.server.url,
+            GOOGLE_OAUTH_TOKEN_URL=self.server.token_url,
+            GOOGLE_CALENDAR_RATE_LIMIT=0,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        sleep = mock.patch('tasks.services.google_calendar.time.sleep')
+        self.sleep = sleep.start()
+        self.addCleanup(sleep.stop)
+        self.session = HttpSession()
+        self.addCleanup(self.session.close)
+        self.addCleanup(cache.clear)
+
+        self.user = get_user_model().objects.create_user('calendar', 'calendar@example.com', 'pw')
+        # Expired, so the first run refreshes it
+        self.connection = GoogleCalendarConnection.objects.create(
+            user=self.user, access_token='expired', refresh_token='refresh', token_expiry=timezone.now(),
+        )
+        today = timezone.localdate()
+        self.tasks = [
+            Task.objects.create(user=self.user, title=f'Task {i}', due_date=today, sync_to_google_calendar=True)
+            for i in range(3)
+        ]
+        Task.objects.create(user=self.user, title='Undated', sync_to_google_calendar=True)
+        Task.objects.create(user=self.user, title='Not synced', due_date=today)
+
+    def sync(self):
+        self.connection.refresh_from_db()
+        return sync_connection(self.connection, session=self.session)
+
+    def statuses(self):
+        return set(GoogleCalendarSync.objects.values_list('sync_status', flat=True))
+
+    def test_first_sync_pushes_every_task(self):
+        result = self.sync()
+        self.assertEqual((result.flagged, result.pushed, result.failed, result.remaining), (3, 3, 0, False))
+        self.assertEqual(self.server.stats['tokens'], 1)
+        self.assertEqual(
+            sorted(event['summary'] for event in self.server.events.values()), ['Task 0', 'Task 1', 'Task 2'],
+        )
+        self.assertEqual(self.statuses(), {GoogleCalendarSync.SyncStatus.SYNCED})
+        self.assertFalse(GoogleCalendarSync.objects.filter(google_event_id='').exists())
+
+    def test_unchanged_tasks_are_skipped(self):
+        self.sync()
+        result = self.sync()
+        self.assertEqual((result.flagged, result.pushed, result.calls), (0, 0, 0))
+
+        # Saved without a visible change: flagged again, but nothing is sent
+        Task.objects.filter(user=self.user).update(updated_at=timezone.now())
+        result = self.sync()
+        self.assertEqual((result.flagged, result.pushed, result.unchanged, result.calls), (3, 0, 3, 0))
+
+        Task.objects.filter(pk=self.tasks[0].pk).update(title='Renamed', updated_at=timezone.now())
+        result = self.sync()
+        self.assertEqual((result.pushed, result.calls), (1, 1))
+        self.assertIn('Renamed', [event['summary'] for event in self.server.events.values()])
+
+    def test_retries_rate_limited_and_unavailable_calls(self):
+        refusals = [_error(429, 'Rate Limit Exceeded', 'rateLimitExceeded'), _error(503, 'Backend Error', 'backendError')]
+        with mock.patch.object(self.server, '_admit', side_effect=lambda token: refusals.pop(0) if refusals else None):
+            result = self.sync()
+        self.assertEqual((result.pushed, result.retried, result.calls), (3, 2, 5))
+        self.sleep.assert_called_once_with(CALL_RETRY_DELAY)
+        self.assertEqual(len(self.server.events), 3)
+
+    def test_backs_off_while_calls_keep_failing(self):
+        self.server.error_rate = 1.0
+        result = self.sync()
+        self.assertEqual(result.pushed, 0)
+        self.assertTrue(result.remaining)
+        self.assertEqual(
+            [call.args[0] for call in self.sleep.call_args_list],
+            [CALL_RETRY_DELAY * 2 ** attempt for attempt in range(CALL_RETRIES)],
+        )
+        self.connection.refresh_from_db()
+        self.assertEqual(self.connection.consecutive_failures, 1)
+        self.assertEqual(self.connection.backoff_until, result.retry_at)
+        self.assertEqual(self.statuses(), {GoogleCalendarSync.SyncStatus.PENDING})
+
+        # Still backing off: the run makes no calls
+        result = self.sync()
+        self.assertEqual((result.calls, result.retry_at), (0, self.connection.backoff_until))
+
+        self.server.error_rate = 0.0
+        GoogleCalendarConnection.objects.filter(pk=self.connection.pk).update(
+            backoff_until=timezone.now() - timedelta(seconds=1),
+        )
+        result = self.sync()
+        self.assertEqual(result.pushed, 3)
+        self.connection.refresh_from_db()
+        self.assertEqual((self.connection.consecutive_failures, self.connection.backoff_until), (0, None))
+
+    def test_refreshes_a_rejected_token(self):
+        # Not due to expire, but the server no longer accepts it
+        self.connection.token_expiry = timezone.now() + timedelta(hours=1)
+        self.connection.save()
+        result = self.sync()
+        self.assertEqual(result.pushed, 3)
+        self.assertEqual(self.server.stats['tokens'], 1)
+        self.connection.refresh_from_db()
+        self.assertNotEqual(self.connection.access_token, 'expired')
+
+    def test_revoked_grant_needs_reauth(self):
+        self.connection.refresh_token = ''
+        self.connection.save()
+        result = self.sync()
+        self.assertTrue(result.error)
+        self.connection.refresh_from_db()
+        self.assertTrue(self.connection.needs_reauth)
+        self.assertEqual(self.server.events, {})
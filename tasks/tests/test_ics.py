@@ -0,0 +1,47 @@
+from datetime import date, time
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from tasks.models import Task
+from tasks.services.ics import _vtimezone, iter_feed
+
+
+def unfold(text):
+    return text.replace('\r\n ', '').split('\r\n')
+
+
+class VTimezoneTests(TestCase):
+    def test_fixed_offset_zone(self):
+        lines = _vtimezone('America/Jamaica', 2020, 2030)
+        self.assertEqual(lines[:3], ['BEGIN:VTIMEZONE', 'TZID:America/Jamaica', 'BEGIN:STANDARD'])
+        self.assertEqual(lines.count('BEGIN:STANDARD'), 1)
+        self.assertIn('TZOFFSETTO:-0500', lines)
+        self.assertNotIn('BEGIN:DAYLIGHT', lines)
+
+    def test_offset_changes(self):
+        lines = _vtimezone('America/New_York', 2026, 2026)
+        daylight = lines.index('BEGIN:DAYLIGHT')
+        self.assertEqual(lines[daylight + 1:daylight + 5], [
+            'DTSTART:20260308T020000', 'TZOFFSETFROM:-0500', 'TZOFFSETTO:-0400', 'TZNAME:EDT',
+        ])
+        standard = lines.index('BEGIN:STANDARD', daylight)
+        self.assertEqual(lines[standard + 1:standard + 4], [
+            'DTSTART:20261101T020000', 'TZOFFSETFROM:-0400', 'TZOFFSETTO:-0500',
+        ])
+
+
+class FeedTimezoneTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('feed', 'feed@example.com', 'pw')
+
+    @override_settings(TIME_ZONE='America/New_York')
+    def test_timed_events_reference_the_calendars_vtimezone(self):
+        Task.objects.create(user=self.user, title='Call', due_date=date(2026, 7, 1), due_time=time(9, 30))
+        Task.objects.create(user=self.user, title='Errand', due_date=date(2026, 7, 2))
+        lines = unfold(''.join(iter_feed(self.user)))
+
+        self.assertIn('TZID:America/New_York', lines)
+        self.assertLess(lines.index('END:VTIMEZONE'), lines.index('BEGIN:VEVENT'))
+        self.assertIn('DTSTART;TZID=America/New_York:20260701T093000', lines)
+        self.assertIn('DTSTART;VALUE=DATE:20260702', lines)
@@ -0,0 +1,63 @@
+"""The live_events stream, driven through the in-process memory broker.
+
+These run under TransactionTestCase: events are published on commit, and
+the stream renders rows on its own connection.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from tasks.models import Task
+from tasks.services.bulk import apply_bulk_action
+
+EVENT_TIMEOUT = 3
+
+
+@override_settings(LIVE_UPDATES_BACKEND='memory', LIVE_UPDATES_KEEPALIVE=1)
+class LiveEventsTests(TransactionTestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('live', 'live@example.com', 'pw')
+        self.other = get_user_model().objects.create_user('other', 'other@example.com', 'pw')
+        self.tasks = [Task.objects.create(user=self.user, title=f'Live task {i}') for i in range(2)]
+
+    async def _open_stream(self):
+        client = AsyncClient()
+        await sync_to_async(client.force_login)(self.user)
+        response = await client.get(reverse('tasks:live_events'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        return response.streaming_content.__aiter__()
+
+    async def _next_after(self, stream, write):
+        """The stream's next chunk once write() has committed."""
+        chunk = asyncio.ensure_future(asyncio.wait_for(stream.__anext__(), EVENT_TIMEOUT))
+        await asyncio.sleep(0.2)  # let the stream subscribe before publishing
+        await sync_to_async(write)()
+        return (await chunk).decode()
+
+    async def test_save_publishes_the_row(self):
+        stream = await self._open_stream()
+        task = self.tasks[0]
+        task.title = 'Renamed live'
+        chunk = await self._next_after(stream, task.save)
+        self.assertTrue(chunk.startswith(f'event: task-{task.pk}\n'), chunk)
+        self.assertIn('Renamed live', chunk)
+        await stream.aclose()
+
+    async def test_bulk_action_publishes_every_task_once(self):
+        stream = await self._open_stream()
+        queryset = Task.objects.filter(user=self.user)
+        chunk = await self._next_after(stream, lambda: apply_bulk_action(queryset, 'my_day_add'))
+        for task in self.tasks:
+            self.assertEqual(chunk.count(f'event: task-{task.pk}\n'), 1, chunk)
+        # Nothing else was published: the next chunk is a keepalive
+        self.assertEqual((await asyncio.wait_for(stream.__anext__(), EVENT_TIMEOUT)).decode(), ': keepalive\n\n')
+        await stream.aclose()
+
+    async def test_other_users_changes_are_not_streamed(self):
+        stream = await self._open_stream()
+        chunk = await self._next_after(stream, lambda: Task.objects.create(user=self.other, title='Not mine'))
+        self.assertEqual(chunk, ': keepalive\n\n')
+        await stream.aclose()
@@ -0,0 +1,127 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from tasks.models import Project, Task, TaskStep
+from tasks.services.ordering import GAP, move, rebalance, save_at_end
+
+
+class OrderingTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('order', 'order@example.com', 'pw')
+        self.task = Task.objects.create(user=self.user, title='Pack')
+
+    def steps(self, *titles):
+        steps = []
+        for title in titles:
+            step = TaskStep(task=self.task, title=title)
+            save_at_end(step)
+            steps.append(step)
+        return steps
+
+    def titles(self):
+        return list(self.task.steps.values_list('title', flat=True))
+
+    def positions(self):
+        return list(self.task.steps.values_list('sort_order', flat=True))
+
+    def test_append_leaves_gaps(self):
+        first, second, third = self.steps('a', 'b', 'c')
+        self.assertEqual([first.sort_order, second.sort_order, third.sort_order], [GAP, 2 * GAP, 3 * GAP])
+        self.assertEqual(self.positions(), [GAP, 2 * GAP, 3 * GAP])
+
+    def test_move_takes_the_midpoint(self):
+        first, second, third = self.steps('a', 'b', 'c')
+        with self.assertNumQueries(5):  # savepoint, tie check, next neighbour, update, release
+            position = move(third, after=first)
+        self.assertEqual(position, GAP + GAP // 2)
+        self.assertEqual(self.titles(), ['a', 'c', 'b'])
+        # Only the moved row was written
+        second.refresh_from_db()
+        self.assertEqual(second.sort_order, 2 * GAP)
+
+    def test_move_to_either_end(self):
+        first, second, third = self.steps('a', 'b', 'c')
+        move(third, before=first)
+        self.assertEqual(self.titles(), ['c', 'a', 'b'])
+        move(third)
+        self.assertEqual(self.titles(), ['a', 'b', 'c'])
+        self.assertEqual(third.sort_order, 3 * GAP)
+
+    def test_ties_rebalance(self):
+        # Rows created before ordering all sit at 0
+        for title in 'abc':
+            TaskStep.objects.create(task=self.task, title=title)
+        first, second, third = self.task.steps.all()
+        move(first, after=third)
+        self.assertEqual(self.titles(), ['b', 'c', 'a'])
+        self.assertEqual(self.positions(), [GAP, 2 * GAP, 3 * GAP])
+
+    def test_adjacent_neighbours_rebalance(self):
+        first, second, third = self.steps('a', 'b', 'c')
+        TaskStep.objects.filter(pk=second.pk).update(sort_order=GAP + 1)
+        move(third, after=first)
+        self.assertEqual(self.titles(), ['a', 'c', 'b'])
+        self.assertEqual(self.positions(), [GAP, GAP + GAP // 2, 2 * GAP])
+
+    def test_rebalance_keeps_display_order(self):
+        self.steps('a', 'b')
+        TaskStep.objects.create(task=self.task, title='first', sort_order=-5)
+        positions = rebalance(self.task.steps.all())
+        self.assertEqual(sorted(positions.values()), [GAP, 2 * GAP, 3 * GAP])
+        self.assertEqual(self.titles(), ['first', 'a', 'b'])
+
+    def test_scopes_are_separate(self):
+        project = Project.objects.create(user=self.user, name='Trip')
+        loose = Task(user=self.user, title='Loose')
+        save_at_end(loose)
+        in_project = Task(user=self.user, title='Book', project=project)
+        save_at_end(in_project)
+        # self.task sits at 0; the project's list starts empty
+        self.assertEqual((loose.sort_order, in_project.sort_order), (GAP, GAP))
+
+
+class ReorderViewTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('reorder', 'reorder@example.com', 'pw')
+        self.client.force_login(self.user)
+        self.tasks = []
+        for title in ('a', 'b', 'c'):
+            task = Task(user=self.user, title=title)
+            save_at_end(task)
+            self.tasks.append(task)
+
+    def reorder(self, kind, pk, **data):
+        return self.client.post(reverse('tasks:reorder', args=[kind, pk]), data)
+
+    def test_moves_after_a_neighbour(self):
+        first, second, third = self.tasks
+        self.assertEqual(self.reorder('task', first.pk, after=third.pk).status_code, 204)
+        titles = Task.objects.filter(user=self.user, project=None).values_list('title', flat=True)
+        self.assertEqual(list(titles), ['b', 'c', 'a'])
+
+    def test_neighbour_from_another_list(self):
+        project = Project.objects.create(user=self.user, name='Elsewhere')
+        elsewhere = Task.objects.create(user=self.user, title='x', project=project)
+        self.assertEqual(self.reorder('task', self.tasks[0].pk, after=elsewhere.pk).status_code, 400)
+        self.assertEqual(self.reorder('task', self.tasks[0].pk, before='nope').status_code, 400)
+
+    def test_unknown_kind_or_other_users_item(self):
+        other = get_user_model().objects.create_user('someone', 'someone@example.com', 'pw')
+        theirs = Task.objects.create(user=other, title='Theirs')
+        self.assertEqual(self.reorder('tag', self.tasks[0].pk).status_code, 404)
+        self.assertEqual(self.reorder('task', theirs.pk).status_code, 404)
+
+    def test_create_views_append(self):
+        response = self.client.post(reverse('tasks:step_create', args=[self.tasks[0].pk]), {'title': 'Step'})
+        self.assertEqual(response.status_code, 302)
+        self.client.post(reverse('tasks:task_create'), {'title': 'd', 'priority': 4, 'status': 'todo'})
+        last = Task.objects.filter(user=self.user, project=None).last()
+        self.assertEqual((last.title, last.sort_order), ('d', 4 * GAP))
+
+    def test_step_create_renders_the_stored_position(self):
+        task = self.tasks[0]
+        response = self.client.post(
+            reverse('tasks:step_create', args=[task.pk]), {'title': 'Step'}, HTTP_HX_REQUEST='true',
+        )
+        self.assertEqual(response.context['step'].sort_order, GAP)
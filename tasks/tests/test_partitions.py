@@ -0,0 +1,65 @@
+import unittest
+from datetime import datetime, timezone
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase, TransactionTestCase
+from django.utils import timezone as django_timezone
+
+from tasks.models import ActivityLog, Task
+from tasks.services.partitions import TABLE, convert_to_partitioned, is_partitioned, month_start, monthly_partitions
+
+
+class MonthlyPartitionTests(SimpleTestCase):
+    def test_window_across_a_year_boundary(self):
+        partitions = monthly_partitions(
+            datetime(2026, 11, 15, tzinfo=timezone.utc), datetime(2027, 2, 1, tzinfo=timezone.utc),
+        )
+        self.assertEqual(
+            [partition.name for partition in partitions],
+            [f'{TABLE}_p202611', f'{TABLE}_p202612', f'{TABLE}_p202701'],
+        )
+        # Contiguous, so no two partitions overlap and no month is missed
+        for previous, following in zip(partitions, partitions[1:]):
+            self.assertEqual(previous.upper, following.lower)
+        self.assertEqual(partitions[1].upper, datetime(2027, 1, 1, tzinfo=timezone.utc))
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'ActivityLog partitioning requires PostgreSQL')
+class ConvertToPartitionedTests(TransactionTestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user('partitions', 'partitions@example.com', 'pw')
+        self.tasks = [Task.objects.create(user=user, title=f'Task {i}') for i in range(3)]
+        for task in self.tasks:
+            for action in ('created', 'edited'):
+                ActivityLog.objects.create(task=task, action=action)
+        self.addCleanup(self._drop_legacy)
+
+    def _drop_legacy(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {TABLE}_legacy')
+
+    def test_resumes_and_survives_a_task_deleted_during_the_copy(self):
+        now = django_timezone.now()
+        end = month_start(now.year, now.month + 2)
+
+        def fail(message):
+            raise RuntimeError('interrupted')
+
+        with self.assertRaises(RuntimeError):
+            convert_to_partitioned(2, end, log=fail)  # after the first batch commits
+        self.assertFalse(is_partitioned())
+
+        deleted = self.tasks[0]
+        calls = []
+
+        def delete_a_task(message):
+            if not calls:
+                deleted.delete()  # its rows are in both tables by now
+            calls.append(message)
+
+        convert_to_partitioned(2, end, log=delete_a_task)
+        self.assertTrue(is_partitioned())
+        self.assertFalse(ActivityLog.objects.filter(task_id=deleted.pk).exists())
+        self.assertEqual(ActivityLog.objects.count(), 4)
+
@@ -0,0 +1,95 @@
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from tasks.models import Task
+from tasks.services.recurrence import (
+    next_occurrence, occurrence_dates, parse_rule, series_anchor, spawn_next_occurrences,
+)
+
+
+class RuleTests(SimpleTestCase):
+    def test_expansion(self):
+        monday = date(2026, 3, 2)
+        self.assertEqual(
+            occurrence_dates('FREQ=WEEKLY;BYDAY=MO,WE', monday, monday, date(2026, 3, 15)),
+            (date(2026, 3, 4), date(2026, 3, 9), date(2026, 3, 11)),
+        )
+        self.assertEqual(
+            occurrence_dates('RRULE:FREQ=DAILY;INTERVAL=2', monday, monday, date(2026, 3, 8)),
+            (date(2026, 3, 4), date(2026, 3, 6), date(2026, 3, 8)),
+        )
+
+    def test_end_of_rule(self):
+        monday = date(2026, 3, 2)
+        self.assertEqual(next_occurrence('FREQ=DAILY;COUNT=2', monday, monday), date(2026, 3, 3))
+        self.assertIsNone(next_occurrence('FREQ=DAILY;COUNT=2', monday, date(2026, 3, 3)))
+        # A UTC UNTIL compares as a date, so the last day still counts
+        self.assertEqual(
+            occurrence_dates('FREQ=DAILY;UNTIL=20260304T000000Z', monday, monday, date(2026, 3, 10)),
+            (date(2026, 3, 3), date(2026, 3, 4)),
+        )
+
+    def test_invalid_rules(self):
+        for rule in ('', 'FREQ=SOMETIMES', 'DTSTART:20260302\nRRULE:FREQ=DAILY\nRRULE:FREQ=WEEKLY'):
+            with self.subTest(rule=rule), self.assertRaises(ValueError):
+                parse_rule(rule)
+
+    @override_settings(TIME_ZONE='America/Jamaica')
+    def test_undated_series_anchors_on_the_local_creation_date(self):
+        # 03:00 UTC is still the previous evening in America/Jamaica
+        task = Task(created_at=datetime(2026, 3, 2, 3, tzinfo=dt_timezone.utc))
+        self.assertEqual(series_anchor(task), date(2026, 3, 1))
+
+
+@override_settings(ACTIVITY_LOG_MODE='sync')
+class SpawnTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('recur', 'recur@example.com', 'pw')
+        self.today = timezone.localdate()
+        self.series = Task.objects.create(
+            user=self.user, title='Stand-up', is_recurring=True, recurrence_rule='FREQ=DAILY', due_date=self.today,
+        )
+
+    def occurrences(self):
+        return list(Task.objects.filter(recurrence_parent=self.series).order_by('due_date'))
+
+    def test_completing_spawns_the_next_occurrence_once(self):
+        self.series.complete()
+        [occurrence] = self.occurrences()
+        self.assertEqual(occurrence.due_date, self.today + timedelta(days=1))
+        self.assertEqual((occurrence.title, occurrence.status), ('Stand-up', Task.Status.TODO))
+
+        # The series still has an open occurrence, so spawning again adds nothing
+        self.assertEqual(spawn_next_occurrences([self.series]), 0)
+        self.assertEqual(len(self.occurrences()), 1)
+
+    def test_completing_an_occurrence_spawns_the_one_after(self):
+        self.series.complete()
+        [occurrence] = self.occurrences()
+        occurrence.complete()
+        self.assertEqual(
+            [task.due_date for task in self.occurrences()],
+            [self.today + timedelta(days=1), self.today + timedelta(days=2)],
+        )
+
+    def test_edit_form_completion_spawns(self):
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('tasks:task_edit', args=[self.series.pk]), {
+            'title': self.series.title, 'priority': self.series.priority, 'status': 'completed',
+            'due_date': self.today.isoformat(),
+        })
+        self.assertEqual(response.status_code, 302)
+        self.series.refresh_from_db()
+        self.assertIsNotNone(self.series.completed_at)
+        self.assertEqual([task.due_date for task in self.occurrences()], [self.today + timedelta(days=1)])
+
+        # Saving it again completed is not a new completion
+        self.client.post(reverse('tasks:task_edit', args=[self.series.pk]), {
+            'title': 'Daily stand-up', 'priority': self.series.priority, 'status': 'completed',
+            'due_date': self.today.isoformat(),
+        })
+        self.assertEqual(len(self.occurrences()), 1)
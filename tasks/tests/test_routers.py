@@ -0,0 +1,78 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from django.urls import resolve, reverse
+
+from tasks.models import Task, WorkspaceStamp
+from tasks.routers import ReplicaRouter, choose_replica, is_pinned, is_read_only_view, use_replica
+from tasks.services.stamps import touch_workspace, workspace_version
+
+REPLICA = 'replica1'
+
+
+@mock.patch('tasks.routers.replicas', return_value=[REPLICA])
+class ReplicaRouterTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('router', 'router@example.com', 'pw')
+        self.factory = RequestFactory()
+        self.addCleanup(use_replica, None)
+        self.addCleanup(cache.clear)
+
+    def view(self, name, *args):
+        return resolve(reverse(name, args=args)).func
+
+    def choose(self, method, name, *args, user=None):
+        request = getattr(self.factory, method)('/')
+        request.user = user or self.user
+        return choose_replica(request, self.view(name, *args))
+
+    def test_read_only_views(self, replicas):
+        for name, args in [
+            ('tasks:my_day', ()), ('tasks:project_list', ()), ('tasks:project_detail', (1,)),
+            ('tasks:filter_detail', (1,)), ('tasks:api:task-list', ()), ('tasks:api:task-detail', (1,)),
+        ]:
+            with self.subTest(name=name):
+                self.assertTrue(is_read_only_view(self.view(name, *args)))
+        for name, args in [
+            ('tasks:task_create', ()), ('tasks:project_edit', (1,)), ('tasks:filter_edit', (1,)),
+            ('tasks:step_create', (1,)), ('tasks:reorder', ('task', 1)),
+        ]:
+            with self.subTest(name=name):
+                self.assertFalse(is_read_only_view(self.view(name, *args)))
+
+    def test_reads_go_to_a_replica(self, replicas):
+        self.assertEqual(self.choose('get', 'tasks:project_list'), REPLICA)
+        self.assertEqual(self.choose('head', 'tasks:project_detail', 1), REPLICA)
+        self.assertEqual(self.choose('get', 'tasks:project_list', user=AnonymousUser()), REPLICA)
+        self.assertIsNone(self.choose('post', 'tasks:project_list'))
+        self.assertIsNone(self.choose('get', 'tasks:task_create'))
+        replicas.return_value = []
+        self.assertIsNone(self.choose('get', 'tasks:project_list'))
+
+    def test_router_sends_only_the_tasks_app(self, replicas):
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_read(Task), 'default')
+        use_replica(REPLICA)
+        self.assertEqual(router.db_for_read(Task), REPLICA)
+        self.assertEqual(router.db_for_read(get_user_model()), 'default')
+        self.assertEqual(router.db_for_write(Task), 'default')
+
+    def test_unsafe_requests_pin_the_user(self, replicas):
+        self.client.force_login(self.user)
+        self.client.post(reverse('tasks:task_create'), {'title': 'Pinned', 'priority': 4, 'status': 'todo'})
+        self.assertTrue(is_pinned(self.user.pk))
+        self.assertIsNone(self.choose('get', 'tasks:project_list'))
+
+    def test_workspace_changes_pin_the_user(self, replicas):
+        with self.captureOnCommitCallbacks(execute=True):
+            touch_workspace(self.user.pk)
+        self.assertTrue(is_pinned(self.user.pk))
+
+    def test_stamp_is_read_from_the_primary(self, replicas):
+        WorkspaceStamp.objects.create(user=self.user, version=42)
+        cache.clear()
+        use_replica(REPLICA)  # not a configured database: reading from it would fail
+        self.assertEqual(workspace_version(self.user.pk), 42)
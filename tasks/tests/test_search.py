@@ -0,0 +1,58 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+
+from tasks.models import Task, TaskNote
+from tasks.services.search import rebuild_index, search_task_ids
+
+
+# The search triggers of migrations 0005 and 0012, by vendor. A table
+# rebuild in a later migration drops the triggers on that table silently.
+SEARCH_TRIGGERS = {
+    'sqlite': [
+        f'{table}_fts_{event}'
+        for table in ('tasks_task', 'tasks_taskstep', 'tasks_tasknote')
+        for event in ('insert', 'update', 'delete')
+    ],
+    'postgresql': ['tasks_task_search_insert', 'tasks_task_search_update', 'tasks_taskstep_search', 'tasks_tasknote_search'],
+}
+TRIGGER_NAMES_SQL = {
+    'sqlite': "SELECT name FROM sqlite_master WHERE type = 'trigger'",
+    'postgresql': 'SELECT tgname FROM pg_trigger WHERE NOT tgisinternal',
+}
+
+
+class SearchTriggerTests(TestCase):
+    def test_triggers_survive_migrations(self):
+        if connection.vendor not in SEARCH_TRIGGERS:
+            self.skipTest(f'No search index on {connection.vendor}')
+        with connection.cursor() as cursor:
+            cursor.execute(TRIGGER_NAMES_SQL[connection.vendor])
+            names = {row[0] for row in cursor.fetchall()}
+        self.assertEqual(set(SEARCH_TRIGGERS[connection.vendor]) - names, set())
+
+
+class NoteSearchTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('search', 'search@example.com', 'pw')
+        self.task = Task.objects.create(user=self.user, title='Groceries')
+        TaskNote.objects.create(task=self.task, content_html='<p>Buy <strong>oat milk</strong></p>')
+
+    def assertFinds(self, text, found):
+        self.assertEqual(search_task_ids(self.user, text), [self.task.pk] if found else [])
+
+    def test_note_text_matches_but_markup_does_not(self):
+        for _ in range(2):
+            self.assertFinds('oat milk', True)
+            self.assertFinds('strong', False)
+            self.assertFinds('p', False)
+            rebuild_index()  # the rebuilt index strips tags the same way
+
+    def test_editing_a_note_reindexes_its_text(self):
+        note = self.task.notes.get()
+        note.content_html = '<ul><li>Call the <em>plumber</em> &amp; landlord</li></ul>'
+        note.save(update_fields=['content_html'])
+        self.assertEqual(note.content_text, 'Call the plumber & landlord')
+        self.assertFinds('plumber', True)
+        self.assertFinds('milk', False)
+        self.assertFinds('em', False)
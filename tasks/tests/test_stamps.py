@@ -0,0 +1,34 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import TestCase
+
+from tasks.models import WorkspaceStamp
+from tasks.services.stamps import touch_workspace
+
+
+class TouchWorkspaceTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('stamps', 'stamps@example.com', 'pw')
+        touch_workspace(self.user.pk)
+
+    def version(self):
+        return WorkspaceStamp.objects.get(user_id=self.user.pk).version
+
+    def test_once_per_transaction(self):
+        version = self.version()
+        with self.assertNumQueries(0):
+            touch_workspace(self.user.pk)
+        self.assertEqual(self.version(), version)
+
+    def test_touch_again_after_savepoint_rollback(self):
+        user = get_user_model().objects.create_user('rolled-back', 'rb@example.com', 'pw')
+        try:
+            with transaction.atomic():
+                touch_workspace(user.pk)
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertFalse(WorkspaceStamp.objects.filter(user_id=user.pk).exists())
+        # The rolled-back touch must not count as done
+        touch_workspace(user.pk)
+        self.assertTrue(WorkspaceStamp.objects.filter(user_id=user.pk).exists())
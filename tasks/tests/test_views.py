@@ -0,0 +1,290 @@
+"""Query budgets and latency for every view in tasks/urls.py.
+
+Each scenario is one request, full page or HTMX partial, made against a
+seeded workspace with a warm cache. Its query count must stay within the
+scenario's budget, and the budget is the same for every workspace size:
+a view whose queries grow with the data fails on the larger one.
+
+Render times are sampled per scenario. With SRTASK_BENCHMARK_REPORT set,
+their p50/p95 are written there as JSON; with SRTASK_BENCHMARK_BASELINE
+pointing at an earlier report, a p50 or p95 beyond its tolerance over the
+baseline's fails the run. The margins are wide because shared CI runners
+easily vary 2x between runs; the query budgets are the precise check,
+the timings catch gross slowdowns. p95 gets the wider margin, as with a
+handful of samples it is close to the slowest one.
+
+The 100k-task workspace takes minutes to seed and runs only with
+SRTASK_BENCHMARK_LARGE=1.
+"""
+import gc
+import json
+import os
+import re
+import statistics
+import time
+import unittest
+from dataclasses import dataclass
+from typing import Callable
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from tasks.models import Area, Project, SavedFilter, Tag, Task, TaskNote, TaskStep
+from tasks.tests.seed import seed_workspace
+
+REPORT_PATH = os.environ.get('SRTASK_BENCHMARK_REPORT')
+BASELINE_PATH = os.environ.get('SRTASK_BENCHMARK_BASELINE')
+# (factor, slack in ms) a timing may grow by before it counts as a regression
+BASELINE_TOLERANCE = {'p50_ms': (2.0, 10.0), 'p95_ms': (3.0, 25.0)}
+HTMX = {'HTTP_HX_REQUEST': 'true'}
+
+_report = {}
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """One request to measure; request() returns (method, path, data) and may create what it needs."""
+    name: str
+    budget: int
+    request: Callable
+    htmx: bool = False
+    status: int = 200
+    content_type: str = None  # the data's encoding, when not a form
+
+
+def _percentile(samples, percent):
+    if len(samples) < 2:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method='inclusive')[percent - 1]
+
+
+def _load_baseline():
+    if not BASELINE_PATH:
+        return {}
+    with open(BASELINE_PATH) as f:
+        return json.load(f)
+
+
+class ViewBenchmarkMixin:
+    """Drives every scenario against a workspace of TASKS tasks."""
+    TASKS = 0
+    REPEAT = 5
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ws = seed_workspace(f'bench{cls.TASKS}', cls.TASKS)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        if REPORT_PATH and cls.__name__ in _report:
+            existing = {}
+            if os.path.exists(REPORT_PATH):
+                with open(REPORT_PATH) as f:
+                    existing = json.load(f)
+            existing[cls.__name__] = _report[cls.__name__]
+            with open(REPORT_PATH, 'w') as f:
+                json.dump(existing, f, indent=2, sort_keys=True)
+
+    def setUp(self):
+        # Activity written in the request, so it shows in the query counts
+        self.enterContext(override_settings(ACTIVITY_LOG_MODE='sync'))
+        cache.clear()
+        self.client.force_login(self.ws.user)
+
+    # Objects for the requests that consume one
+
+    def new_task(self, **fields):
+        return Task.objects.create(user=self.ws.user, title='Scratch task', project=self.ws.project, **fields)
+
+    def cursor(self, path):
+        """The next-page cursor the first page of path links to."""
+        match = re.search(r'cursor=([\w-]+)', self.client.get(path).content.decode())
+        self.assertIsNotNone(match, f'{path} has a single page; seed more tasks')
+        return f'{path}?cursor={match[1]}'
+
+    def scenarios(self):
+        ws = self.ws
+        task, project, area, tag, step, note = ws.task, ws.project, ws.area, ws.tag, ws.step, ws.note
+        get = lambda name, *args, query='': lambda: ('get', reverse(f'tasks:{name}', args=args) + query, None)
+        post = lambda name, *args, data=None: lambda: ('post', reverse(f'tasks:{name}', args=args), data or {})
+        task_form = {'title': 'Benchmark task', 'priority': 3, 'status': 'todo', 'project': project.pk, 'tags': [tag.pk]}
+        api_post = lambda name, data: lambda: ('post', reverse(f'tasks:api:{name}'), data())
+
+        return [
+            # Dashboard
+            Scenario('my_day', 8, get('my_day')),
+            Scenario('my_day[htmx]', 5, get('my_day'), htmx=True),
+            Scenario('upcoming', 8, get('upcoming')),
+            Scenario('upcoming[next page]', 3, lambda: ('get', self.cursor(reverse('tasks:upcoming')), None), htmx=True),
+            Scenario('anytime', 8, get('anytime')),
+            Scenario('anytime[next page]', 3, lambda: ('get', self.cursor(reverse('tasks:anytime')), None), htmx=True),
+            Scenario('search', 9, get('search', query='?q=review')),
+            Scenario('search[htmx]', 4, get('search', query='?q=review'), htmx=True),
+
+            # Tasks
+            Scenario('task_create[form]', 7, get('task_create')),
+            Scenario('task_create[form, htmx]', 4, get('task_create'), htmx=True),
+            Scenario('task_create', 12, post('task_create', data=task_form), status=302),
+            Scenario('task_create[htmx]', 13, post('task_create', data=task_form), htmx=True),
+            Scenario('task_detail', 11, get('task_detail', task.pk)),
+            Scenario('task_detail[htmx]', 8, get('task_detail', task.pk), htmx=True),
+            Scenario('task_edit[form]', 9, get('task_edit', task.pk)),
+            Scenario('task_edit[form, htmx]', 6, get('task_edit', task.pk), htmx=True),
+            Scenario('task_edit', 12, post('task_edit', task.pk, data={**task_form, 'title': task.title}), status=302),
+            Scenario('task_delete', 11, lambda: post('task_delete', self.new_task().pk)(), status=302),
+            Scenario('task_delete[htmx]', 11, lambda: post('task_delete', self.new_task().pk)(), htmx=True),
+            Scenario('task_toggle', 5, post('task_toggle', task.pk), status=302),
+            Scenario('task_toggle[htmx]', 7, post('task_toggle', task.pk), htmx=True),
+            Scenario('task_toggle_my_day[htmx]', 6, post('task_toggle_my_day', task.pk), htmx=True),
+            Scenario('task_bulk[htmx]', 11, lambda: post('task_bulk', data={
+                'action': 'tag', 'tag': tag.pk, 'task_ids': [self.new_task().pk for _ in range(20)],
+            })(), htmx=True),
+
+            # Steps, ordering and notes
+            Scenario('step_create[htmx]', 8, post('step_create', task.pk, data={'title': 'Another step'}), htmx=True),
+            Scenario('step_toggle[htmx]', 8, post('step_toggle', step.pk), htmx=True),
+            Scenario('step_delete[htmx]', 7, lambda: post('step_delete', TaskStep.objects.create(
+                task=task, title='Scratch step').pk)(), htmx=True),
+            Scenario('reorder[task]', 7, post('reorder', 'task', task.pk), status=204),
+            Scenario('reorder[step]', 9, post('reorder', 'step', step.pk), status=204),
+            Scenario('reorder[project]', 7, post('reorder', 'project', project.pk), status=204),
+            Scenario('reorder[area]', 7, post('reorder', 'area', area.pk), status=204),
+            Scenario('note_create[form, htmx]', 3, get('note_create', task.pk), htmx=True),
+            Scenario('note_create[htmx]', 4, post('note_create', task.pk, data={
+                'title': 'Note', 'content_html': '<p>Body</p>', 'content_json': '{}',
+            }), htmx=True),
+            Scenario('note_edit[form, htmx]', 4, get('note_edit', note.pk), htmx=True),
+            Scenario('note_delete[htmx]', 5, lambda: post('note_delete', TaskNote.objects.create(
+                task=task, title='Scratch note').pk)(), htmx=True),
+            Scenario('note_toggle_pin[htmx]', 5, post('note_toggle_pin', note.pk), htmx=True),
+
+            # Projects, areas, tags
+            Scenario('project_list', 10, get('project_list')),
+            Scenario('project_create[form]', 6, get('project_create')),
+            Scenario('project_create[htmx]', 4, post('project_create', data={'name': 'Benchmark', 'color': '#123456'}), htmx=True),
+            Scenario('project_detail', 9, get('project_detail', project.pk)),
+            Scenario('project_detail[next page]', 4, lambda: (
+                'get', self.cursor(reverse('tasks:project_detail', args=[project.pk])), None), htmx=True),
+            Scenario('project_edit[form]', 7, get('project_edit', project.pk)),
+            Scenario('project_delete[htmx]', 5, lambda: post('project_delete', Project.objects.create(
+                user=ws.user, name='Scratch').pk)(), htmx=True),
+            Scenario('area_list', 7, get('area_list')),
+            Scenario('area_create[htmx]', 6, lambda: post('area_create', data={
+                'name': f'Benchmark {time.monotonic_ns()}', 'color': '#123456'})(), htmx=True),
+            Scenario('area_detail', 7, get('area_detail', area.pk)),
+            Scenario('area_edit[form]', 6, get('area_edit', area.pk)),
+            Scenario('area_delete[htmx]', 5, lambda: post('area_delete', Area.objects.create(
+                user=ws.user, name=f'Scratch {time.monotonic_ns()}').pk)(), htmx=True),
+            Scenario('tag_list', 6, get('tag_list')),
+            Scenario('tag_create[htmx]', 3, lambda: post('tag_create', data={
+                'name': f'bench-{time.monotonic_ns()}', 'color': '#123456'})(), htmx=True),
+            Scenario('tag_detail', 9, get('tag_detail', tag.pk)),
+            Scenario('tag_edit[form]', 6, get('tag_edit', tag.pk)),
+            Scenario('tag_delete[htmx]', 5, lambda: post('tag_delete', Tag.objects.create(
+                user=ws.user, name=f'scratch-{time.monotonic_ns()}').pk)(), htmx=True),
+
+            # Saved filters
+            Scenario('filter_list', 7, get('filter_list')),
+            Scenario('filter_create', 3, post('filter_create', data={
+                'name': 'Benchmark', 'filter_config': '{"due": "week"}'}), status=302),
+            Scenario('filter_detail', 9, get('filter_detail', ws.saved_filter.pk)),
+            Scenario('filter_edit[form]', 6, get('filter_edit', ws.saved_filter.pk)),
+            Scenario('filter_delete', 4, lambda: post('filter_delete', SavedFilter.objects.create(
+                user=ws.user, name='Scratch').pk)(), status=302),
+
+            # Live updates; the test client is WSGI, which is answered without a stream
+            Scenario('live_events', 2, get('live_events'), status=204),
+
+            # Feeds and export
+            Scenario('calendar_feed', 6, get('calendar_feed')),
+            Scenario('ics_feed', 3, get('ics_feed', ws.feed.token)),
+            Scenario('workspace_export[csv]', 3, get('workspace_export', query='?format=csv&type=project')),
+
+            # JSON API
+            Scenario('api task list', 5, lambda: ('get', reverse('tasks:api:task-list'), None)),
+            Scenario('api task detail', 5, lambda: ('get', reverse('tasks:api:task-detail', args=[task.pk]), None)),
+            Scenario('api task search', 6, lambda: ('get', reverse('tasks:api:task-search') + '?q=review', None)),
+            Scenario('api task bulk-create', 12, api_post('task-bulk-create', lambda: [
+                {'title': f'Bulk task {i}', 'project': project.pk, 'tags': [tag.pk]} for i in range(20)
+            ]), content_type='application/json', status=201),
+            Scenario('api task bulk-update', 13, api_post('task-bulk-update', lambda: [
+                {'id': self.new_task().pk, 'title': 'Bulk renamed', 'tags': [tag.pk]} for _ in range(20)
+            ]), content_type='application/json'),
+            Scenario('api task bulk-complete', 12, api_post('task-bulk-complete', lambda: {
+                'ids': [self.new_task().pk for _ in range(20)],
+            }), content_type='application/json'),
+            Scenario('api step list', 3, lambda: ('get', reverse('tasks:api:step-list') + f'?task={task.pk}', None)),
+            Scenario('api project list', 3, lambda: ('get', reverse('tasks:api:project-list'), None)),
+            Scenario('api area list', 3, lambda: ('get', reverse('tasks:api:area-list'), None)),
+            Scenario('api tag list', 3, lambda: ('get', reverse('tasks:api:tag-list'), None)),
+        ]
+
+    def _measure(self, scenario):
+        method, path, data = scenario.request()
+        headers = HTMX if scenario.htmx else {}
+        if scenario.content_type:
+            headers = {**headers, 'content_type': scenario.content_type}
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = getattr(self.client, method)(path, data, **headers)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            elapsed = (time.perf_counter() - started) * 1000
+        self.assertEqual(response.status_code, scenario.status, path)
+        return elapsed, len(queries), queries
+
+    def test_views(self):
+        baseline = _load_baseline().get(type(self).__name__, {})
+        results = _report.setdefault(type(self).__name__, {})
+        for scenario in self.scenarios():
+            # A savepoint each, so one failing scenario cannot break the rest
+            with self.subTest(scenario.name), transaction.atomic():
+                self._measure(scenario)  # warm the caches
+                gc.collect()
+                timings, counts = [], []
+                for _ in range(self.REPEAT):
+                    elapsed, count, queries = self._measure(scenario)
+                    timings.append(elapsed)
+                    counts.append(count)
+                    if count > scenario.budget:
+                        self.fail(
+                            f'{scenario.name}: {count} queries, budget {scenario.budget}\n'
+                            + '\n'.join(query['sql'] for query in queries)
+                        )
+                results[scenario.name] = {
+                    'queries': max(counts),
+                    'budget': scenario.budget,
+                    'p50_ms': round(_percentile(timings, 50), 2),
+                    'p95_ms': round(_percentile(timings, 95), 2),
+                    'samples': len(timings),
+                }
+                previous = baseline.get(scenario.name, {})
+                for stat, (factor, slack) in BASELINE_TOLERANCE.items():
+                    if stat in previous:
+                        self.assertLessEqual(
+                            results[scenario.name][stat], previous[stat] * factor + slack,
+                            f'{scenario.name}: {stat} regressed from {previous[stat]}',
+                        )
+
+
+class SmallWorkspaceViewTests(ViewBenchmarkMixin, TestCase):
+    TASKS = 10
+    REPEAT = 10
+
+    def scenarios(self):
+        # Too few tasks for a second page
+        return [s for s in super().scenarios() if 'next page' not in s.name]
+
+
+class WorkspaceViewTests(ViewBenchmarkMixin, TestCase):
+    TASKS = 1_000
+
+
+@unittest.skipUnless(os.environ.get('SRTASK_BENCHMARK_LARGE'), 'set SRTASK_BENCHMARK_LARGE=1 to seed 100k tasks')
+class LargeWorkspaceViewTests(ViewBenchmarkMixin, TestCase):
+    TASKS = 100_000
+    REPEAT = 3
@@ -1,4 +1,4 @@
-from django.urls import path
+from django.urls import include, path
 from . import views
 
 app_name = 'tasks'
@@ -8,6 +8,7 @@ urlpatterns = [
     path('', views.my_day, name='my_day'),
     path('upcoming/', views.upcoming, name='upcoming'),
     path('anytime/', views.anytime, name='anytime'),
+    path('search/', views.search, name='search'),
 
     # Task CRUD
     path('tasks/create/', views.task_create, name='task_create'),
@@ -16,12 +17,16 @@ urlpatterns = [
     path('tasks/<int:pk>/delete/', views.task_delete, name='task_delete'),
     path('tasks/<int:pk>/toggle/', views.task_toggle, name='task_toggle'),
     path('tasks/<int:pk>/toggle-my-day/', views.task_toggle_my_day, name='task_toggle_my_day'),
+    path('tasks/bulk/', views.task_bulk, name='task_bulk'),
 
     # Task Steps
     path('tasks/<int:task_pk>/steps/create/', views.step_create, name='step_create'),
     path('steps/<int:pk>/toggle/', views.step_toggle, name='step_toggle'),
     path('steps/<int:pk>/delete/', views.step_delete, name='step_delete'),
 
+    # Drag-and-drop ordering
+    path('reorder/<str:kind>/<int:pk>/', views.reorder, name='reorder'),
+
     # Task Notes
     path('tasks/<int:task_pk>/notes/create/', views.note_create, name='note_create'),
     path('notes/<int:pk>/edit/', views.note_edit, name='note_edit'),
@@ -48,4 +53,24 @@ urlpatterns = [
     path('tags/<int:pk>/', views.tag_detail, name='tag_detail'),
     path('tags/<int:pk>/edit/', views.tag_edit, name='tag_edit'),
     path('tags/<int:pk>/delete/', views.tag_delete, name='tag_delete'),
+
+    # Saved filters
+    path('filters/', views.filter_list, name='filter_list'),
+    path('filters/new/', views.filter_create, name='filter_create'),
+    path('filters/<int:pk>/', views.filter_detail, name='filter_detail'),
+    path('filters/<int:pk>/edit/', views.filter_edit, name='filter_edit'),
+    path('filters/<int:pk>/delete/', views.filter_delete, name='filter_delete'),
+
+    # Live updates (Server-Sent Events)
+    path('events/', views.live_events, name='live_events'),
+
+    # iCalendar feed
+    path('calendar-feed/', views.calendar_feed, name='calendar_feed'),
+    path('feeds/<str:token>.ics', views.ics_feed, name='ics_feed'),
+
+    # Workspace export
+    path('export/', views.workspace_export, name='workspace_export'),
+
+    # JSON API
+    path('api/', include('tasks.api.urls')),
 ]
@@ -2,3 +2,9 @@ from .dashboard import *
 from .tasks import *
 from .projects import *
 from .notes import *
+from .search import *
+from .filters import *
+from .feeds import *
+from .workspace import *
+from .ordering import *
+from .live import *
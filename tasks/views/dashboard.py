@@ -1,26 +1,28 @@
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.shortcuts import render
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 
 from tasks.models import Task
+from tasks.services.pagination import apaginate_tasks, merge_page
+from tasks.services.recurrence import iter_virtual_occurrences
+from tasks.services.rows import aattach_rows
+from tasks.services.stamps import conditional_on_workspace
+from tasks.shortcuts import arender, auser
+
+UPCOMING_ORDERING = ['due_date', 'sort_order', 'id']
 
 
 @login_required
-def my_day(request):
+@conditional_on_workspace
+async def my_day(request):
     """My Day view - daily focus list."""
-    today = timezone.now().date()
-    tasks = Task.objects.filter(
-        user=request.user,
-        status__in=[Task.Status.TODO, Task.Status.IN_PROGRESS],
-    ).filter(
-        # Tasks explicitly added to My Day or due today
-        is_my_day=True,
-    ) | Task.objects.filter(
-        user=request.user,
-        status__in=[Task.Status.TODO, Task.Status.IN_PROGRESS],
-        due_date=today,
-    )
-    tasks = tasks.distinct().select_related('project').prefetch_related('tags', 'steps')
+    today = timezone.localdate()
+    user = await auser(request)
+    tasks = await aattach_rows([task async for task in Task.objects.my_day(user, today).for_list().aiterator()])
 
     context = {
         'tasks': tasks,
@@ -28,40 +30,62 @@ def my_day(request):
         'page_title': 'My Day',
         'today': today,
     }
-    return render(request, 'tasks/my_day.html', context)
+    return await arender(request, 'tasks/my_day.html', context)
 
 
 @login_required
-def upcoming(request):
+@conditional_on_workspace
+async def upcoming(request):
     """Upcoming view - future tasks grouped by date."""
-    today = timezone.now().date()
+    today = timezone.localdate()
+    user = await auser(request)
     tasks = Task.objects.filter(
-        user=request.user,
+        user=user,
         status__in=[Task.Status.TODO, Task.Status.IN_PROGRESS],
         due_date__gte=today,
-    ).select_related('project').prefetch_related('tags', 'steps').order_by('due_date', 'sort_order')
+    ).for_list()
+    page = await apaginate_tasks(tasks, request, ordering=UPCOMING_ORDERING)
+    # Date group the previous page ended in, so its header isn't repeated
+    continued_date = parse_date(page.after.get('due_date') or '')
+
+    if settings.RECURRENCE_VIRTUAL_UPCOMING:
+        after = (continued_date, page.after['sort_order'], page.after['id']) if page.after else None
+        occurrences = iter_virtual_occurrences(
+            user, today, today + timedelta(days=settings.RECURRENCE_HORIZON_DAYS), after=after,
+        )
+        # Expanding series queries as merge_page pulls occurrences, so it runs off the event loop
+        page = await sync_to_async(merge_page)(page, occurrences, UPCOMING_ORDERING)
+    await aattach_rows(page)
 
     context = {
-        'tasks': tasks,
+        'tasks': page,
         'view_name': 'upcoming',
         'page_title': 'Upcoming',
         'today': today,
+        'continued_date': continued_date,
     }
-    return render(request, 'tasks/upcoming.html', context)
+    if request.htmx and page.after:
+        return await arender(request, 'partials/upcoming_page.html', context)
+    return await arender(request, 'tasks/upcoming.html', context)
 
 
 @login_required
-def anytime(request):
+@conditional_on_workspace
+async def anytime(request):
     """Anytime view - tasks with no due date."""
     tasks = Task.objects.filter(
-        user=request.user,
+        user=await auser(request),
         status__in=[Task.Status.TODO, Task.Status.IN_PROGRESS],
         due_date__isnull=True,
-    ).select_related('project').prefetch_related('tags', 'steps')
+    ).for_list()
+    page = await apaginate_tasks(tasks, request)
+    await aattach_rows(page)
 
     context = {
-        'tasks': tasks,
+        'tasks': page,
         'view_name': 'anytime',
         'page_title': 'Anytime',
     }
-    return render(request, 'tasks/anytime.html', context)
+    if request.htmx and page.after:
+        return await arender(request, 'partials/task_page.html', context)
+    return await arender(request, 'tasks/anytime.html', context)
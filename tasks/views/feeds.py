@@ -0,0 +1,43 @@
+from django.contrib.auth.decorators import login_required
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+
+from tasks.models import CalendarFeed
+from tasks.services.ics import feed_version, iter_feed
+
+
+@login_required
+def calendar_feed(request):
+    """Show the user's feed URL; POST replaces it with a new one."""
+    feed, _ = CalendarFeed.objects.get_or_create(user=request.user)
+    if request.method == 'POST':
+        feed.reset_token()
+        return redirect('tasks:calendar_feed')
+    return render(request, 'tasks/calendar_feed.html', {
+        'feed_url': request.build_absolute_uri(reverse('tasks:ics_feed', args=[feed.token])),
+        'view_name': 'calendar_feed',
+        'page_title': 'Calendar feed',
+    })
+
+
+@require_safe
+def ics_feed(request, token):
+    """The iCalendar feed itself. The secret token in the URL is the only credential.
+
+    Clients poll this; when nothing changed they get a 304 for the price
+    of one aggregate query.
+    """
+    feed = get_object_or_404(CalendarFeed.objects.select_related('user'), token=token)
+    last_modified, etag = feed_version(feed.user)
+    response = get_conditional_response(request, etag=etag, last_modified=int(last_modified.timestamp()))
+    if response is None:
+        response = StreamingHttpResponse(iter_feed(feed.user), content_type='text/calendar; charset=utf-8')
+        response['Content-Disposition'] = 'inline; filename="srtask.ics"'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified.timestamp())
+    response['Cache-Control'] = 'private, no-cache'
+    return response
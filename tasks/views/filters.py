@@ -0,0 +1,94 @@
+from django.contrib.auth.decorators import login_required
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.utils import timezone
+from django.views.decorators.http import require_POST
+
+from tasks.forms import SavedFilterForm
+from tasks.models import SavedFilter
+from tasks.services.filters import filter_counts, filter_tasks
+from tasks.services.pagination import keyset_paginate, paginate_tasks
+from tasks.services.rows import attach_rows
+
+FILTER_PAGE_SIZE = 25
+
+
+@login_required
+def filter_list(request):
+    """List saved filters with their task counts."""
+    page = keyset_paginate(
+        SavedFilter.objects.filter(user=request.user), ['name', 'id'],
+        request.GET.get('cursor', ''), page_size=FILTER_PAGE_SIZE,
+    )
+    counts = filter_counts(request.user, page.items, timezone.localdate())
+    context = {
+        'filters': [(saved_filter, counts[saved_filter.pk]) for saved_filter in page],
+        'page': page,
+        'view_name': 'filters',
+        'page_title': 'Filters',
+    }
+    if request.htmx and page.after:
+        return render(request, 'partials/filter_page.html', context)
+    return render(request, 'tasks/filter_list.html', context)
+
+
+@login_required
+def filter_create(request):
+    """Create a new saved filter."""
+    if request.method == 'POST':
+        form = SavedFilterForm(request.POST, user=request.user)
+        if form.is_valid():
+            saved_filter = form.save(commit=False)
+            saved_filter.user = request.user
+            saved_filter.save()
+            return redirect('tasks:filter_detail', pk=saved_filter.pk)
+    else:
+        form = SavedFilterForm(user=request.user)
+    return render(request, 'tasks/filter_form.html', {'form': form, 'page_title': 'New Filter'})
+
+
+@login_required
+def filter_detail(request, pk):
+    """View the tasks matching a saved filter."""
+    saved_filter = get_object_or_404(SavedFilter, pk=pk, user=request.user)
+    tasks = filter_tasks(saved_filter, timezone.localdate()).for_list()
+    page = paginate_tasks(tasks, request)
+    attach_rows(page)
+
+    context = {
+        'saved_filter': saved_filter,
+        'tasks': page,
+        'view_name': 'filter_detail',
+        'current_filter_pk': saved_filter.pk,
+        'page_title': saved_filter.name,
+    }
+    if request.htmx and page.after:
+        return render(request, 'partials/task_page.html', context)
+    return render(request, 'tasks/filter_detail.html', context)
+
+
+@login_required
+def filter_edit(request, pk):
+    """Edit a saved filter."""
+    saved_filter = get_object_or_404(SavedFilter, pk=pk, user=request.user)
+    if request.method == 'POST':
+        form = SavedFilterForm(request.POST, instance=saved_filter, user=request.user)
+        if form.is_valid():
+            form.save()
+            return redirect('tasks:filter_detail', pk=saved_filter.pk)
+    else:
+        form = SavedFilterForm(instance=saved_filter, user=request.user)
+    return render(request, 'tasks/filter_form.html', {
+        'form': form, 'saved_filter': saved_filter, 'page_title': f'Edit {saved_filter.name}',
+    })
+
+
+@login_required
+@require_POST
+def filter_delete(request, pk):
+    """Delete a saved filter."""
+    saved_filter = get_object_or_404(SavedFilter, pk=pk, user=request.user)
+    saved_filter.delete()
+    if request.htmx:
+        return HttpResponse('')
+    return redirect('tasks:filter_list')
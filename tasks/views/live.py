@@ -0,0 +1,57 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import login_required
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views.decorators.http import require_safe
+
+from tasks.models import Task
+from tasks.services.live import sse_event, task_changes
+from tasks.services.rows import attach_rows
+from tasks.shortcuts import auser
+
+
+@login_required
+@require_safe
+async def live_events(request):
+    """Stream changes to the user's tasks as Server-Sent Events.
+
+    Each event is named task-<pk> and carries the task's current row, or
+    nothing once the task is gone; rows listen for their own name and
+    swap themselves. Under WSGI an open stream would hold a worker thread
+    per tab, so it answers 204 instead, which tells browsers to stop
+    reconnecting.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    user = await auser(request)
+    response = StreamingHttpResponse(_stream(user.pk), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # don't let nginx buffer the stream
+    return response
+
+
+# Rows rendered per query when one change names many tasks
+RENDER_BATCH_SIZE = 200
+
+
+async def _stream(user_id):
+    async for change in task_changes(user_id):
+        if change is None:
+            yield ': keepalive\n\n'
+            continue
+        task_ids = change['tasks']
+        for start in range(0, len(task_ids), RENDER_BATCH_SIZE):
+            batch = task_ids[start:start + RENDER_BATCH_SIZE]
+            rows = {} if change['deleted'] else await sync_to_async(_render_rows)(user_id, batch)
+            yield ''.join(sse_event(f'task-{pk}', rows.get(pk, '')) for pk in batch)
+
+
+def _render_rows(user_id, task_ids):
+    """{pk: row_html} for those of task_ids the user still has."""
+    try:
+        tasks = list(Task.objects.for_list().filter(pk__in=task_ids, user_id=user_id))
+        return {task.pk: task.row_html for task in attach_rows(tasks)}
+    finally:
+        # Streams stay open for hours; don't hold a connection between events
+        close_old_connections()
@@ -31,7 +31,7 @@ def note_create(request, task_pk):
 @login_required
 def note_edit(request, pk):
     """Edit a note."""
-    note = get_object_or_404(TaskNote, pk=pk, task__user=request.user)
+    note = get_object_or_404(TaskNote.objects.select_related('task'), pk=pk, task__user=request.user)
     if request.method == 'POST':
         form = TaskNoteForm(request.POST, instance=note)
         if form.is_valid():
@@ -51,7 +51,7 @@ def note_edit(request, pk):
 @require_POST
 def note_delete(request, pk):
     """Delete a note."""
-    note = get_object_or_404(TaskNote, pk=pk, task__user=request.user)
+    note = get_object_or_404(TaskNote.objects.select_related('task'), pk=pk, task__user=request.user)
     task_pk = note.task.pk
     note.delete()
     if request.htmx:
@@ -63,7 +63,7 @@ def note_delete(request, pk):
 @require_POST
 def note_toggle_pin(request, pk):
     """Toggle note pinned status."""
-    note = get_object_or_404(TaskNote, pk=pk, task__user=request.user)
+    note = get_object_or_404(TaskNote.objects.select_related('task'), pk=pk, task__user=request.user)
     note.is_pinned = not note.is_pinned
     note.save(update_fields=['is_pinned', 'updated_at'])
     if request.htmx:
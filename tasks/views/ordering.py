@@ -0,0 +1,40 @@
+from django.contrib.auth.decorators import login_required
+from django.http import Http404, HttpResponse, HttpResponseBadRequest
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_POST
+
+from tasks.models import Area, Project, Task, TaskStep
+from tasks.services.ordering import move, siblings
+
+REORDERABLE = {
+    'task': (Task, 'user'),
+    'step': (TaskStep, 'task__user'),
+    'project': (Project, 'user'),
+    'area': (Area, 'user'),
+}
+
+
+@login_required
+@require_POST
+def reorder(request, kind, pk):
+    """Move a task, step, project or area after (or before) another in its list.
+
+    The drop target's pk comes as POST after= or before=; with neither the
+    item moves to the end. Answers 204, as the client has already moved
+    the row.
+    """
+    if kind not in REORDERABLE:
+        raise Http404('Nothing to reorder')
+    model, owner = REORDERABLE[kind]
+    instance = get_object_or_404(model, pk=pk, **{owner: request.user})
+    neighbours = {}
+    for side in ('after', 'before'):
+        value = request.POST.get(side)
+        if not value:
+            continue
+        try:
+            neighbours[side] = siblings(instance).exclude(pk=instance.pk).get(pk=int(value))
+        except (ValueError, model.DoesNotExist):
+            return HttpResponseBadRequest(f'{side} must be another item in the same list')
+    move(instance, **neighbours)
+    return HttpResponse(status=204)
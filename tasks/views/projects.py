@@ -5,6 +5,10 @@ from django.views.decorators.http import require_POST
 
 from tasks.models import Area, Project, Tag, Task
 from tasks.forms import AreaForm, ProjectForm, TagForm
+from tasks.services.ordering import save_at_end
+from tasks.services.pagination import paginate_tasks
+from tasks.services.rows import attach_rows
+from tasks.services.stamps import conditional_on_workspace
 
 
 @login_required
@@ -29,7 +33,7 @@ def project_create(request):
         if form.is_valid():
             project = form.save(commit=False)
             project.user = request.user
-            project.save()
+            save_at_end(project)
             if request.htmx:
                 return render(request, 'partials/project_item.html', {'project': project})
             return redirect('tasks:project_detail', pk=project.pk)
@@ -43,20 +47,25 @@ def project_create(request):
 
 
 @login_required
+@conditional_on_workspace
 def project_detail(request, pk):
     """View project and its tasks."""
     project = get_object_or_404(Project, pk=pk, user=request.user)
     tasks = Task.objects.filter(
         project=project,
         status__in=[Task.Status.TODO, Task.Status.IN_PROGRESS],
-    ).prefetch_related('tags', 'steps')
+    ).for_list()
+    page = paginate_tasks(tasks, request)
+    attach_rows(page)
 
     context = {
         'project': project,
-        'tasks': tasks,
+        'tasks': page,
         'view_name': 'project_detail',
         'page_title': project.name,
     }
+    if request.htmx and page.after:
+        return render(request, 'partials/task_page.html', context)
     return render(request, 'tasks/project_detail.html', context)
 
 
@@ -113,7 +122,7 @@ def area_create(request):
         if form.is_valid():
             area = form.save(commit=False)
             area.user = request.user
-            area.save()
+            save_at_end(area)
             if request.htmx:
                 return render(request, 'partials/area_item.html', {'area': area})
             return redirect('tasks:area_list')
@@ -204,6 +213,7 @@ def tag_create(request):
 
 
 @login_required
+@conditional_on_workspace
 def tag_detail(request, pk):
     """View tasks with this tag."""
     tag = get_object_or_404(Tag, pk=pk, user=request.user)
@@ -211,14 +221,18 @@ def tag_detail(request, pk):
         user=request.user,
         tags=tag,
         status__in=[Task.Status.TODO, Task.Status.IN_PROGRESS],
-    ).select_related('project').prefetch_related('tags', 'steps')
+    ).for_list()
+    page = paginate_tasks(tasks, request)
+    attach_rows(page)
 
     context = {
         'tag': tag,
-        'tasks': tasks,
+        'tasks': page,
         'view_name': 'tag_detail',
         'page_title': f'#{tag.name}',
     }
+    if request.htmx and page.after:
+        return render(request, 'partials/task_page.html', context)
     return render(request, 'tasks/tag_detail.html', context)
 
 
@@ -0,0 +1,28 @@
+from django.contrib.auth.decorators import login_required
+from django.shortcuts import render
+
+from tasks.services.rows import attach_rows
+from tasks.services.search import search_tasks
+
+
+@login_required
+def search(request):
+    """Ranked full-text search over tasks, their steps and notes."""
+    query = request.GET.get('q', '').strip()
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        page = 1
+    results = search_tasks(request.user, query, page=page) if query else None
+    if results:
+        attach_rows(results)
+
+    context = {
+        'query': query,
+        'results': results,
+        'view_name': 'search',
+        'page_title': 'Search',
+    }
+    if request.htmx and not request.htmx.boosted:
+        return render(request, 'partials/search_results.html', context)
+    return render(request, 'tasks/search.html', context)
@@ -1,11 +1,22 @@
+import asyncio
+
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponse
-from django.shortcuts import render, get_object_or_404, redirect
+from django.db import transaction
+from django.db.models import aprefetch_related_objects
+from django.http import HttpResponse, HttpResponseBadRequest
+from django.shortcuts import aget_object_or_404, render, get_object_or_404, redirect
 from django.views.decorators.http import require_POST
 from django.utils import timezone
 
-from tasks.models import Task, TaskStep, ActivityLog
+from tasks.models import Project, Tag, Task, TaskStep
 from tasks.forms import TaskForm, TaskStepForm
+from tasks.services.activity import log_activity
+from tasks.services.bulk import BULK_ACTIONS, apply_bulk_action
+from tasks.services.ordering import save_at_end
+from tasks.services.recurrence import spawn_next_occurrences
+from tasks.services.rows import attach_rows
+from tasks.services.steps import adjust_step_counters
+from tasks.shortcuts import alist, arender, auser
 
 
 @login_required
@@ -16,12 +27,14 @@ def task_create(request):
         if form.is_valid():
             task = form.save(commit=False)
             task.user = request.user
-            task.save()
-            form.save_m2m()
-            ActivityLog.objects.create(task=task, action='created', detail='Task created')
+            with transaction.atomic():  # tags land in the same workspace version as the task
+                save_at_end(task)
+                form.save_m2m()
+            log_activity(task, 'created', 'Task created')
 
             if request.htmx:
-                return render(request, 'partials/task_item.html', {'task': task})
+                attach_rows([task])
+                return render(request, 'partials/task_row.html', {'task': task})
             return redirect('tasks:my_day')
     else:
         form = TaskForm()
@@ -34,11 +47,12 @@ def task_create(request):
 
 
 @login_required
-def task_detail(request, pk):
+async def task_detail(request, pk):
     """View task details."""
-    task = get_object_or_404(Task, pk=pk, user=request.user)
-    steps = task.steps.all()
-    notes = task.notes.all()
+    task = await aget_object_or_404(Task.objects.select_related('project'), pk=pk, user=await auser(request))
+    steps, notes, _ = await asyncio.gather(
+        alist(task.steps.all()), alist(task.notes.all()), aprefetch_related_objects([task], 'tags'),
+    )
     step_form = TaskStepForm()
 
     context = {
@@ -48,8 +62,8 @@ def task_detail(request, pk):
         'step_form': step_form,
     }
     if request.htmx:
-        return render(request, 'partials/task_detail.html', context)
-    return render(request, 'tasks/task_detail.html', context)
+        return await arender(request, 'partials/task_detail.html', context)
+    return await arender(request, 'tasks/task_detail.html', context)
 
 
 @login_required
@@ -57,12 +71,21 @@ def task_edit(request, pk):
     """Edit a task."""
     task = get_object_or_404(Task, pk=pk, user=request.user)
     if request.method == 'POST':
+        was_completed = task.status == Task.Status.COMPLETED
         form = TaskForm(request.POST, instance=task)
         if form.is_valid():
-            form.save()
-            ActivityLog.objects.create(task=task, action='edited', detail='Task updated')
+            completed = task.status == Task.Status.COMPLETED
+            if completed != was_completed:
+                task.completed_at = timezone.now() if completed else None
+            with transaction.atomic():
+                form.save()
+                # Like task_toggle, completing one occurrence must not end its series
+                if completed and not was_completed and (task.is_recurring or task.recurrence_parent_id):
+                    spawn_next_occurrences([task])
+            log_activity(task, 'edited', 'Task updated')
             if request.htmx:
-                return render(request, 'partials/task_item.html', {'task': task})
+                attach_rows([task])
+                return render(request, 'partials/task_row.html', {'task': task})
             return redirect('tasks:task_detail', pk=task.pk)
     else:
         form = TaskForm(instance=task)
@@ -92,13 +115,14 @@ def task_toggle(request, pk):
     task = get_object_or_404(Task, pk=pk, user=request.user)
     if task.status == Task.Status.COMPLETED:
         task.uncomplete()
-        ActivityLog.objects.create(task=task, action='uncompleted', detail='Task reopened')
+        log_activity(task, 'uncompleted', 'Task reopened')
     else:
         task.complete()
-        ActivityLog.objects.create(task=task, action='completed', detail='Task completed')
+        log_activity(task, 'completed', 'Task completed')
 
     if request.htmx:
-        return render(request, 'partials/task_item.html', {'task': task})
+        attach_rows([task])
+        return render(request, 'partials/task_row.html', {'task': task})
     return redirect('tasks:my_day')
 
 
@@ -109,11 +133,37 @@ def task_toggle_my_day(request, pk):
     task = get_object_or_404(Task, pk=pk, user=request.user)
     task.is_my_day = not task.is_my_day
     if task.is_my_day:
-        task.my_day_date = timezone.now().date()
+        task.my_day_date = timezone.localdate()
     task.save(update_fields=['is_my_day', 'my_day_date', 'updated_at'])
 
     if request.htmx:
-        return render(request, 'partials/task_item.html', {'task': task})
+        attach_rows([task])
+        return render(request, 'partials/task_row.html', {'task': task})
+    return redirect('tasks:my_day')
+
+
+@login_required
+@require_POST
+def task_bulk(request):
+    """Apply one action to all selected tasks."""
+    action = request.POST.get('action')
+    if action not in BULK_ACTIONS:
+        return HttpResponseBadRequest('Unknown bulk action')
+    task_ids = [int(pk) for pk in request.POST.getlist('task_ids') if pk.isdigit()]
+    project = tag = None
+    if action == 'move' and request.POST.get('project'):
+        project = get_object_or_404(Project, pk=request.POST['project'], user=request.user)
+    if action in ('tag', 'untag'):
+        tag = get_object_or_404(Tag, pk=request.POST.get('tag') or 0, user=request.user)
+
+    ids = apply_bulk_action(Task.objects.filter(user=request.user, pk__in=task_ids), action, project, tag)
+
+    if request.htmx:
+        # One response of out-of-band swaps, one per affected row
+        if action == 'delete':
+            return render(request, 'partials/bulk_result.html', {'deleted_ids': ids})
+        tasks = Task.objects.filter(pk__in=ids).for_list().prefetch_related('tags')
+        return render(request, 'partials/bulk_result.html', {'tasks': tasks})
     return redirect('tasks:my_day')
 
 
@@ -128,8 +178,9 @@ def step_create(request, task_pk):
     if form.is_valid():
         step = form.save(commit=False)
         step.task = task
-        step.sort_order = task.steps.count()
-        step.save()
+        with transaction.atomic():
+            save_at_end(step)
+            adjust_step_counters(task.pk, total=1)
         if request.htmx:
             return render(request, 'partials/step_item.html', {'step': step, 'task': task})
     return redirect('tasks:task_detail', pk=task_pk)
@@ -139,9 +190,13 @@ def step_create(request, task_pk):
 @require_POST
 def step_toggle(request, pk):
     """Toggle step completion."""
-    step = get_object_or_404(TaskStep, pk=pk, task__user=request.user)
-    step.is_completed = not step.is_completed
-    step.save(update_fields=['is_completed', 'updated_at'])
+    with transaction.atomic():
+        step = get_object_or_404(
+            TaskStep.objects.select_related('task').select_for_update(), pk=pk, task__user=request.user,
+        )
+        step.is_completed = not step.is_completed
+        step.save(update_fields=['is_completed', 'updated_at'])
+        adjust_step_counters(step.task_id, done=1 if step.is_completed else -1)
     if request.htmx:
         return render(request, 'partials/step_item.html', {'step': step, 'task': step.task})
     return redirect('tasks:task_detail', pk=step.task.pk)
@@ -151,9 +206,13 @@ def step_toggle(request, pk):
 @require_POST
 def step_delete(request, pk):
     """Delete a step."""
-    step = get_object_or_404(TaskStep, pk=pk, task__user=request.user)
-    task_pk = step.task.pk
-    step.delete()
+    with transaction.atomic():
+        step = get_object_or_404(
+            TaskStep.objects.select_related('task').select_for_update(), pk=pk, task__user=request.user,
+        )
+        task_pk = step.task_id
+        step.delete()
+        adjust_step_counters(task_pk, total=-1, done=-1 if step.is_completed else 0)
     if request.htmx:
         return HttpResponse('')
     return redirect('tasks:task_detail', pk=task_pk)
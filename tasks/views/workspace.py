@@ -0,0 +1,26 @@
+from django.contrib.auth.decorators import login_required
+from django.http import Http404, StreamingHttpResponse
+from django.utils import timezone
+from django.views.decorators.http import require_safe
+
+from tasks.services.workspace import KINDS_BY_NAME, iter_csv, iter_ndjson
+
+
+@require_safe
+@login_required
+def workspace_export(request):
+    """Download the whole workspace as NDJSON, or one row type as CSV with ?format=csv&type=task."""
+    user = request.user
+    stamp = timezone.localdate().isoformat()
+    if request.GET.get('format') == 'csv':
+        kind = request.GET.get('type', 'task')
+        if kind not in KINDS_BY_NAME:
+            raise Http404('Unknown export type')
+        response = StreamingHttpResponse(iter_csv(user, kind), content_type='text/csv; charset=utf-8')
+        filename = f'srtask-{kind}-{stamp}.csv'
+    else:
+        response = StreamingHttpResponse(iter_ndjson(user), content_type='application/x-ndjson; charset=utf-8')
+        filename = f'srtask-{stamp}.ndjson'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['Cache-Control'] = 'private, no-store'
+    return response